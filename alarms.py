@@ -0,0 +1,268 @@
+import time  # Wall-clock timing
+from collections import deque
+
+import numpy as np  # Numerical operations library
+from PyQt6.QtCore import QObject, pyqtSignal
+
+import tracing
+
+KINDS = ('high', 'low', 'rate', 'flatline')
+SOURCES = ('signal', 'heart_rate', 'rr_interval')
+LATENCY_HISTORY = 1000  # Detection latencies kept for measurement
+
+
+class AlarmRule:
+    # One condition on a channel. `source` is the raw signal or one of the
+    # vitals derived from an ECG channel; `kind` is what is checked:
+    #   high      value above `limit`
+    #   low       value below `limit`
+    #   rate      absolute rate of change above `limit` per second
+    #   flatline  sample-to-sample change at most `limit` (or no signal at
+    #             all), as when a lead comes off
+    # The condition must hold for `delay` seconds before the alarm is raised,
+    # and the alarm clears once the value is `hysteresis` back inside the limit.
+    __slots__ = ('name', 'kind', 'limit', 'hysteresis', 'delay', 'source')
+
+    def __init__(self, name, kind, limit, hysteresis=0.0, delay=0.0, source='signal'):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown alarm kind: {kind}")
+        if source not in SOURCES:
+            raise ValueError(f"Unknown alarm source: {source}")
+        self.name = name
+        self.kind = kind
+        self.limit = float(limit)
+        self.hysteresis = float(hysteresis)
+        self.delay = float(delay)
+        self.source = source
+
+
+def default_rules(ecg=False):
+    # Every channel alarms when its lead comes off; ECG channels also on heart rate
+    rules = [AlarmRule('Leads off', 'flatline', 1e-6, delay=2.0)]
+    if ecg:
+        rules += [AlarmRule('HR high', 'high', 150.0, hysteresis=5.0, delay=3.0, source='heart_rate'),
+                  AlarmRule('HR low', 'low', 40.0, hysteresis=5.0, delay=3.0, source='heart_rate')]
+    return rules
+
+
+class Alarm:
+    __slots__ = ('view_key', 'channel', 'channel_name', 'rule', 'value', 'sample_index', 'time', 'latency_ms')
+
+    def __init__(self, view_key, channel, channel_name, rule, value, sample_index, time, latency_ms):
+        self.view_key = view_key
+        self.channel = channel  # Channel index in the view
+        self.channel_name = channel_name
+        self.rule = rule
+        self.value = value  # Value that triggered (or cleared) the alarm
+        self.sample_index = sample_index  # Sample at which the condition was met
+        self.time = time  # Signal time of that sample, in seconds
+        self.latency_ms = latency_ms  # Sample due -> alarm raised
+
+    def describe(self):
+        return f"{self.channel_name}: {self.rule.name}"
+
+
+class AlarmTable:
+    # The rules of one ChannelBlock compiled into arrays, one entry per
+    # (channel, rule), so a frame's new samples are checked against every
+    # rule of every channel with a handful of whole-array operations.
+    #
+    # Each entry carries the length of its current run of violating
+    # samples between frames; the run-length of every sample of the new
+    # block is computed at once with a running maximum, which makes the
+    # `delay` exact however the samples are split into frames.
+    def __init__(self, sample_rate, entries, heart_rate_rows):
+        # entries: (block row, channel index, rule); heart_rate_rows maps a
+        # block row to its row in the block's HeartRate
+        self.sample_rate = sample_rate
+        self.rules = [rule for _, _, rule in entries]
+        self.rows = np.array([row for row, _, _ in entries], dtype=np.intp)
+        self.channels = np.array([channel for _, channel, _ in entries], dtype=np.intp)
+        kinds = np.array([rule.kind for rule in self.rules])
+        sources = np.array([rule.source for rule in self.rules])
+        self.limits = np.array([rule.limit for rule in self.rules])
+        self.hysteresis = np.array([rule.hysteresis for rule in self.rules])
+        self.delays = np.array([max(1, round(rule.delay * sample_rate)) for rule in self.rules], dtype=np.int64)
+        # Low limits and flatlines compare the other way round
+        self.signs = np.where((kinds == 'low') | (kinds == 'flatline'), -1.0, 1.0)[:, None]
+        self.differenced = np.flatnonzero((kinds == 'rate') | (kinds == 'flatline'))
+        self.rate_scale = np.where(kinds == 'rate', sample_rate, 1.0)[self.differenced, None]
+        self.flatline = kinds[self.differenced] == 'flatline'
+        self.only_flatlines = bool(self.flatline.all())
+        self.signed_limits = (self.signs[:, 0] * self.limits)[:, None]
+        self.settle_limits = self.signed_limits - self.hysteresis[:, None]
+        self.derived = {}  # Source -> (entries, HeartRate rows)
+        for source in SOURCES[1:]:
+            selected = np.flatnonzero(sources == source)
+            rows = np.array([heart_rate_rows.get(row, -1) for row in self.rows[selected].tolist()], dtype=np.intp)
+            if len(selected):
+                self.derived[source] = (selected, rows)
+        # Every derived entry has a HeartRate row, so none is NaN
+        self.all_derived = all((rows >= 0).all() for _, rows in self.derived.values())
+        self.reset()
+
+    def __len__(self):
+        return len(self.rules)
+
+    def reset(self, start_index=0):
+        self.next_index = start_index  # First sample not yet checked
+        self.runs = np.zeros(len(self), dtype=np.int64)  # Violating samples in a row so far
+        self.active = np.zeros(len(self), dtype=bool)
+        self.previous = np.full(len(self), np.nan)  # Last value seen, for differences
+
+    def carry(self, previous, channels):
+        # Continue from `previous`, the table of the block these channels
+        # were in: entries of a channel in `channels` (its index now -> its
+        # index then) with a rule of the same name keep their state; the
+        # rest start now
+        old = {(channel, rule.name): entry for entry, (channel, rule) in
+               enumerate(zip(previous.channels.tolist(), previous.rules))}
+        self.next_index = previous.next_index
+        for entry, (channel, rule) in enumerate(zip(self.channels.tolist(), self.rules)):
+            match = old.get((channels.get(channel), rule.name))
+            if match is not None:
+                self.runs[entry] = previous.runs[match]
+                self.active[entry] = previous.active[match]
+                self.previous[entry] = previous.previous[match]
+
+    def evaluate(self, samples, heart_rate=None):
+        # Check the next samples (block rows x n). Returns the entries raised
+        # and the sample offsets that raised them, the entries cleared, and
+        # the values at those offsets.
+        count = samples.shape[1]
+        values = samples[self.rows]
+        if self.derived and heart_rate is not None:
+            # The heart rate at each new sample, which falls while no beat comes
+            rates = heart_rate.rate_at(np.arange(self.next_index, self.next_index + count))
+        for source, (selected, rows) in self.derived.items():
+            if heart_rate is None:
+                derived = np.full((len(rows), count), np.nan)
+            else:
+                derived = rates[rows] if self.all_derived else np.where(rows[:, None] >= 0, rates[rows], np.nan)
+                if source == 'rr_interval':
+                    derived = 60.0 / derived
+            values[selected] = derived
+        if len(self.differenced):
+            series = values[self.differenced]
+            changes = np.empty_like(series)
+            np.subtract(series[:, :1], self.previous[self.differenced, None], out=changes[:, :1])
+            np.subtract(series[:, 1:], series[:, :-1], out=changes[:, 1:])
+            np.abs(changes, out=changes)
+            changes *= self.rate_scale
+            # No signal at all is a flatline too
+            if self.only_flatlines:
+                np.fmax(changes, 0.0, out=changes)
+            else:
+                np.putmask(changes, self.flatline[:, None] & np.isnan(changes), 0.0)
+            self.previous[self.differenced] = series[:, -1]
+            values[self.differenced] = changes
+
+        signed = self.signs * values
+        violating = signed > self.signed_limits
+        settled = signed <= self.settle_limits
+
+        # Length of the run of violating samples ending at each sample
+        columns = np.arange(count)
+        last_settled = np.maximum.accumulate(np.where(violating, -1, columns), axis=1)
+        runs = np.where(last_settled < 0, self.runs[:, None] + columns + 1, columns - last_settled)
+        due = runs >= self.delays[:, None]
+
+        raised = np.flatnonzero(~self.active & due.any(axis=1))
+        cleared = np.flatnonzero(self.active & settled.any(axis=1))
+        self.runs = runs[:, -1]
+        self.next_index += count
+        if not len(raised) and not len(cleared):
+            return raised, raised, values[:0, 0], cleared, values[:0, 0]  # Most frames
+        raised_at = np.argmax(due[raised], axis=1)
+        cleared_at = np.argmax(settled[cleared], axis=1)
+        self.active[raised] = True
+        self.active[cleared] = False
+        return raised, raised_at, values[raised, raised_at], cleared, values[cleared, cleared_at]
+
+
+class AlarmEngine(QObject):
+    # Alarm stage of the frame loop. After a frame has pulled new samples
+    # into a block, every rule of every channel of the block is checked over
+    # exactly those samples, so an alarm is raised in the first frame that
+    # sees its condition met. Raised and cleared alarms are emitted as Qt
+    # signals.
+    raised = pyqtSignal(object)  # Alarm
+    cleared = pyqtSignal(object)  # Alarm
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.active = {}  # (view key, channel index, rule name) -> Alarm
+        self.latencies = deque(maxlen=LATENCY_HISTORY)  # Detection latencies in milliseconds
+
+    def compile(self, view, block, previous=None, channels=None):
+        # The view's rules for the block's channels, carrying on from the
+        # table `previous` for the channels in `channels` (see AlarmTable.carry)
+        heart_rate_rows = {}
+        if block.heart_rate is not None:
+            heart_rate_rows = {row: i for i, row in enumerate(block.ecg_rows.tolist())}
+        entries = [(row, index, rule) for row, index in enumerate(block.channels.tolist())
+                   for rule in view.alarm_rules[index]]
+        if not entries:
+            return None
+        table = AlarmTable(block.sample_rate, entries, heart_rate_rows)
+        if previous is not None and channels:
+            table.carry(previous, channels)
+        return table
+
+    def evaluate(self, view, block, speed=1.0):
+        # Check the samples the block received since the last call; returns
+        # True when an alarm was raised or cleared
+        table = block.alarms
+        ring_first = block.next_index - len(block.buffer)
+        if table.next_index > block.next_index or table.next_index < ring_first:
+            # Rewound, or jumped past samples the buffer no longer holds
+            self.clear_view(view, table.channels.tolist())
+            table.reset(block.next_index)
+        count = block.next_index - table.next_index
+        if count <= 0:
+            return False
+        started = time.perf_counter()
+        with tracing.span('alarms', 'render', view=view.key, rules=len(table)):
+            first = table.next_index
+            raised, raised_at, raised_values, cleared, cleared_values = table.evaluate(
+                block.buffer.latest(count), block.heart_rate)
+        if not len(raised) and not len(cleared):
+            return False
+
+        now_index = block.next_index - 1
+        evaluation_ms = (time.perf_counter() - started) * 1000.0
+        for entry, value in zip(cleared.tolist(), cleared_values.tolist()):
+            key = (view.key, int(table.channels[entry]), table.rules[entry].name)
+            alarm = self.active.pop(key, None)
+            if alarm is not None:
+                alarm.value = value
+                self.cleared.emit(alarm)
+        for entry, offset, value in zip(raised.tolist(), raised_at.tolist(), raised_values.tolist()):
+            index = int(table.channels[entry])
+            sample_index = first + offset
+            # Signal time played since the triggering sample, in wall time
+            latency_ms = (now_index - sample_index) / block.sample_rate * 1000.0 / speed + evaluation_ms
+            alarm = Alarm(view.key, index, view.channel_names[index], table.rules[entry], value,
+                          sample_index, sample_index / block.sample_rate, latency_ms)
+            self.active[(view.key, index, alarm.rule.name)] = alarm
+            self.latencies.append(latency_ms)
+            tracing.instant('alarm', 'alarms', view=view.key, channel=index, rule=alarm.rule.name)
+            self.raised.emit(alarm)
+        return True
+
+    def view_alarms(self, view):
+        return [alarm for key, alarm in self.active.items() if key[0] == view.key]
+
+    def clear_view(self, view, channels=None):
+        # Clear the view's alarms (of the given channel indices only, if
+        # set), e.g. when its channels change
+        for key in [key for key in self.active if key[0] == view.key and (channels is None or key[1] in channels)]:
+            self.cleared.emit(self.active.pop(key))
+
+    def renumber(self, view, removed):
+        # The view's channel `removed` is gone and the ones after it moved
+        # down by one; its own alarms must have been cleared
+        for key in sorted((key for key in self.active if key[0] == view.key and key[1] > removed), key=lambda key: key[1]):
+            alarm = self.active.pop(key)
+            alarm.channel -= 1
+            self.active[(key[0], key[1] - 1, key[2])] = alarm
@@ -0,0 +1,240 @@
+import json
+import lzma
+import os
+import zlib
+from collections import OrderedDict
+
+import numpy as np  # Numerical operations library
+
+from signal_format import ARCHIVE_EXTENSION, ChannelList, ScaledChannel, SignalFile, nan_raw, quantise
+
+# Compressed archive layout (.vsz), for keeping long recordings small
+# while any part of them can still be read directly:
+#   bytes 0-3   magic b"VSZA"
+#   bytes 4-5   format version, little-endian uint16
+#   bytes 6-9   length of the JSON header, little-endian uint32
+#   JSON header (sample_rate, samples, channels, channel_names, units,
+#   channel_dtypes, scales, offsets as in .vsig version 2, chunk_samples, codec)
+#   compressed chunks: each holds chunk_samples samples of one channel
+#   (fewer in the last), compressed on its own
+#   chunk index, one INDEX_ENTRY per chunk, channel by channel
+#   trailer: offset of the chunk index (uint64) and b"VSZE"
+# Before compression a chunk is delta encoded (each sample minus the one
+# before, on the integer view of its bytes, so floats round-trip exactly)
+# and byte-shuffled (all first bytes, then all second bytes, ...), which
+# turns the slowly changing high bytes of a signal into long runs.
+#
+# Version 2 reserves the smallest value of a scaled channel's integer dtype
+# for NaN samples, as .vsig version 3 does; in version 1 archives it is an
+# ordinary sample.
+MAGIC = b'VSZA'
+END_MAGIC = b'VSZE'
+FORMAT_VERSION = 2
+_PREAMBLE_SIZE = 10
+_TRAILER_SIZE = 12
+INDEX_ENTRY = np.dtype([('offset', '<u8'), ('size', '<u4')])
+CODECS = {
+    'zlib': (lambda data: zlib.compress(data, 6), zlib.decompress),
+    'lzma': (lambda data: lzma.compress(data, preset=6), lzma.decompress),
+}
+
+CHUNK_SAMPLES = 1 << 14  # Samples per chunk; a few seconds to a minute of signal
+CACHE_CHUNKS = 128  # Decoded chunks kept per archive, most recently used
+
+
+def _integer_view(dtype):
+    # Signed integer dtype of the same width, for delta encoding
+    return np.dtype(f'<i{dtype.itemsize}')
+
+
+def encode_chunk(samples, dtype, compress):
+    values = np.ascontiguousarray(samples, dtype=dtype).view(_integer_view(dtype))
+    deltas = values.copy()
+    deltas[1:] -= values[:-1]  # Integer overflow wraps, and wraps back on decoding
+    shuffled = deltas.view(np.uint8).reshape(len(deltas), dtype.itemsize).T
+    return compress(shuffled.tobytes())
+
+
+def decode_chunk(blob, count, dtype, decompress):
+    shuffled = np.frombuffer(decompress(blob), dtype=np.uint8).reshape(dtype.itemsize, count)
+    deltas = np.ascontiguousarray(shuffled.T).view(_integer_view(dtype)).ravel()
+    return np.cumsum(deltas, dtype=deltas.dtype).view(dtype)
+
+
+def write_archive(file_path, data, sample_rate, channel_names=None, units=None, dtype=None, codec='zlib',
+                  chunk_samples=CHUNK_SAMPLES):
+    # Write a channels x samples array (or ChannelList) as an archive.
+    # `dtype` is as for write_signal(): one storage dtype, or one per
+    # channel, integer ones stored scaled
+    compress = CODECS[codec][0]
+    if not isinstance(data, ChannelList):
+        data = np.asarray(data)
+        if data.ndim == 1:
+            data = data[np.newaxis, :]
+    if data.ndim != 2:
+        raise ValueError("Signal data must be one- or two-dimensional.")
+    channels, samples = data.shape
+    dtypes = list(dtype) if isinstance(dtype, (list, tuple)) else [dtype] * channels
+    if len(dtypes) != channels:
+        raise ValueError(f"Expected {channels} storage dtypes, got {len(dtypes)}.")
+    dtypes = [np.dtype(channel_dtype or data[i].dtype).newbyteorder('<') for i, channel_dtype in enumerate(dtypes)]
+    header = {
+        'sample_rate': float(sample_rate),
+        'samples': samples,
+        'channels': channels,
+        'channel_names': list(channel_names) if channel_names else [f"Channel {i + 1}" for i in range(channels)],
+        'units': list(units) if units else [''] * channels,
+        'channel_dtypes': [channel_dtype.str for channel_dtype in dtypes],
+        'scales': [None] * channels,
+        'offsets': [None] * channels,
+        'chunk_samples': int(chunk_samples),
+        'codec': codec,
+    }
+    # The scale of each integer channel is known only from its values
+    quantised = {}
+    for i, channel_dtype in enumerate(dtypes):
+        if np.issubdtype(channel_dtype, np.integer):
+            quantised[i], header['scales'][i], header['offsets'][i] = quantise(data[i], channel_dtype)
+    header_bytes = json.dumps(header).encode('utf-8')
+
+    chunks = -(-samples // chunk_samples)
+    index = np.zeros(channels * chunks, dtype=INDEX_ENTRY)
+    with open(file_path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(np.uint16(FORMAT_VERSION).astype('<u2').tobytes())
+        file.write(np.uint32(len(header_bytes)).astype('<u4').tobytes())
+        file.write(header_bytes)
+        for i in range(channels):
+            channel = quantised.pop(i) if i in quantised else data[i]
+            for chunk in range(chunks):
+                start = chunk * chunk_samples
+                blob = encode_chunk(channel[start:start + chunk_samples], dtypes[i], compress)
+                index[i * chunks + chunk] = (file.tell(), len(blob))
+                file.write(blob)
+        index_offset = file.tell()
+        file.write(index.tobytes())
+        file.write(np.uint64(index_offset).astype('<u8').tobytes())
+        file.write(END_MAGIC)
+
+
+class ArchiveChannel:
+    # One channel of an archive, sliced like an array. A slice decodes only
+    # the chunks it overlaps, through the archive's cache of decoded chunks
+    def __init__(self, archive, channel, dtype, length):
+        self.archive = archive
+        self.channel = channel
+        self._dtype = dtype
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    @property
+    def shape(self):
+        return (self._length,)
+
+    @property
+    def ndim(self):
+        return 1
+
+    def __array__(self, dtype=None, copy=None):
+        values = self[0:self._length]
+        return values if dtype is None else values.astype(dtype)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple) and len(key) == 2 and key[0] is Ellipsis:
+            key = key[1]  # values[..., a:b] as for a 1-D array
+        if not isinstance(key, slice):
+            raise TypeError("ArchiveChannel only supports slicing.")
+        start, stop, step = key.indices(self._length)
+        stop = max(stop, start)
+        size = self.archive.chunk_samples
+        first, last = start // size, -(-stop // size)
+        pieces = [self.archive.chunk(self.channel, chunk) for chunk in range(first, last)]
+        if len(pieces) == 1:
+            values = pieces[0][start - first * size:stop - first * size]
+        elif pieces:
+            values = np.concatenate(pieces)[start - first * size:stop - first * size]
+        else:
+            values = np.empty(0, dtype=self._dtype)
+        return values[::step] if step != 1 else values
+
+
+class ArchiveFile(SignalFile):
+    # An archive opened for viewing. Opening reads the header and the chunk
+    # index only; chunks are decompressed when a slice needs them and the
+    # last CACHE_CHUNKS decoded are kept, so scrolling back and forth over
+    # the same stretch decodes each chunk once.
+    def __init__(self, file_path, cache_chunks=CACHE_CHUNKS):
+        self._file = open(file_path, 'rb')
+        preamble = self._file.read(_PREAMBLE_SIZE)
+        if len(preamble) < _PREAMBLE_SIZE or preamble[:4] != MAGIC:
+            raise ValueError(f"{file_path} is not a {ARCHIVE_EXTENSION} signal archive.")
+        version = int(np.frombuffer(preamble[4:6], '<u2')[0])
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{file_path} uses format version {version}, newer than this viewer supports.")
+        header_length = int(np.frombuffer(preamble[6:10], '<u4')[0])
+        self.header = header = json.loads(self._file.read(header_length).decode('utf-8'))
+
+        size = os.fstat(self._file.fileno()).st_size
+        self._file.seek(size - _TRAILER_SIZE)
+        trailer = self._file.read(_TRAILER_SIZE)
+        if len(trailer) < _TRAILER_SIZE or trailer[8:] != END_MAGIC:
+            raise ValueError(f"{file_path} is incomplete: its chunk index is missing.")
+        self._file.seek(int(np.frombuffer(trailer[:8], '<u8')[0]))
+        channels, samples = header['channels'], header['samples']
+        self.chunk_samples = header['chunk_samples']
+        self.chunks = -(-samples // self.chunk_samples)
+        self._index = np.frombuffer(self._file.read(channels * self.chunks * INDEX_ENTRY.itemsize), dtype=INDEX_ENTRY)
+        if len(self._index) != channels * self.chunks:
+            raise ValueError(f"{file_path} is incomplete: its chunk index is truncated.")
+        self._decompress = CODECS[header['codec']][1]
+        self._dtypes = [np.dtype(channel_dtype) for channel_dtype in header['channel_dtypes']]
+        self._samples = samples
+        self.cache_chunks = cache_chunks
+        self._cache = OrderedDict()  # (channel, chunk) -> decoded samples, least recently used first
+        self.hits = 0
+        self.misses = 0
+
+        rows = []
+        for i, (channel_dtype, scale, offset) in enumerate(zip(self._dtypes, header['scales'], header['offsets'])):
+            raw = ArchiveChannel(self, i, channel_dtype, samples)
+            rows.append(raw if scale is None else
+                        ScaledChannel(raw, scale, offset, nan_raw(channel_dtype) if version >= 2 else None))
+        super().__init__(ChannelList(rows), header['sample_rate'], header.get('channel_names'), header.get('units'),
+                         file_path)
+
+    def chunk(self, channel, chunk):
+        # Decoded samples of one chunk (read-only, as they are shared)
+        key = (channel, chunk)
+        values = self._cache.get(key)
+        if values is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return values
+        self.misses += 1
+        offset, size = self._index[channel * self.chunks + chunk].tolist()
+        self._file.seek(offset)
+        count = min(self.chunk_samples, self._samples - chunk * self.chunk_samples)
+        values = decode_chunk(self._file.read(size), count, self._dtypes[channel], self._decompress)
+        values.flags.writeable = False
+        self._cache[key] = values
+        if len(self._cache) > self.cache_chunks:
+            self._cache.popitem(last=False)
+        return values
+
+    @property
+    def compressed_size(self):
+        return int(self._index['size'].sum())
+
+    def close(self):
+        self._cache.clear()
+        self._file.close()
+
+
+def open_archive(file_path):
+    return ArchiveFile(file_path)
@@ -0,0 +1,105 @@
+# Build PDF reports for many recordings without opening the GUI.
+#
+#   python batch_report.py Dataset --output-dir reports
+#   python batch_report.py Dataset/ECG/*.vsig --combined shift_report.pdf --jobs 8
+import argparse
+import os
+import sys  # System-specific parameters and functions
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from os import path  # Functions to manipulate file paths
+
+from signal_format import ARCHIVE_EXTENSION, LEGACY_EXTENSION, NATIVE_EXTENSION
+
+SIGNAL_EXTENSIONS = (NATIVE_EXTENSION, ARCHIVE_EXTENSION, LEGACY_EXTENSION)  # Preferred first
+
+
+def find_signal_files(inputs):
+    # When a directory holds several copies of a recording (.pkl, .vsig,
+    # .vsz) take only the first in SIGNAL_EXTENSIONS order
+    found = []
+    for item in inputs:
+        if path.isdir(item):
+            for root, _, names in os.walk(item):
+                for name in sorted(names):
+                    if name.endswith(SIGNAL_EXTENSIONS):
+                        found.append(path.join(root, name))
+        elif item.endswith(SIGNAL_EXTENSIONS):
+            found.append(item)
+
+    def rank(file_path):
+        return next(i for i, extension in enumerate(SIGNAL_EXTENSIONS) if file_path.endswith(extension))
+    best = {}
+    for file_path in found:
+        stem = path.splitext(file_path)[0]
+        best[stem] = min(best.get(stem, len(SIGNAL_EXTENSIONS)), rank(file_path))
+    return [file_path for file_path in found if rank(file_path) == best[path.splitext(file_path)[0]]]
+
+
+def report_names(files, output_dir):
+    # One PDF per recording, named after it; same-named recordings from
+    # different folders get a numeric suffix instead of overwriting each other
+    names, used = {}, set()
+    for file_path in files:
+        stem = path.splitext(path.basename(file_path))[0]
+        name, suffix = stem, 2
+        while name in used:
+            name, suffix = f"{stem}_{suffix}", suffix + 1
+        used.add(name)
+        names[file_path] = path.join(output_dir, name + '.pdf')
+    return names
+
+
+def write_single_report(file_path, report_path):
+    # Worker: summarise one recording and write its own PDF
+    from report import summarise_recording, write_report
+    return write_report(report_path, [summarise_recording(file_path)])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate signal reports in parallel, without the GUI.")
+    parser.add_argument('inputs', nargs='+', help="signal files (.vsig/.vsz/.pkl) or directories such as Dataset/")
+    parser.add_argument('--output-dir', default='reports', help="where per-recording PDFs are written")
+    parser.add_argument('--combined', metavar='PDF', default=None, help="write one combined PDF instead")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="worker processes (default: one per core)")
+    args = parser.parse_args(argv)
+
+    # Imported here so find_signal_files() does not pull in reportlab
+    from report import summarise_recording, write_report
+
+    files = find_signal_files(args.inputs)
+    if not files:
+        print("No signal files found.", file=sys.stderr)
+        return 1
+
+    failures = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        if args.combined:
+            # Workers do the heavy reading and decimation; only the small
+            # summaries come back to be laid out in one document
+            futures = {pool.submit(summarise_recording, file_path): file_path for file_path in files}
+            summaries = {}
+            for future in as_completed(futures):
+                try:
+                    summaries[futures[future]] = future.result()
+                except Exception as error:
+                    failures += 1
+                    print(f"{futures[future]}: {error}", file=sys.stderr)
+            if summaries:
+                write_report(args.combined, [summaries[file_path] for file_path in files if file_path in summaries])
+                print(f"Wrote {args.combined} ({len(summaries)} recordings)")
+        else:
+            os.makedirs(args.output_dir, exist_ok=True)
+            names = report_names(files, args.output_dir)
+            futures = {pool.submit(write_single_report, file_path, names[file_path]): file_path for file_path in files}
+            for future in as_completed(futures):
+                try:
+                    print(f"Wrote {future.result()}")
+                except Exception as error:
+                    failures += 1
+                    print(f"{futures[future]}: {error}", file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,483 @@
+# Headless benchmarks for the playback, loading, statistics and export paths.
+# Runs on Qt's offscreen platform, so no display is needed.
+#
+#   python benchmark.py                                   # print results
+#   python benchmark.py --output results.json             # machine-readable
+#   python benchmark.py --check benchmark_thresholds.json # exit 1 on regressions
+#   python benchmark.py --only frame                      # a subset
+import argparse
+import json
+import os
+import pickle
+import platform
+import subprocess
+import sys  # System-specific parameters and functions
+import tempfile
+import time  # Wall-clock timing
+from os import path  # Functions to manipulate file paths
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np  # Numerical operations library
+
+from batch_report import find_signal_files
+from signal_format import open_signal, validate_signal, write_signal
+from signal_stats import StatisticsEngine
+
+DATASET_DIR = path.join(path.dirname(path.abspath(__file__)), 'Dataset')
+SAMPLE_RATE = 250.0
+FRAME_SECONDS = 1 / 30
+CHANNEL_COUNTS = (1, 4, 16, 64)
+ECG_CHANNEL_COUNTS = (16, 256)
+ALARM_CHANNELS = 256
+SESSION_HOURS = 4  # Length of the recording the session benchmarks seek in
+WARD_BEDS, WARD_CHANNELS = 32, 4  # Central station: beds on one screen, channels per bed
+
+# A fresh interpreter that opens the main window and exits once it is shown
+STARTUP_SCRIPT = '''
+from PyQt6.QtWidgets import QApplication
+import main
+app = QApplication([])
+window = main.MainApp()
+window.show()
+app.processEvents()
+'''
+
+
+def summarise(times_ms):
+    times_ms = sorted(times_ms)
+    return {
+        'runs': len(times_ms),
+        'median_ms': float(np.median(times_ms)),
+        'p95_ms': float(times_ms[min(len(times_ms) - 1, int(0.95 * len(times_ms)))]),
+        'max_ms': float(times_ms[-1]),
+    }
+
+
+def measure(function, repeat, setup=None):
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    return summarise(times)
+
+
+def synthetic_channel(samples, seed):
+    # ECG-like: a sharp periodic spike on a slow wander, plus noise
+    random = np.random.default_rng(seed)
+    t = np.arange(samples) / SAMPLE_RATE
+    beat = np.exp(-((t % 0.8) - 0.2) ** 2 / 0.0005)
+    return (beat + 0.1 * np.sin(0.5 * t) + 0.02 * random.standard_normal(samples)).astype(np.float32)
+
+
+class Benchmarks:
+    def __init__(self, work_dir, repeat):
+        self.work_dir = work_dir
+        self.repeat = repeat
+        self.results = {}
+
+        from PyQt6.QtWidgets import QApplication
+        self.app = QApplication.instance() or QApplication([])
+        import main
+        self.window = main.MainApp()
+        self.window.resize(1280, 800)
+        self.window.show()
+        self.window.frame_scheduler.stop()  # Frames are driven by the benchmarks
+        self.app.processEvents()
+
+        # Large synthetic recordings, in both formats
+        self.large_samples = 20_000_000
+        self.large_pkl = path.join(work_dir, 'large.pkl')
+        with open(self.large_pkl, 'wb') as file:
+            pickle.dump(synthetic_channel(self.large_samples, 0).astype(np.float64), file)
+        self.large_vsig = path.join(work_dir, 'large.vsig')
+        write_signal(self.large_vsig, np.stack([synthetic_channel(self.large_samples // 4, i) for i in range(4)]), SAMPLE_RATE)
+        self.large_int16 = path.join(work_dir, 'large_int16.vsig')
+        write_signal(self.large_int16, open_signal(self.large_vsig).data, SAMPLE_RATE, dtype='int16')
+
+    def record(self, name, result):
+        self.results[name] = result
+        print(f"{name:36s} median {result['median_ms']:9.2f} ms   p95 {result['p95_ms']:9.2f} ms", flush=True)
+
+    def wait_for(self, condition, timeout=120.0):
+        deadline = time.perf_counter() + timeout
+        while not condition():
+            if time.perf_counter() > deadline:
+                raise TimeoutError("benchmark step timed out")
+            self.app.processEvents()
+            time.sleep(0.002)
+
+    def fresh_view(self, channels, seconds=600):
+        # View 1 with `channels` synthetic channels, playing
+        views, view = self.window.views, self.window.view1
+        views.clear(view)
+        for index in range(channels):
+            views.add_channel(view, synthetic_channel(int(seconds * SAMPLE_RATE), index), SAMPLE_RATE,
+                              f"Channel {index + 1}", f"synthetic {index + 1}")
+        views.scheduler.stop()
+        view.is_playing = True
+        return view
+
+    def bench_startup(self):
+        # Cold start to a shown window, as after a restart of the unit
+        root = path.dirname(path.abspath(__file__))
+        environment = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+
+        def start():
+            subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=root, env=environment, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.record('startup/window', measure(start, self.repeat))
+
+        # What the runtime fallback would add: parsing and compiling design.ui
+        from PyQt6.uic import loadUiType
+        import main
+        self.record('startup/runtime_ui', measure(lambda: loadUiType(main.UI_FILE), self.repeat))
+
+    def bench_frame(self):
+        # Cost of drawing one playing frame
+        views = self.window.views
+        for channels in CHANNEL_COUNTS:
+            view = self.fresh_view(channels)
+            view.clock.seek(10.0)
+            views.render(view)
+
+            def frame():
+                view.clock.seek(view.clock.position + FRAME_SECONDS)
+                views.render(view)
+            self.record(f"frame/channels={channels}", measure(frame, self.repeat * 10))
+
+    def bench_ward(self):
+        # One playing frame of a full central station, every bed drawn; an
+        # ECG per bed, so heart rate analysis and alarms are included. Must
+        # fit the frame budget
+        from ward import WardDisplay
+        ward = WardDisplay(WARD_BEDS)
+        ward.resize(1920, 1080)
+        ward.show()
+        views = ward.views
+        for bed in range(1, WARD_BEDS + 1):
+            view = views[bed]
+            for index in range(WARD_CHANNELS):
+                views.add_channel(view, synthetic_channel(int(600 * SAMPLE_RATE), bed * WARD_CHANNELS + index),
+                                  SAMPLE_RATE, "ECG" if index == 0 else f"Channel {index + 1}", f"bed {bed}")
+            view.is_playing = True
+        views.scheduler.stop()
+        self.app.processEvents()
+        for view in views:
+            view.clock.seek(10.0)
+            views.render(view)
+
+        def frame():
+            for view in views:
+                view.clock.seek(view.clock.position + FRAME_SECONDS)
+                views.render(view)
+        self.record(f"ward/{WARD_BEDS}x{WARD_CHANNELS}", measure(frame, self.repeat * 10))
+        ward.close()
+
+    def bench_vitals(self):
+        # One analysis chunk of many ECG channels, after the detector has
+        # learnt its thresholds; must stay far below the chunk's duration
+        from vitals import HeartRate
+        for channels in ECG_CHANNEL_COUNTS:
+            heart_rate = HeartRate(SAMPLE_RATE, channels)
+            ecg = np.stack([synthetic_channel(int(600 * SAMPLE_RATE), index) for index in range(channels)])
+            heart_rate.process(ecg[:, :int(5 * SAMPLE_RATE)])
+
+            def chunk():
+                start = heart_rate.count
+                heart_rate.process(ecg[:, start:start + heart_rate.chunk])
+            self.record(f"vitals/rpeak_channels={channels}", measure(chunk, self.repeat * 10))
+
+        # A playing frame of ECG channels, analysis included
+        views = self.window.views
+        view = self.fresh_view(16)
+        for index in range(len(view)):
+            view.ecg_channels[index] = True
+        views.rebuild_blocks(view)
+        view.clock.seek(10.0)
+        views.render(view)
+
+        def frame():
+            view.clock.seek(view.clock.position + FRAME_SECONDS)
+            views.render(view)
+        self.record('vitals/frame_ecg=16', measure(frame, self.repeat * 10))
+
+    def bench_alarms(self):
+        # Every channel with a threshold, a rate-of-change, a flatline and a
+        # derived heart-rate rule, played at 30 frames per second; threshold
+        # breaches are injected every few seconds and the detection latency
+        # of each (sample due -> alarm raised) is recorded
+        from alarms import AlarmRule, default_rules
+        views = self.window.views
+        view = views.views[1]
+        views.clear(view)
+        seconds = 60
+        for index in range(ALARM_CHANNELS):
+            data = synthetic_channel(int(seconds * SAMPLE_RATE), index).astype(np.float64)
+            for start in np.arange(5.0 + index % 7 * 0.3, seconds - 1, 5.0):
+                data[int(start * SAMPLE_RATE):int((start + 0.5) * SAMPLE_RATE)] = 3.0
+            rules = default_rules(ecg=True) + [AlarmRule('High', 'high', 2.0, hysteresis=0.5),
+                                               AlarmRule('Slew', 'rate', 1000.0, delay=0.1)]
+            views.add_channel(view, data, SAMPLE_RATE, f"ECG {index + 1}", f"synthetic {index + 1}", ecg=True,
+                              alarm_rules=rules)
+        views.scheduler.stop()
+        view.is_playing = True
+        latencies = []
+        views.alarms.raised.connect(lambda alarm: latencies.append(alarm.latency_ms) if alarm.rule.name == 'High' else None)
+        views.alarms.latencies.clear()
+        view.clock.seek(0.0)
+        views.render(view)
+
+        def frame():
+            view.clock.seek(view.clock.position + FRAME_SECONDS)
+            views.render(view)
+        self.record(f"alarms/frame_channels={ALARM_CHANNELS}", measure(frame, int((seconds - 2) / FRAME_SECONDS)))
+        self.record('alarms/latency', summarise(latencies))
+
+    def bench_filters(self):
+        # Playing frames of filtered channels: the filters only ever see
+        # samples not filtered before
+        from filters import FILTER_PRESETS
+        views = self.window.views
+        view = self.fresh_view(64)
+        for index in range(len(view)):
+            views.set_filter(view, index, FILTER_PRESETS['ECG'])
+        view.clock.seek(10.0)
+        views.render(view)
+
+        def frame():
+            view.clock.seek(view.clock.position + FRAME_SECONDS)
+            views.render(view)
+        self.record('filters/frame_channels=64', measure(frame, self.repeat * 10))
+
+    def bench_spectrogram(self):
+        # A spectrogram window following a playing channel: one frame's
+        # new FFT columns and the image update
+        from spectrogram import SpectrogramWindow
+        views = self.window.views
+        view = self.fresh_view(1)
+        view.clock.seek(120.0)
+        window = SpectrogramWindow(views, view, 0)
+        views.scheduler.stop()
+        window.render()
+
+        def frame():
+            view.clock.seek(view.clock.position + FRAME_SECONDS)
+            window.render()
+        self.record('spectrogram/frame', measure(frame, self.repeat * 20))
+        window.close()
+
+    def bench_session(self):
+        # Recording playing frames of 64 channels; opening a long recording
+        # (its index only) and seeking into it
+        from session import SessionRecorder
+        views = self.window.views
+        view = self.fresh_view(64)
+        view.clock.seek(10.0)
+        views.render(view)
+        views.start_recording(view, path.join(self.work_dir, 'frames.vses'))
+
+        def frame():
+            view.clock.seek(view.clock.position + FRAME_SECONDS)
+            views.render(view)
+        self.record('session/frame_channels=64', measure(frame, self.repeat * 10))
+        views.stop_recording(view)
+
+        long_session = path.join(self.work_dir, 'long.vses')
+        recorder = SessionRecorder(long_session, [{'name': f"Channel {index + 1}", 'sample_rate': SAMPLE_RATE}
+                                                  for index in range(4)])
+        minute = synthetic_channel(int(60 * SAMPLE_RATE), 0)
+        for start in range(0, int(SESSION_HOURS * 3600 * SAMPLE_RATE), len(minute)):
+            for stream in range(4):
+                recorder.append(stream, start, minute)
+        recorder.close()
+        self.record(f'session/open_{SESSION_HOURS}h', measure(lambda: open_signal(long_session).close(), self.repeat))
+        recording = open_signal(long_session)
+        random = np.random.default_rng(0)
+
+        def seek():
+            # A random time, then one window of every channel from there
+            positions = recording.seek(random.uniform(0, SESSION_HOURS * 3600 - 10))
+            for channel, (index, _) in enumerate(positions):
+                recording.channel(channel)[index:index + int(10 * SAMPLE_RATE)]
+        self.record('session/seek', measure(seek, self.repeat * 10))
+        recording.close()
+
+    def bench_load(self):
+        files = find_signal_files([DATASET_DIR])
+        self.record('load/dataset', measure(lambda: [validate_signal(open_signal(file_path)) for file_path in files], self.repeat))
+        self.record('load/large_pkl', measure(lambda: validate_signal(open_signal(self.large_pkl)), self.repeat))
+        self.record('load/large_pkl_float32', measure(lambda: validate_signal(open_signal(self.large_pkl, 'float32')), self.repeat))
+        self.record('load/large_vsig', measure(lambda: validate_signal(open_signal(self.large_vsig)), self.repeat))
+
+        # Through the window: multi-select, background pool, channels added
+        window = self.window
+
+        def setup():
+            window.views.store.clear()
+            window.views.clear(window.view2)
+
+        def load_in_window():
+            for file_path in files:
+                window.views.begin_loading(window.view2, file_path)
+                window.signal_loader.load(file_path, window.view2.key)
+            self.wait_for(lambda: not window.view2.loading)
+        self.record('load/window_dataset', measure(load_in_window, self.repeat, setup))
+
+    def bench_statistics(self):
+        window = self.window
+        if not window.view2.files:
+            for file_path in find_signal_files([DATASET_DIR]):
+                window.views.add_file_channel(window.view2, file_path, 0, f"Channel {len(window.view2) + 1}")
+        engines = []
+        self.record('statistics/large_cold', measure(lambda: engines[-1].file_statistics(self.large_vsig), self.repeat,
+                                                     lambda: engines.append(StatisticsEngine())))
+        self.record('statistics/large_warm', measure(lambda: engines[-1].file_statistics(self.large_vsig), self.repeat * 10))
+        self.record('statistics/large_int16_cold', measure(lambda: engines[-1].file_statistics(self.large_int16), self.repeat,
+                                                           lambda: engines.append(StatisticsEngine())))
+        self.record('statistics/generate_stats', measure(self.window.generateStats, self.repeat,
+                                                         self.window.statistics_engine.invalidate))
+
+    def bench_navigation(self):
+        # Scrolling, zooming and scrubbing a paused view, including the redraw they cause
+        views = self.window.views
+        view = self.fresh_view(4)
+        view.clock.seek(120.0)
+        views.render(view)
+        view.is_playing = False
+        values = iter(range(10**6))
+
+        def scroll():
+            self.window.horizontal_scroll(view, 100_000 + 1000 * (next(values) % 20))
+            views.render(view)
+        self.record('navigation/scroll', measure(scroll, self.repeat * 10))
+
+        def zoom():
+            self.window.zoom_in(view)
+            views.render(view)
+            self.window.zoom_out(view)
+            views.render(view)
+        self.record('navigation/zoom', measure(zoom, self.repeat * 10))
+
+        # Scrubbing to random times of a long recording (5.5 hours of 4
+        # channels), each drawn without replaying what lies before
+        views.clear(view)
+        for index in range(4):
+            views.add_file_channel(view, self.large_vsig, index, f"Channel {index + 1}")
+        views.scheduler.stop()
+        view.is_playing = False
+        random = np.random.default_rng(0)
+
+        def scrub():
+            self.window.horizontal_scroll(view, int(random.uniform(0, views.duration(view)) * 1000))
+            views.render(view)
+        self.record('navigation/scrub_large', measure(scrub, self.repeat * 10))
+
+    def bench_archive(self):
+        # The long recording as a compressed archive: opening it (header
+        # and chunk index only), scrubbing to random times, which decodes
+        # the chunks each window overlaps, and scrolling over a stretch
+        # whose chunks are already cached
+        from archive import write_archive
+        views = self.window.views
+        view = self.window.view1
+        archive_path = path.join(self.work_dir, 'large.vsz')
+        write_archive(archive_path, open_signal(self.large_vsig).data, SAMPLE_RATE)
+        self.record('archive/open', measure(lambda: open_signal(archive_path).close(), self.repeat * 10))
+
+        views.clear(view)
+        for index in range(4):
+            views.add_file_channel(view, archive_path, index, f"Channel {index + 1}")
+        views.scheduler.stop()
+        view.is_playing = False
+        random = np.random.default_rng(0)
+
+        def scrub():
+            self.window.horizontal_scroll(view, int(random.uniform(0, views.duration(view)) * 1000))
+            views.render(view)
+        self.record('archive/scrub_large', measure(scrub, self.repeat * 10))
+
+        values = iter(range(10**6))
+
+        def scroll():
+            self.window.horizontal_scroll(view, 100_000 + 1000 * (next(values) % 20))
+            views.render(view)
+        scroll()
+        self.record('archive/scroll_cached', measure(scroll, self.repeat * 10))
+
+    def bench_export(self):
+        from export_worker import ReportExport
+        window = self.window
+        self.fresh_view(4)
+        window.views.render(window.view1)
+        window.snapshots.clear()
+        self.record('export/snapshot', measure(window.generateSnapshots, self.repeat))
+
+        report_path = path.join(self.work_dir, 'report.pdf')
+
+        def export():
+            export_job = ReportExport(window.create_export_job(report_path), window.statistics_engine)
+            outcome = []
+            export_job.finished.connect(outcome.append)
+            export_job.failed.connect(outcome.append)
+            export_job.start()
+            self.wait_for(lambda: outcome)
+            if outcome[0] != report_path:
+                raise RuntimeError(f"export failed: {outcome[0]}")
+        self.record('export/pdf', measure(export, self.repeat))
+
+
+def check_thresholds(results, thresholds):
+    # Thresholds map a benchmark name to its maximum median in milliseconds
+    failures = []
+    for name, limit in thresholds.items():
+        result = results.get(name)
+        if result is not None and result['median_ms'] > limit:
+            failures.append(f"{name}: median {result['median_ms']:.2f} ms exceeds {limit:.2f} ms")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the viewer's hot paths headlessly.")
+    parser.add_argument('--output', metavar='JSON', help="write the results to this file")
+    parser.add_argument('--check', metavar='JSON', help="fail when a median exceeds its threshold in this file")
+    parser.add_argument('--only', action='append', default=[], help="run only benchmark groups with this prefix (repeatable)")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per benchmark (frame-level ones run 10x as many)")
+    args = parser.parse_args(argv)
+
+    groups = ('startup', 'frame', 'ward', 'vitals', 'alarms', 'filters', 'spectrogram', 'session', 'load', 'statistics', 'navigation',
+              'archive', 'export')
+    selected = [group for group in groups if not args.only or any(group.startswith(prefix) for prefix in args.only)]
+
+    with tempfile.TemporaryDirectory(prefix='signal-bench-') as work_dir:
+        benchmarks = Benchmarks(work_dir, max(1, args.repeat))
+        for group in selected:
+            getattr(benchmarks, f"bench_{group}")()
+        benchmarks.window.close()
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'results': benchmarks.results,
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.check:
+        with open(args.check) as file:
+            failures = check_thresholds(benchmarks.results, json.load(file))
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+import numpy as np  # Numerical operations library
+
+
+class RingBuffer:
+    # Fixed-capacity circular buffer backed by one preallocated array.
+    # Every sample is written twice (at i and at i + capacity), so the stored
+    # samples are always available oldest -> newest as a single contiguous
+    # view. Appending never allocates and reading never copies.
+    #
+    # With `channels` set the buffer holds that many rows of samples
+    # (channels x samples) that are always appended together.
+    def __init__(self, capacity, dtype=np.float64, channels=None):
+        self.capacity = max(1, int(capacity))
+        shape = (2 * self.capacity,) if channels is None else (channels, 2 * self.capacity)
+        self._data = np.zeros(shape, dtype=dtype)
+        self._head = 0  # Next write position, always in [0, capacity)
+        self._size = 0  # Number of valid samples currently stored
+        self.total_written = 0  # Samples appended since the last clear()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
+        self.total_written = 0
+
+    def extend(self, values):
+        values = np.asarray(values)
+        count = values.shape[-1]
+        if count == 0:
+            return
+        self.total_written += count
+
+        # Anything older than one full buffer would be overwritten anyway
+        if count > self.capacity:
+            values = values[..., -self.capacity:]
+            count = self.capacity
+
+        capacity = self.capacity
+        head = self._head
+        first = min(count, capacity - head)
+        self._data[..., head:head + first] = values[..., :first]
+        self._data[..., head + capacity:head + capacity + first] = values[..., :first]
+
+        rest = count - first
+        if rest:
+            self._data[..., :rest] = values[..., first:]
+            self._data[..., capacity:capacity + rest] = values[..., first:]
+
+        self._head = (head + count) % capacity
+        self._size = min(self._size + count, capacity)
+
+    def view(self):
+        # Contiguous, read-only view of the stored samples (oldest first)
+        end = self._head + self.capacity
+        data = self._data[..., end - self._size:end]
+        data.flags.writeable = False
+        return data
+
+    def latest(self, count):
+        # View of the newest `count` samples
+        count = min(int(count), self._size)
+        end = self._head + self.capacity
+        data = self._data[..., end - count:end]
+        data.flags.writeable = False
+        return data
+
+
+class GrowableArray:
+    # Append-only array with amortised O(1) appends (capacity doubles)
+    def __init__(self, dtype, capacity=64):
+        self._data = np.empty(capacity, dtype=dtype)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def extend(self, values):
+        needed = self._size + len(values)
+        if needed > len(self._data):
+            grown = np.empty(max(needed, 2 * len(self._data)), dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:needed] = values
+        self._size = needed
+
+    def view(self, start=0, stop=None):
+        stop = self._size if stop is None else min(stop, self._size)
+        return self._data[start:stop]
@@ -0,0 +1,62 @@
+# Convert legacy pickled recordings to the memory-mappable .vsig format,
+# or to the compressed .vsz archive for long-term storage.
+#
+#   python convert_dataset.py Dataset/ECG Dataset/EEG Dataset/EMG
+#   python convert_dataset.py Dataset --sample-rate 360 --output-dir converted
+#   python convert_dataset.py Dataset --dtype int16    # a quarter of the size
+#   python convert_dataset.py Dataset --archive lzma   # smallest, still seekable
+import argparse
+import os
+import sys  # System-specific parameters and functions
+from os import path  # Functions to manipulate file paths
+
+from playback import DEFAULT_SAMPLE_RATE
+from archive import CODECS
+from signal_format import ARCHIVE_EXTENSION, LEGACY_EXTENSION, NATIVE_EXTENSION, STORAGE_DTYPES, convert_file
+
+
+def find_legacy_files(inputs):
+    # Yields (source path, path relative to the input it was found under)
+    for item in inputs:
+        if path.isdir(item):
+            for root, _, names in os.walk(item):
+                for name in sorted(names):
+                    if name.endswith(LEGACY_EXTENSION):
+                        source = path.join(root, name)
+                        yield source, path.join(path.basename(path.normpath(item)), path.relpath(source, item))
+        elif item.endswith(LEGACY_EXTENSION):
+            yield item, path.basename(item)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert .pkl signal files to the native .vsig format or a .vsz archive.")
+    parser.add_argument('inputs', nargs='+', help="files or directories to convert")
+    parser.add_argument('--sample-rate', type=float, default=DEFAULT_SAMPLE_RATE, help="sampling rate of the recordings in Hz")
+    parser.add_argument('--dtype', choices=STORAGE_DTYPES, default=None,
+                        help="storage dtype; int16 is scaled per channel (default: keep the source dtype)")
+    parser.add_argument('--archive', choices=sorted(CODECS), default=None,
+                        help="write chunk-compressed .vsz archives with this codec instead of .vsig files")
+    parser.add_argument('--output-dir', default=None, help="write outputs here instead of next to the sources")
+    parser.add_argument('--force', action='store_true', help="rewrite outputs that are already up to date")
+    args = parser.parse_args(argv)
+
+    extension = ARCHIVE_EXTENSION if args.archive else NATIVE_EXTENSION
+    converted = 0
+    for source, relative in find_legacy_files(args.inputs):
+        if args.output_dir:
+            target = path.join(args.output_dir, path.splitext(relative)[0] + extension)
+        else:
+            target = path.splitext(source)[0] + extension
+        if not args.force and path.exists(target) and path.getmtime(target) >= path.getmtime(source):
+            continue
+        os.makedirs(path.dirname(target) or '.', exist_ok=True)
+        convert_file(source, target, args.sample_rate, args.dtype, args.archive)
+        print(f"{source} -> {target}")
+        converted += 1
+
+    print(f"Converted {converted} file(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,363 @@
+# Form implementation generated from reading ui file 'design.ui'
+#
+# Created by: PyQt6 UI code generator 6.11.0
+#
+# WARNING: Any manual changes made to this file will be lost when pyuic6 is
+# run again.  Do not edit this file unless you know what you are doing.
+
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+
+class Ui_MainWindow(object):
+    def setupUi(self, MainWindow):
+        MainWindow.setObjectName("MainWindow")
+        MainWindow.resize(1274, 806)
+        font = QtGui.QFont()
+        font.setBold(False)
+        MainWindow.setFont(font)
+        MainWindow.setStyleSheet("background-color:rgb(233, 253, 255)")
+        self.centralwidget = QtWidgets.QWidget(parent=MainWindow)
+        self.centralwidget.setObjectName("centralwidget")
+        self.gridLayout = QtWidgets.QGridLayout(self.centralwidget)
+        self.gridLayout.setObjectName("gridLayout")
+        self.verticalLayout_9 = QtWidgets.QVBoxLayout()
+        self.verticalLayout_9.setObjectName("verticalLayout_9")
+        self.verticalLayout_4 = QtWidgets.QVBoxLayout()
+        self.verticalLayout_4.setObjectName("verticalLayout_4")
+        self.label = QtWidgets.QLabel(parent=self.centralwidget)
+        font = QtGui.QFont()
+        font.setPointSize(16)
+        font.setBold(True)
+        self.label.setFont(font)
+        self.label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+        self.label.setObjectName("label")
+        self.verticalLayout_4.addWidget(self.label)
+        self.horizontalLayout_2 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_2.setObjectName("horizontalLayout_2")
+        self.graph1Layout = QtWidgets.QVBoxLayout()
+        self.graph1Layout.setObjectName("graph1Layout")
+        self.widget_2 = QtWidgets.QWidget(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Expanding)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.widget_2.sizePolicy().hasHeightForWidth())
+        self.widget_2.setSizePolicy(sizePolicy)
+        self.widget_2.setMaximumSize(QtCore.QSize(1150, 160))
+        self.widget_2.setStyleSheet("background-color: rgb(0, 0, 0);")
+        self.widget_2.setObjectName("widget_2")
+        self.graph1Layout.addWidget(self.widget_2)
+        self.horizontalLayout_2.addLayout(self.graph1Layout)
+        self.verticalLayout_4.addLayout(self.horizontalLayout_2)
+        self.graph1HorizontalScroller = QtWidgets.QScrollBar(parent=self.centralwidget)
+        self.graph1HorizontalScroller.setOrientation(QtCore.Qt.Orientation.Horizontal)
+        self.graph1HorizontalScroller.setObjectName("graph1HorizontalScroller")
+        self.verticalLayout_4.addWidget(self.graph1HorizontalScroller)
+        self.verticalLayout_9.addLayout(self.verticalLayout_4)
+        self.verticalLayout_8 = QtWidgets.QVBoxLayout()
+        self.verticalLayout_8.setObjectName("verticalLayout_8")
+        self.label_2 = QtWidgets.QLabel(parent=self.centralwidget)
+        font = QtGui.QFont()
+        font.setPointSize(16)
+        font.setBold(True)
+        self.label_2.setFont(font)
+        self.label_2.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+        self.label_2.setObjectName("label_2")
+        self.verticalLayout_8.addWidget(self.label_2)
+        self.horizontalLayout_4 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_4.setObjectName("horizontalLayout_4")
+        self.graph2Layout = QtWidgets.QVBoxLayout()
+        self.graph2Layout.setObjectName("graph2Layout")
+        self.widget = QtWidgets.QWidget(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Preferred)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.widget.sizePolicy().hasHeightForWidth())
+        self.widget.setSizePolicy(sizePolicy)
+        self.widget.setMaximumSize(QtCore.QSize(1150, 200))
+        self.widget.setStyleSheet("background-color: rgb(0, 0, 0);")
+        self.widget.setObjectName("widget")
+        self.graph2Layout.addWidget(self.widget)
+        self.horizontalLayout_4.addLayout(self.graph2Layout)
+        self.verticalLayout_8.addLayout(self.horizontalLayout_4)
+        self.graph2HorizontalScroller = QtWidgets.QScrollBar(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Preferred, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(50)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.graph2HorizontalScroller.sizePolicy().hasHeightForWidth())
+        self.graph2HorizontalScroller.setSizePolicy(sizePolicy)
+        self.graph2HorizontalScroller.setMaximumSize(QtCore.QSize(2000, 16777215))
+        self.graph2HorizontalScroller.setMaximum(100)
+        self.graph2HorizontalScroller.setSingleStep(1)
+        self.graph2HorizontalScroller.setOrientation(QtCore.Qt.Orientation.Horizontal)
+        self.graph2HorizontalScroller.setObjectName("graph2HorizontalScroller")
+        self.verticalLayout_8.addWidget(self.graph2HorizontalScroller)
+        self.verticalLayout_9.addLayout(self.verticalLayout_8)
+        self.gridLayout.addLayout(self.verticalLayout_9, 0, 0, 1, 1)
+        self.line_8 = QtWidgets.QFrame(parent=self.centralwidget)
+        self.line_8.setFrameShape(QtWidgets.QFrame.Shape.VLine)
+        self.line_8.setFrameShadow(QtWidgets.QFrame.Shadow.Sunken)
+        self.line_8.setObjectName("line_8")
+        self.gridLayout.addWidget(self.line_8, 0, 1, 1, 1)
+        self.horizontalLayout = QtWidgets.QHBoxLayout()
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        self.verticalLayout_7 = QtWidgets.QVBoxLayout()
+        self.verticalLayout_7.setObjectName("verticalLayout_7")
+        self.horizontalLayout.addLayout(self.verticalLayout_7)
+        self.verticalLayout_6 = QtWidgets.QVBoxLayout()
+        self.verticalLayout_6.setObjectName("verticalLayout_6")
+        self.verticalLayout_3 = QtWidgets.QVBoxLayout()
+        self.verticalLayout_3.setObjectName("verticalLayout_3")
+        spacerItem = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Policy.Minimum, QtWidgets.QSizePolicy.Policy.Expanding)
+        self.verticalLayout_3.addItem(spacerItem)
+        self.play_pauseButton = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.play_pauseButton.setObjectName("play_pauseButton")
+        self.verticalLayout_3.addWidget(self.play_pauseButton)
+        self.rewindButton = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.rewindButton.setObjectName("rewindButton")
+        self.verticalLayout_3.addWidget(self.rewindButton)
+        self.zoomInButton = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.zoomInButton.setObjectName("zoomInButton")
+        self.verticalLayout_3.addWidget(self.zoomInButton)
+        self.zoomOutButton = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.zoomOutButton.setObjectName("zoomOutButton")
+        self.verticalLayout_3.addWidget(self.zoomOutButton)
+        self.cineSpeedScoller = QtWidgets.QSlider(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.cineSpeedScoller.sizePolicy().hasHeightForWidth())
+        self.cineSpeedScoller.setSizePolicy(sizePolicy)
+        self.cineSpeedScoller.setOrientation(QtCore.Qt.Orientation.Horizontal)
+        self.cineSpeedScoller.setObjectName("cineSpeedScoller")
+        self.verticalLayout_3.addWidget(self.cineSpeedScoller)
+        spacerItem1 = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Policy.Minimum, QtWidgets.QSizePolicy.Policy.Expanding)
+        self.verticalLayout_3.addItem(spacerItem1)
+        self.verticalLayout_6.addLayout(self.verticalLayout_3)
+        self.verticalLayout_5 = QtWidgets.QVBoxLayout()
+        self.verticalLayout_5.setObjectName("verticalLayout_5")
+        spacerItem2 = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Policy.Minimum, QtWidgets.QSizePolicy.Policy.Expanding)
+        self.verticalLayout_5.addItem(spacerItem2)
+        self.play_pauseButton_2 = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.play_pauseButton_2.setObjectName("play_pauseButton_2")
+        self.verticalLayout_5.addWidget(self.play_pauseButton_2)
+        self.rewindButton_2 = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.rewindButton_2.setObjectName("rewindButton_2")
+        self.verticalLayout_5.addWidget(self.rewindButton_2)
+        self.zoomInButton_2 = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.zoomInButton_2.setObjectName("zoomInButton_2")
+        self.verticalLayout_5.addWidget(self.zoomInButton_2)
+        self.zoomOutButton_2 = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.zoomOutButton_2.setObjectName("zoomOutButton_2")
+        self.verticalLayout_5.addWidget(self.zoomOutButton_2)
+        self.cineSpeedScoller_2 = QtWidgets.QSlider(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.cineSpeedScoller_2.sizePolicy().hasHeightForWidth())
+        self.cineSpeedScoller_2.setSizePolicy(sizePolicy)
+        self.cineSpeedScoller_2.setOrientation(QtCore.Qt.Orientation.Horizontal)
+        self.cineSpeedScoller_2.setObjectName("cineSpeedScoller_2")
+        self.verticalLayout_5.addWidget(self.cineSpeedScoller_2)
+        spacerItem3 = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Policy.Minimum, QtWidgets.QSizePolicy.Policy.Expanding)
+        self.verticalLayout_5.addItem(spacerItem3)
+        self.verticalLayout_6.addLayout(self.verticalLayout_5)
+        self.horizontalLayout.addLayout(self.verticalLayout_6)
+        self.gridLayout.addLayout(self.horizontalLayout, 0, 2, 1, 1)
+        self.verticalLayout_2 = QtWidgets.QVBoxLayout()
+        self.verticalLayout_2.setObjectName("verticalLayout_2")
+        self.line = QtWidgets.QFrame(parent=self.centralwidget)
+        self.line.setFrameShape(QtWidgets.QFrame.Shape.VLine)
+        self.line.setFrameShadow(QtWidgets.QFrame.Shadow.Sunken)
+        self.line.setObjectName("line")
+        self.verticalLayout_2.addWidget(self.line)
+        spacerItem4 = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Policy.Minimum, QtWidgets.QSizePolicy.Policy.Expanding)
+        self.verticalLayout_2.addItem(spacerItem4)
+        self.line_7 = QtWidgets.QFrame(parent=self.centralwidget)
+        self.line_7.setFrameShape(QtWidgets.QFrame.Shape.VLine)
+        self.line_7.setFrameShadow(QtWidgets.QFrame.Shadow.Sunken)
+        self.line_7.setObjectName("line_7")
+        self.verticalLayout_2.addWidget(self.line_7)
+        self.line_5 = QtWidgets.QFrame(parent=self.centralwidget)
+        self.line_5.setFrameShape(QtWidgets.QFrame.Shape.HLine)
+        self.line_5.setFrameShadow(QtWidgets.QFrame.Shadow.Sunken)
+        self.line_5.setObjectName("line_5")
+        self.verticalLayout_2.addWidget(self.line_5)
+        self.line_3 = QtWidgets.QFrame(parent=self.centralwidget)
+        self.line_3.setFrameShape(QtWidgets.QFrame.Shape.VLine)
+        self.line_3.setFrameShadow(QtWidgets.QFrame.Shadow.Sunken)
+        self.line_3.setObjectName("line_3")
+        self.verticalLayout_2.addWidget(self.line_3)
+        self.verticalLayout = QtWidgets.QVBoxLayout()
+        self.verticalLayout.setObjectName("verticalLayout")
+        self.horizontalLayout_6 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_6.setObjectName("horizontalLayout_6")
+        self.line_9 = QtWidgets.QFrame(parent=self.centralwidget)
+        self.line_9.setFrameShape(QtWidgets.QFrame.Shape.HLine)
+        self.line_9.setFrameShadow(QtWidgets.QFrame.Shadow.Sunken)
+        self.line_9.setObjectName("line_9")
+        self.horizontalLayout_6.addWidget(self.line_9)
+        self.label_4 = QtWidgets.QLabel(parent=self.centralwidget)
+        font = QtGui.QFont()
+        font.setPointSize(14)
+        font.setBold(False)
+        self.label_4.setFont(font)
+        self.label_4.setObjectName("label_4")
+        self.horizontalLayout_6.addWidget(self.label_4)
+        spacerItem5 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout_6.addItem(spacerItem5)
+        self.line_6 = QtWidgets.QFrame(parent=self.centralwidget)
+        self.line_6.setFrameShape(QtWidgets.QFrame.Shape.VLine)
+        self.line_6.setFrameShadow(QtWidgets.QFrame.Shadow.Sunken)
+        self.line_6.setObjectName("line_6")
+        self.horizontalLayout_6.addWidget(self.line_6)
+        self.linkgraphsCheckbox = QtWidgets.QCheckBox(parent=self.centralwidget)
+        font = QtGui.QFont()
+        font.setPointSize(15)
+        font.setBold(False)
+        self.linkgraphsCheckbox.setFont(font)
+        self.linkgraphsCheckbox.setObjectName("linkgraphsCheckbox")
+        self.horizontalLayout_6.addWidget(self.linkgraphsCheckbox)
+        self.snapShotButton = QtWidgets.QPushButton(parent=self.centralwidget)
+        font = QtGui.QFont()
+        font.setPointSize(11)
+        font.setBold(False)
+        self.snapShotButton.setFont(font)
+        self.snapShotButton.setObjectName("snapShotButton")
+        self.horizontalLayout_6.addWidget(self.snapShotButton)
+        self.pdfButton = QtWidgets.QPushButton(parent=self.centralwidget)
+        font = QtGui.QFont()
+        font.setPointSize(11)
+        font.setBold(False)
+        self.pdfButton.setFont(font)
+        self.pdfButton.setObjectName("pdfButton")
+        self.horizontalLayout_6.addWidget(self.pdfButton)
+        self.verticalLayout.addLayout(self.horizontalLayout_6)
+        self.horizontalLayout_3 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_3.setObjectName("horizontalLayout_3")
+        self.label_3 = QtWidgets.QLabel(parent=self.centralwidget)
+        self.label_3.setObjectName("label_3")
+        self.horizontalLayout_3.addWidget(self.label_3)
+        self.graph1Radio = QtWidgets.QRadioButton(parent=self.centralwidget)
+        self.graph1Radio.setObjectName("graph1Radio")
+        self.horizontalLayout_3.addWidget(self.graph1Radio)
+        self.graph2Radio = QtWidgets.QRadioButton(parent=self.centralwidget)
+        self.graph2Radio.setObjectName("graph2Radio")
+        self.horizontalLayout_3.addWidget(self.graph2Radio)
+        spacerItem6 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout_3.addItem(spacerItem6)
+        self.verticalLayout.addLayout(self.horizontalLayout_3)
+        spacerItem7 = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Policy.Minimum, QtWidgets.QSizePolicy.Policy.Expanding)
+        self.verticalLayout.addItem(spacerItem7)
+        self.horizontalLayout_9 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_9.setObjectName("horizontalLayout_9")
+        self.browseButton = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.browseButton.setObjectName("browseButton")
+        self.horizontalLayout_9.addWidget(self.browseButton)
+        spacerItem8 = QtWidgets.QSpacerItem(40, 10, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout_9.addItem(spacerItem8)
+        self.verticalLayout.addLayout(self.horizontalLayout_9)
+        self.horizontalLayout_8 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_8.setObjectName("horizontalLayout_8")
+        self.channelsComboBox = QtWidgets.QComboBox(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.channelsComboBox.sizePolicy().hasHeightForWidth())
+        self.channelsComboBox.setSizePolicy(sizePolicy)
+        self.channelsComboBox.setMinimumSize(QtCore.QSize(130, 0))
+        self.channelsComboBox.setMaximumSize(QtCore.QSize(150, 16777215))
+        self.channelsComboBox.setObjectName("channelsComboBox")
+        self.horizontalLayout_8.addWidget(self.channelsComboBox)
+        self.hideChannelCheckBox = QtWidgets.QCheckBox(parent=self.centralwidget)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.hideChannelCheckBox.sizePolicy().hasHeightForWidth())
+        self.hideChannelCheckBox.setSizePolicy(sizePolicy)
+        self.hideChannelCheckBox.setObjectName("hideChannelCheckBox")
+        self.horizontalLayout_8.addWidget(self.hideChannelCheckBox)
+        spacerItem9 = QtWidgets.QSpacerItem(600, 20, QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout_8.addItem(spacerItem9)
+        self.moveToGraph1Button = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.moveToGraph1Button.setMaximumSize(QtCore.QSize(200, 16777215))
+        self.moveToGraph1Button.setObjectName("moveToGraph1Button")
+        self.horizontalLayout_8.addWidget(self.moveToGraph1Button)
+        self.moveToGraph2Button = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.moveToGraph2Button.setMaximumSize(QtCore.QSize(200, 16777215))
+        self.moveToGraph2Button.setObjectName("moveToGraph2Button")
+        self.horizontalLayout_8.addWidget(self.moveToGraph2Button)
+        self.verticalLayout.addLayout(self.horizontalLayout_8)
+        self.horizontalLayout_10 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_10.setObjectName("horizontalLayout_10")
+        self.selectChannelColorButton = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.selectChannelColorButton.setObjectName("selectChannelColorButton")
+        self.horizontalLayout_10.addWidget(self.selectChannelColorButton)
+        spacerItem10 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout_10.addItem(spacerItem10)
+        self.verticalLayout.addLayout(self.horizontalLayout_10)
+        self.horizontalLayout_7 = QtWidgets.QHBoxLayout()
+        self.horizontalLayout_7.setObjectName("horizontalLayout_7")
+        self.editChannelNameLineEdit = QtWidgets.QLineEdit(parent=self.centralwidget)
+        self.editChannelNameLineEdit.setText("")
+        self.editChannelNameLineEdit.setObjectName("editChannelNameLineEdit")
+        self.horizontalLayout_7.addWidget(self.editChannelNameLineEdit)
+        self.editChannelNameButton = QtWidgets.QPushButton(parent=self.centralwidget)
+        self.editChannelNameButton.setObjectName("editChannelNameButton")
+        self.horizontalLayout_7.addWidget(self.editChannelNameButton)
+        spacerItem11 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout_7.addItem(spacerItem11)
+        spacerItem12 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout_7.addItem(spacerItem12)
+        spacerItem13 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout_7.addItem(spacerItem13)
+        spacerItem14 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
+        self.horizontalLayout_7.addItem(spacerItem14)
+        self.verticalLayout.addLayout(self.horizontalLayout_7)
+        self.verticalLayout_2.addLayout(self.verticalLayout)
+        self.gridLayout.addLayout(self.verticalLayout_2, 1, 0, 1, 3)
+        self.line_4 = QtWidgets.QFrame(parent=self.centralwidget)
+        self.line_4.setFrameShape(QtWidgets.QFrame.Shape.HLine)
+        self.line_4.setFrameShadow(QtWidgets.QFrame.Shadow.Sunken)
+        self.line_4.setObjectName("line_4")
+        self.gridLayout.addWidget(self.line_4, 2, 0, 1, 3)
+        MainWindow.setCentralWidget(self.centralwidget)
+        self.menubar = QtWidgets.QMenuBar(parent=MainWindow)
+        self.menubar.setGeometry(QtCore.QRect(0, 0, 1274, 24))
+        self.menubar.setObjectName("menubar")
+        MainWindow.setMenuBar(self.menubar)
+        self.statusbar = QtWidgets.QStatusBar(parent=MainWindow)
+        self.statusbar.setObjectName("statusbar")
+        MainWindow.setStatusBar(self.statusbar)
+
+        self.retranslateUi(MainWindow)
+        QtCore.QMetaObject.connectSlotsByName(MainWindow)
+
+    def retranslateUi(self, MainWindow):
+        _translate = QtCore.QCoreApplication.translate
+        MainWindow.setWindowTitle(_translate("MainWindow", "MainWindow"))
+        self.label.setText(_translate("MainWindow", "Graph 01"))
+        self.label_2.setText(_translate("MainWindow", "Graph 02"))
+        self.play_pauseButton.setText(_translate("MainWindow", "Play / Pause"))
+        self.rewindButton.setText(_translate("MainWindow", "Rewind"))
+        self.zoomInButton.setText(_translate("MainWindow", "Zoom In"))
+        self.zoomOutButton.setText(_translate("MainWindow", "Zoom Out"))
+        self.play_pauseButton_2.setText(_translate("MainWindow", "Play / Pause"))
+        self.rewindButton_2.setText(_translate("MainWindow", "Rewind"))
+        self.zoomInButton_2.setText(_translate("MainWindow", "Zoom In"))
+        self.zoomOutButton_2.setText(_translate("MainWindow", "Zoom Out"))
+        self.label_4.setText(_translate("MainWindow", " Control Center"))
+        self.linkgraphsCheckbox.setText(_translate("MainWindow", "Link Graphs"))
+        self.snapShotButton.setText(_translate("MainWindow", "Snapshot"))
+        self.pdfButton.setText(_translate("MainWindow", "Generate PDF"))
+        self.label_3.setText(_translate("MainWindow", "Select graph"))
+        self.graph1Radio.setText(_translate("MainWindow", "Graph 01"))
+        self.graph2Radio.setText(_translate("MainWindow", "Graph 02"))
+        self.browseButton.setText(_translate("MainWindow", "Browse Signal"))
+        self.channelsComboBox.setPlaceholderText(_translate("MainWindow", "Select a Channel"))
+        self.hideChannelCheckBox.setText(_translate("MainWindow", "Show Channel"))
+        self.moveToGraph1Button.setText(_translate("MainWindow", "Move To Graph 01"))
+        self.moveToGraph2Button.setText(_translate("MainWindow", "Move To Graph 02"))
+        self.selectChannelColorButton.setText(_translate("MainWindow", "Select Color"))
+        self.editChannelNameLineEdit.setPlaceholderText(_translate("MainWindow", "Edit Channel name"))
+        self.editChannelNameButton.setText(_translate("MainWindow", "Edit"))
@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+import queue
+import tempfile
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+import tracing
+
+class ReportExport(QObject):
+    # Builds a PDF report in a separate process so the GUI thread (and the
+    # frame scheduler driving playback) never waits on statistics or layout.
+    # The job is a plain snapshot taken when the export starts; the worker
+    # reports back through a queue that is polled from the event loop. The
+    # PDF is built in a temporary file beside the target and moved over it
+    # only when complete, so cancelling (which terminates the worker and
+    # removes that file) leaves a file being overwritten as it was.
+    progress = pyqtSignal(int, str)  # Percent done, current step
+    finished = pyqtSignal(str)  # Written file name
+    failed = pyqtSignal(str)  # Error message
+    cancelled = pyqtSignal()
+
+    POLL_INTERVAL_MS = 100
+
+    def __init__(self, job, statistics_engine=None, parent=None):
+        super().__init__(parent)
+        self.job = job
+        self.statistics_engine = statistics_engine
+        self._process = None
+        self._messages = None
+        self._trace_start = None
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._poll)
+
+    def start(self):
+        from report import run_export_job  # reportlab is only needed once something is exported
+
+        # A fresh interpreter rather than a fork of the running Qt application
+        self._trace_start = tracing.now()
+        directory, name = os.path.split(os.path.abspath(self.job['file_name']))
+        handle, partial_name = tempfile.mkstemp(prefix=f".{name}.", suffix='.part', dir=directory)
+        os.close(handle)
+        self.job = dict(self.job, partial_name=partial_name)
+        context = multiprocessing.get_context('spawn')
+        self._messages = context.Queue()
+        self._process = context.Process(target=run_export_job, args=(self.job, self._messages), daemon=True)
+        try:
+            self._process.start()
+        except (OSError, RuntimeError):
+            self._process = None
+            self._messages.close()
+            os.remove(partial_name)
+            raise
+        self._timer.start(self.POLL_INTERVAL_MS)
+        self.progress.emit(0, 'Starting')
+
+    def is_running(self):
+        return self._process is not None
+
+    def cancel(self):
+        if self._process is None:
+            return
+        self._process.terminate()
+        self._finish()
+        self.cancelled.emit()
+
+    def _poll(self):
+        while self._process is not None:
+            try:
+                message = self._messages.get_nowait()
+            except queue.Empty:
+                break
+
+            kind = message[0]
+            if kind == 'progress':
+                tracing.instant(message[2], 'export', fraction=message[1])
+                self.progress.emit(int(100 * message[1]), message[2])
+            elif kind == 'statistics':
+                # Keep what the worker computed for the next export
+                if self.statistics_engine is not None:
+                    self.statistics_engine.merge(message[1])
+            elif kind == 'finished':
+                self._finish()
+                self.finished.emit(message[1])
+            elif kind == 'failed':
+                self._finish()
+                self.failed.emit(message[1])
+
+        if self._process is not None and not self._process.is_alive() and self._messages.empty():
+            code = self._process.exitcode
+            self._finish()
+            self.failed.emit(f"Report worker exited unexpectedly (code {code})")
+
+    def _finish(self):
+        self._timer.stop()
+        tracing.complete('pdf export', 'export', self._trace_start, file=self.job['file_name'])
+        self._process.join(1.0)
+        # The worker moves the temporary file into place once the PDF is
+        # complete; anything left of it was not
+        partial_name = self.job.get('partial_name')
+        if partial_name and os.path.exists(partial_name):
+            os.remove(partial_name)
+        self._process = None
+        self._messages.close()
+        self._messages = None
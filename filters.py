@@ -0,0 +1,220 @@
+import numpy as np  # Numerical operations library
+
+from buffers import GrowableArray, RingBuffer
+
+MAINS_FREQUENCY = 50.0  # Hz; 60 in the Americas
+BLOCK = 64  # Samples filtered per matrix product
+FILTER_AHEAD = 1024  # Recorded samples filtered ahead of playback, so frames rarely filter at all
+JUMP_SAMPLES = 1 << 16  # Reads starting further than this past what is filtered start a separate run
+SETTLE_SAMPLES = 4096  # Filtered before such a read, so the filters have settled by its first sample
+
+# Filter chains as (stage, frequency) steps, by kind of signal:
+#   highpass  removes baseline wander below the frequency
+#   lowpass   removes content above it
+#   notch     removes mains hum at it
+FILTER_PRESETS = {
+    'ECG': [('highpass', 0.5), ('notch', MAINS_FREQUENCY), ('lowpass', 40.0)],
+    'EEG': [('highpass', 0.5), ('notch', MAINS_FREQUENCY), ('lowpass', 40.0)],
+    'EMG': [('highpass', 20.0), ('notch', MAINS_FREQUENCY), ('notch', 2 * MAINS_FREQUENCY)],
+    None: [('highpass', 0.5), ('notch', MAINS_FREQUENCY)],
+}
+
+
+def signal_kind(text):
+    # 'ECG', 'EEG' or 'EMG' from a channel name or file path, if it says
+    text = str(text).upper()
+    for kind in ('ECG', 'EEG', 'EMG'):
+        if kind in text:
+            return kind
+    return 'ECG' if 'EKG' in text else None
+
+
+def biquad(stage, frequency, sample_rate, q=None):
+    # One second-order section [b0, b1, b2, 1, a1, a2] (Audio EQ Cookbook)
+    w0 = 2 * np.pi * frequency / sample_rate
+    cos_w0 = np.cos(w0)
+    if stage == 'notch':
+        alpha = np.sin(w0) / (2 * (q or 30.0))
+        b = [1.0, -2 * cos_w0, 1.0]
+    else:
+        alpha = np.sin(w0) / (2 * (q or np.sqrt(0.5)))
+        if stage == 'lowpass':
+            b = [(1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2]
+        elif stage == 'highpass':
+            b = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+        else:
+            raise ValueError(f"Unknown filter stage: {stage}")
+    a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+    return np.array(b + a) / a[0]
+
+
+def design_chain(stages, sample_rate, order=2):
+    # Second-order sections of a chain of (stage, frequency) steps. High-
+    # and low-pass stages are Butterworth of the given (even) order; stages
+    # at or above the Nyquist frequency are left out.
+    sections = []
+    for stage, frequency in stages:
+        if not 0 < frequency < 0.5 * sample_rate:
+            continue
+        if stage == 'notch':
+            sections.append(biquad(stage, frequency, sample_rate))
+            continue
+        pairs = max(1, order // 2)
+        for k in range(pairs):
+            # Butterworth pole pairs
+            sections.append(biquad(stage, frequency, sample_rate, 1 / (2 * np.sin((2 * k + 1) * np.pi / (4 * pairs)))))
+    return np.array(sections).reshape(-1, 6)
+
+
+class FilterChain:
+    # Cascade of IIR second-order sections that keeps its state between
+    # calls, so a signal can be filtered as it arrives, a few samples at a
+    # time, exactly as if it had been filtered in one go.
+    #
+    # Each section is run in state-space form on blocks of BLOCK samples:
+    # a block's output is its input times a precomputed impulse-response
+    # matrix plus the incoming state times an observability matrix, so the
+    # per-sample recursion becomes a few matrix products for all blocks and
+    # channels at once; only the two-number state is carried from block to
+    # block in a loop.
+    def __init__(self, sos):
+        self.sos = np.atleast_2d(np.asarray(sos, dtype=np.float64))
+        self._sections = [self._block_matrices(section) for section in self.sos]
+        self.state = None  # channels x sections x 2; set from the first samples
+
+    @staticmethod
+    def _block_matrices(section):
+        b0, b1, b2, _, a1, a2 = section
+        # Transposed direct form II: y = z1 + b0 x, z' = A z + B x
+        A = np.array([[-a1, 1.0], [-a2, 0.0]])
+        B = np.array([b1 - a1 * b0, b2 - a2 * b0])
+        powers = [np.eye(2)]
+        for _ in range(BLOCK):
+            powers.append(A @ powers[-1])
+        powers = np.array(powers)  # A^0 .. A^BLOCK
+        observe = powers[:BLOCK, 0, :]  # Row n: C A^n
+        impulse = np.concatenate(([b0], powers[:BLOCK - 1, 0, :] @ B))  # h[0] = b0, h[m] = C A^(m-1) B
+        lags = np.arange(BLOCK)[:, None] - np.arange(BLOCK)[None, :]
+        response = np.where(lags >= 0, impulse[np.clip(lags, 0, None)], 0.0)  # Lower-triangular Toeplitz
+        carry = (powers[BLOCK - 1::-1] @ B).T  # Column k: A^(BLOCK-1-k) B
+        # Steady state for a constant input of 1, and the section's DC gain
+        steady = np.linalg.solve(np.eye(2) - A, B)
+        return A, observe, response, carry, powers, steady, steady[0] + b0
+
+    def reset(self, first_values):
+        # Start as if the signal had always been at these values (one per
+        # channel), so a recording that does not start at zero has no step
+        # transient at its start
+        values = np.asarray(first_values, dtype=np.float64)
+        self.state = np.empty((len(values), len(self._sections), 2))
+        for i, (_, _, _, _, _, steady, gain) in enumerate(self._sections):
+            self.state[:, i] = values[:, None] * steady
+            values = values * gain
+
+    def process(self, samples):
+        # Filter the next samples (n, or channels x n)
+        samples = np.asarray(samples, dtype=np.float64)
+        one_channel = samples.ndim == 1
+        data = np.atleast_2d(samples)
+        if data.shape[1] == 0:
+            return samples.astype(np.float64)
+        if self.state is None or len(self.state) != len(data):
+            self.reset(data[:, 0])
+        for i, section in enumerate(self._sections):
+            data, self.state[:, i] = self._run_section(section, data, self.state[:, i])
+        return data[0] if one_channel else data
+
+    @staticmethod
+    def _run_section(section, data, state):
+        A, observe, response, carry, powers, _, _ = section
+        channels, count = data.shape
+        blocks, rest = divmod(count, BLOCK)
+        output = np.empty_like(data)
+        if blocks:
+            x = data[:, :blocks * BLOCK].reshape(channels, blocks, BLOCK)
+            # The state entering each block, from the state each block adds
+            added = x @ carry.T  # channels x blocks x 2
+            step = powers[BLOCK].T
+            entering = np.empty((channels, blocks, 2))
+            for block in range(blocks):
+                entering[:, block] = state
+                state = state @ step + added[:, block]
+            output[:, :blocks * BLOCK] = (x @ response.T + entering @ observe.T).reshape(channels, -1)
+        if rest:
+            x = data[:, blocks * BLOCK:]
+            output[:, blocks * BLOCK:] = x @ response[:rest, :rest].T + state @ observe[:rest].T
+            state = state @ powers[rest].T + x @ carry[:, BLOCK - rest:].T
+        return output, state
+
+
+class FilteredSignal:
+    # A channel seen through a FilterChain. Samples are filtered the first
+    # time they are read, in order, and the result is cached next to the raw
+    # data, so drawing, scrolling back, summaries and statistics all read the
+    # cache and nothing is ever filtered twice. Recordings are filtered a
+    # little ahead of what is asked; a live channel only as far as it has
+    # arrived, and its cache is bounded like its history.
+    #
+    # A read far past what is filtered (playback sought ahead) is served by
+    # a second FilteredSignal started just before it, so a seek never
+    # filters everything in between; the first run takes over again once
+    # it catches up.
+    def __init__(self, source, sos, start=0):
+        self.source = source
+        self.sos = sos
+        self.chain = FilterChain(sos)
+        self.live = hasattr(source, 'first_index')
+        if self.live:
+            self._cache = RingBuffer(source.history.capacity, np.float32)
+        else:
+            self._cache = GrowableArray(np.float32, capacity=FILTER_AHEAD)
+        self._start = getattr(source, 'first_index', max(0, start))  # Index of the first sample filtered
+        self.count = self._start  # Index of the next sample to filter
+        self._ahead = None  # FilteredSignal serving reads far past `count`, after a seek
+
+    def __len__(self):
+        return len(self.source)
+
+    @property
+    def dtype(self):
+        return np.dtype(np.float32)
+
+    @property
+    def first_index(self):
+        return self.count - len(self._cache) if self.live else self._start
+
+    def filter_to(self, stop):
+        # Make sure samples before `stop` are filtered
+        length = len(self.source)
+        stop = min(stop, length)
+        if stop <= self.count:
+            return
+        if not self.live:
+            stop = min(length, max(stop, self.count + FILTER_AHEAD))
+        elif self.source.first_index > self.count:
+            # Fell behind a live history that has moved on: restart at its oldest sample
+            self._cache.clear()
+            self.chain.state = None
+            self.count = self._start = self.source.first_index
+        raw = np.nan_to_num(np.asarray(self.source[self.count:stop], dtype=np.float64))
+        self._cache.extend(self.chain.process(raw).astype(np.float32))
+        self.count = stop
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError("FilteredSignal only supports slicing.")
+        start, stop, _ = key.indices(len(self))
+        if not self.live and start - self.count > JUMP_SAMPLES:
+            ahead = self._ahead
+            if ahead is None or start < ahead.first_index + SETTLE_SAMPLES or start - ahead.count > JUMP_SAMPLES:
+                ahead = self._ahead = FilteredSignal(self.source, self.sos, start - SETTLE_SAMPLES)
+            return ahead[start:stop]
+        self.filter_to(stop)
+        if self._ahead is not None and self.count >= self._ahead.count:
+            self._ahead = None  # Caught up
+        first = self.first_index
+        start = max(start, first)
+        stop = max(min(stop, self.count), start)
+        if self.live:
+            return self._cache.view()[start - first:stop - first]
+        return self._cache.view(start - first, stop - first)
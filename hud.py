@@ -0,0 +1,64 @@
+import numpy as np  # Numerical operations library
+import pyqtgraph as pg
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtWidgets import QLabel
+
+import tracing
+
+HUD_REFRESH_MS = 250  # The overlay itself must not cost a frame
+
+
+class FrameTimeHud(QLabel):
+    # Small overlay in the corner of a window showing how the frame
+    # scheduler is keeping up: frame-time percentiles over the recent
+    # frames, frames dropped to pay back overruns, whether rendering is
+    # degraded, and how far each live graph's ingest is behind.
+    def __init__(self, views, parent):
+        super().__init__(parent)
+        self.views = views
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setStyleSheet("background: rgba(0, 0, 0, 170); color: #7CFC00; font-family: monospace; padding: 4px;")
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def set_enabled(self, enabled):
+        if enabled:
+            self.refresh()
+            self.show()
+            self.raise_()
+            self._timer.start(HUD_REFRESH_MS)
+        else:
+            self._timer.stop()
+            self.hide()
+
+    def toggle(self):
+        self.set_enabled(not self.isVisible())
+
+    def refresh(self):
+        scheduler = self.views.scheduler
+        lines = []
+        if scheduler.frame_times:
+            p50, p95, p99 = np.percentile(np.fromiter(scheduler.frame_times, float), (50, 95, 99))
+            lines.append(f"frame  p50 {p50:5.1f}  p95 {p95:5.1f}  p99 {p99:5.1f} ms")
+        else:
+            lines.append("frame  no frames yet")
+        lines.append(f"budget {scheduler.budget_ms:.0f} ms  dropped {scheduler.skipped_frames}"
+                     + ("  DEGRADED" if scheduler.degraded else ""))
+        for view in self.views:
+            if view.has_live_channels():
+                lines.append(f"graph {view.key} ingest lag {view.ingest_lag:6.1f} ms")
+        if tracing.enabled:
+            lines.append(f"tracing  {tracing.count()} events")
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        # Top-right corner of the parent
+        self.move(self.parentWidget().width() - self.width() - 8, 8)
+
+
+class TracedPlotWidget(pg.PlotWidget):
+    # PlotWidget whose repaints show up in the trace, so the time Qt spends
+    # painting the scene can be told apart from the time spent preparing it
+    def paintEvent(self, event):
+        with tracing.span('paint', 'paint'):
+            super().paintEvent(event)
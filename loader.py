@@ -0,0 +1,51 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+import tracing
+from signal_format import validate_signal
+
+
+class SignalLoader(QObject):
+    # Opens, decodes and validates recordings on a small thread pool. File
+    # reads and NumPy copies release the GIL, so several files load at once
+    # while the GUI thread keeps drawing. Results come back as signals,
+    # which Qt queues onto the GUI thread, in the order the files finish.
+    loaded = pyqtSignal(object, str, object)  # Tag, file path, SignalFile
+    failed = pyqtSignal(object, str, str)  # Tag, file path, error message
+
+    def __init__(self, store, max_workers=None, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or min(4, os.cpu_count() or 1),
+                                        thread_name_prefix='signal-loader')
+        self._pending = set()
+
+    def load(self, file_path, tag=None):
+        # tag is handed back with the result (e.g. the view the file is for)
+        future = self._pool.submit(self._open, file_path)
+        self._pending.add(future)
+        future.add_done_callback(lambda done: self._finished(done, file_path, tag))
+        return future
+
+    def pending(self):
+        return len(self._pending)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _open(self, file_path):
+        with tracing.span('load', 'io', file=file_path):
+            return validate_signal(self.store.open(file_path))
+
+    def _finished(self, future, file_path, tag):
+        # Runs on the worker thread
+        self._pending.discard(future)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            self.loaded.emit(tag, file_path, future.result())
+        else:
+            self.failed.emit(tag, file_path, str(error) or type(error).__name__)
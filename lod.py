@@ -0,0 +1,179 @@
+import numpy as np  # Numerical operations library
+
+from buffers import GrowableArray
+
+
+class _Level:
+    # One level of the pyramid: min/max of consecutive blocks of
+    # `block_size` samples, plus the children of the block still being filled
+    def __init__(self, block_size, dtype):
+        self.block_size = block_size
+        self.mins = GrowableArray(dtype)
+        self.maxs = GrowableArray(dtype)
+        self.pending_mins = np.empty(0, dtype=dtype)
+        self.pending_maxs = np.empty(0, dtype=dtype)
+
+    def __len__(self):
+        return len(self.mins)
+
+
+class MinMaxPyramid:
+    # Level-of-detail summary of one channel. Level k stores the min and max
+    # of every block of FACTOR**k samples, so any window can be drawn with
+    # about two points per screen pixel whatever its length. The pyramid is
+    # extended incrementally: appending n samples costs O(n) in total and
+    # never touches what was already summarised.
+    FACTOR = 2
+
+    def __init__(self, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self.count = 0  # Raw samples summarised so far
+        self._levels = []
+
+    @classmethod
+    def from_array(cls, data, chunk_size=1 << 20):
+        # Build the pyramid for a whole recording; works chunk by chunk so a
+        # memory-mapped file is never read into memory at once
+        pyramid = cls(np.result_type(data.dtype, np.float32))
+        for start in range(0, len(data), chunk_size):
+            pyramid.extend(data[start:start + chunk_size])
+        return pyramid
+
+    @property
+    def levels(self):
+        return len(self._levels)
+
+    def extend(self, samples):
+        samples = np.asarray(samples, dtype=self.dtype)
+        if len(samples) == 0:
+            return
+        self.count += len(samples)
+
+        child_mins = child_maxs = samples
+        depth = 0
+        while len(child_mins):
+            if depth == len(self._levels):
+                self._levels.append(_Level(self.FACTOR ** (depth + 1), self.dtype))
+            level = self._levels[depth]
+
+            mins = np.concatenate((level.pending_mins, child_mins))
+            maxs = np.concatenate((level.pending_maxs, child_maxs))
+            complete = len(mins) - len(mins) % self.FACTOR
+            level.pending_mins = mins[complete:]
+            level.pending_maxs = maxs[complete:]
+            if complete == 0:
+                break
+
+            # Element-wise over strided views, much faster than reducing
+            # rows of FACTOR values
+            child_mins, child_maxs = mins[0:complete:self.FACTOR], maxs[0:complete:self.FACTOR]
+            for offset in range(1, self.FACTOR):
+                child_mins = np.minimum(child_mins, mins[offset:complete:self.FACTOR])
+                child_maxs = np.maximum(child_maxs, maxs[offset:complete:self.FACTOR])
+            level.mins.extend(child_mins)
+            level.maxs.extend(child_maxs)
+            depth += 1
+
+    def _blocks(self, level, first_block, last_block):
+        # Min/max of blocks [first_block, last_block) including the partly
+        # filled block at the end, which is summarised from its pending children
+        mins = level.mins.view(first_block, last_block)
+        maxs = level.maxs.view(first_block, last_block)
+        if last_block > len(level) and len(level.pending_mins):
+            mins = np.append(mins, level.pending_mins.min())
+            maxs = np.append(maxs, level.pending_maxs.max())
+        return mins, maxs
+
+    def query(self, start, stop, max_points):
+        # Decimated (block_starts, mins, maxs) for samples [start, stop) using
+        # at most max_points // 2 blocks, or None when the raw samples
+        # already fit in max_points and should be drawn directly
+        stop = min(stop, self.count)
+        span = stop - start
+        if span <= max_points or not self._levels:
+            return None
+
+        max_blocks = max(1, max_points // 2)
+        depth = 0
+        while depth < len(self._levels) - 1 and -(-span // self._levels[depth].block_size) > max_blocks:
+            depth += 1
+        level = self._levels[depth]
+
+        block_size = level.block_size
+        first_block = start // block_size
+        last_block = -(-stop // block_size)
+        mins, maxs = self._blocks(level, first_block, last_block)
+        block_starts = (first_block + np.arange(len(mins))) * block_size
+        return block_starts, mins, maxs
+
+    def extent(self, data, start, stop):
+        # Exact (min, max) of data[start:stop] in O(log n): unaligned samples
+        # at each edge are taken one level down, everything in between from
+        # the coarsest level that covers it
+        stop = min(stop, self.count)
+        if stop <= start:
+            return None
+
+        low, high = float('inf'), float('-inf')
+        depth = -1  # -1 is the raw data
+        while start < stop:
+            if depth < 0:
+                mins = maxs = data
+            else:
+                mins = self._levels[depth].mins.view()
+                maxs = self._levels[depth].maxs.view()
+
+            if depth == len(self._levels) - 1 or stop - start <= 8:
+                low = min(low, float(np.min(mins[start:stop])))
+                high = max(high, float(np.max(maxs[start:stop])))
+                break
+
+            if start % self.FACTOR:
+                edge = start + self.FACTOR - start % self.FACTOR
+                low = min(low, float(np.min(mins[start:edge])))
+                high = max(high, float(np.max(maxs[start:edge])))
+                start = edge
+            if stop % self.FACTOR:
+                edge = stop - stop % self.FACTOR
+                if edge > start:
+                    low = min(low, float(np.min(mins[edge:stop])))
+                    high = max(high, float(np.max(maxs[edge:stop])))
+                    stop = edge
+            start //= self.FACTOR
+            stop //= self.FACTOR
+            depth += 1
+        return low, high
+
+    def decimate(self, start, stop, max_points):
+        # Interleaved (x, y) points tracing the min/max envelope, x in samples
+        result = self.query(start, stop, max_points)
+        if result is None:
+            return None
+        block_starts, mins, maxs = result
+        x = np.repeat(block_starts, 2).astype(np.float64)
+        y = np.empty(2 * len(mins), dtype=self.dtype)
+        y[0::2] = mins
+        y[1::2] = maxs
+        return x, y
+
+
+def decimate_minmax(values, first, max_points):
+    # On-the-fly min/max envelope of `values` (which start at sample `first`)
+    # for data without a pyramid, e.g. the bounded history of a live feed.
+    # Costs one vectorised pass over the values; x is in samples. A 2-D
+    # (channels x samples) array is reduced row by row in the same pass.
+    count = values.shape[-1]
+    block_size = -(-count // max(1, max_points // 2))
+    if block_size <= 1:
+        return np.arange(first, first + count, dtype=np.float64), values
+    complete = count - count % block_size
+    blocks = values[..., :complete].reshape(values.shape[:-1] + (-1, block_size))
+    mins, maxs = blocks.min(axis=-1), blocks.max(axis=-1)
+    if complete < count:
+        mins = np.concatenate((mins, values[..., complete:].min(axis=-1, keepdims=True)), axis=-1)
+        maxs = np.concatenate((maxs, values[..., complete:].max(axis=-1, keepdims=True)), axis=-1)
+    x = np.repeat(first + np.arange(mins.shape[-1]) * block_size, 2).astype(np.float64)
+    y = np.empty(mins.shape[:-1] + (2 * mins.shape[-1],), dtype=values.dtype)
+    y[..., 0::2] = mins
+    y[..., 1::2] = maxs
+    return x, y
@@ -0,0 +1,45 @@
+import time  # Wall-clock timing
+
+# Sampling rate assumed for files that do not carry their own (legacy .pkl)
+DEFAULT_SAMPLE_RATE = 250.0  # Hz
+
+# How often the display is refreshed; independent of the data rate
+FRAME_INTERVAL_MS = 33
+
+# Width of the scrolling window shown while a graph is playing
+DISPLAY_WINDOW_SECONDS = 4.0
+
+
+class PlaybackClock:
+    # Playback position in seconds, driven by wall time rather than by the
+    # number of timer ticks. Each frame advances the position by the real
+    # time that elapsed since the previous frame times the cine speed, so
+    # timer jitter or a slow frame never turns into drift.
+    def __init__(self, speed=1.0, clock=time.perf_counter):
+        self._clock = clock
+        self.speed = speed
+        self.position = 0.0  # Seconds of signal played so far
+        self._last_tick = None
+
+    def tick(self, playing=True):
+        # Advance by the elapsed wall time if playing; while paused only the
+        # reference point moves, so resuming does not jump ahead
+        now = self._clock()
+        if playing and self._last_tick is not None:
+            self.position += (now - self._last_tick) * self.speed
+        self._last_tick = now
+        return self.position
+
+    def set_speed(self, speed, playing=True):
+        # Bank the time played at the old speed before switching
+        if self._last_tick is not None:
+            self.tick(playing)
+        self.speed = speed
+
+    def seek(self, position):
+        self.position = max(0.0, float(position))
+        self._last_tick = None
+
+    def sample_index(self, sample_rate):
+        # Index of the newest sample that is due at the current position
+        return int(self.position * sample_rate)
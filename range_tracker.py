@@ -0,0 +1,25 @@
+class AxisRange:
+    # Decides when an axis really needs rescaling. With hysteresis h the
+    # range is set to the data extent plus h/2 headroom on each side; it then
+    # only changes when the data leaves it, or when the data has shrunk to
+    # less than (1 - h) of it. A hysteresis of 0 tracks the extent exactly.
+    def __init__(self, hysteresis=0.0):
+        self.hysteresis = hysteresis
+        self.low = None
+        self.high = None
+
+    def reset(self):
+        self.low = None
+        self.high = None
+
+    def update(self, low, high):
+        # The new (low, high) when the axis should move, otherwise None
+        if self.low is not None:
+            inside = low >= self.low and high <= self.high
+            current_span = self.high - self.low
+            if inside and (high - low) >= (1.0 - self.hysteresis) * current_span:
+                return None
+
+        margin = (high - low) * self.hysteresis * 0.5
+        self.low, self.high = low - margin, high + margin
+        return self.low, self.high
@@ -0,0 +1,187 @@
+import io
+import os
+from os import path  # Functions to manipulate file paths
+
+import numpy as np  # Numerical operations library
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle, PageBreak
+from reportlab.graphics.shapes import Drawing, PolyLine, Rect, String
+
+from lod import decimate_minmax
+from signal_format import open_signal
+from signal_stats import StatisticsEngine
+
+REPORT_TITLE = "ICU MultiVital Signal Monitor"
+TABLE_HEADER = ['Channel', 'Mean', 'Std Dev', 'Duration', 'Min Value', 'Max Value']
+TRACE_COLORS = [colors.red, colors.green, colors.blue, colors.orange, colors.magenta, colors.cyan, colors.black]
+
+
+def statistics_table(rows):
+    # rows: (channel name, statistics dict) pairs
+    data = [TABLE_HEADER]
+    for channel, channel_stats in rows:
+        data.append([
+            channel,
+            f"{channel_stats['Mean']:.2f}",
+            f"{channel_stats['Standard Deviation']:.2f}",
+            channel_stats.get('Duration', ''),
+            f"{channel_stats['Min Value']:.2f}",
+            f"{channel_stats['Max Value']:.2f}"
+        ])
+
+    table = Table(data)
+    table.setStyle(TableStyle([('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                               ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                               ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                               ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                               ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                               ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                               ('GRID', (0, 0), (-1, -1), 1, colors.black)]))
+    return table
+
+
+def report_styles():
+    # (title style, side header style) shared by every report
+    styles = getSampleStyleSheet()
+    side_header_style = styles['Normal'].clone('SideHeaderStyle')
+    side_header_style.fontName = 'Helvetica-Bold'
+    side_header_style.fontSize = 14
+    side_header_style.alignment = 0
+    return styles['Title'], side_header_style
+
+
+def side_header(text, style):
+    bullet_point = '<bullet>&diams;</bullet>'
+    return Paragraph(f'<b>{bullet_point}</b> <u>{text}</u>', style)
+
+
+def report_document(file_name):
+    return SimpleDocTemplate(file_name, pagesize=letter, leftMargin=inch, rightMargin=inch, topMargin=inch, bottomMargin=inch)
+
+
+def signal_drawing(traces, width=6 * inch, height=3 * inch):
+    # Vector plot of (x seconds, y, color) traces, drawn without any GUI
+    drawing = Drawing(width, height)
+    drawing.add(Rect(0, 0, width, height, strokeColor=colors.grey, fillColor=colors.black))
+    traces = [trace for trace in traces if len(trace[0])]
+    if not traces:
+        return drawing
+
+    x_min = min(float(x[0]) for x, _, _ in traces)
+    x_max = max(float(x[-1]) for x, _, _ in traces)
+    y_min = min(float(np.min(y)) for _, y, _ in traces)
+    y_max = max(float(np.max(y)) for _, y, _ in traces)
+    x_scale = (width - 10) / ((x_max - x_min) or 1.0)
+    y_scale = (height - 24) / ((y_max - y_min) or 1.0)
+
+    for x, y, color in traces:
+        px = 5 + (np.asarray(x, dtype=np.float64) - x_min) * x_scale
+        py = 12 + (np.asarray(y, dtype=np.float64) - y_min) * y_scale
+        points = np.column_stack((px, py)).ravel().tolist()
+        drawing.add(PolyLine(points, strokeColor=color, strokeWidth=0.5))
+
+    drawing.add(String(5, 2, f"{x_min:.1f} s", fontSize=7, fillColor=colors.white))
+    drawing.add(String(width - 5, 2, f"{x_max:.1f} s", fontSize=7, fillColor=colors.white, textAnchor='end'))
+    return drawing
+
+
+def summarise_recording(file_path, max_points=1200, statistics_engine=None):
+    # Everything a report needs about one recording, small enough to send
+    # between processes: per channel its statistics and a min/max envelope
+    statistics_engine = statistics_engine or StatisticsEngine()
+    signal = open_signal(file_path)
+    statistics = statistics_engine.file_statistics(file_path)
+    channels = []
+    for index in range(signal.channels):
+        x, y = decimate_minmax(signal.channel(index), 0, max_points)
+        channels.append({
+            'name': signal.channel_names[index],
+            'statistics': statistics[index],
+            'x': x / signal.channel_rate(index),
+            'y': np.asarray(y, dtype=np.float32),
+        })
+    return {'name': path.basename(file_path), 'file_path': file_path, 'sample_rate': signal.sample_rate, 'channels': channels}
+
+
+def recording_elements(summary, side_header_style):
+    traces = [(channel['x'], channel['y'], TRACE_COLORS[i % len(TRACE_COLORS)]) for i, channel in enumerate(summary['channels'])]
+    rows = [(channel['name'], channel['statistics']) for channel in summary['channels']]
+    return [
+        side_header(f"{summary['name']} ({summary['sample_rate']:g} Hz)", side_header_style),
+        Spacer(0, 20),
+        signal_drawing(traces),
+        Spacer(0, 0.4 * inch),
+        statistics_table(rows),
+        PageBreak(),
+    ]
+
+
+def write_report(file_name, summaries):
+    # One PDF with a page per recording
+    title_style, side_header_style = report_styles()
+    elements = [Paragraph(f"<b>{REPORT_TITLE}</b>", title_style), Spacer(0, 30)]
+    for summary in summaries:
+        elements.extend(recording_elements(summary, side_header_style))
+    report_document(file_name).build(elements)
+    return file_name
+
+
+def write_graph_report(file_name, graphs, progress=None):
+    # The monitor's own report: per graph a header, then every snapshot with
+    # the graph's statistics table. graphs: dicts with 'title', 'images'
+    # (PNG bytes, paths or file-like objects) and 'table'. progress(fraction) is called
+    # while the document is laid out
+    doc = report_document(file_name)
+    title_style, side_header_style = report_styles()
+    elements = [Paragraph(f"<b>{REPORT_TITLE}</b>", title_style), Spacer(0, 60)]
+
+    for graph in graphs:
+        elements.append(side_header(graph['title'], side_header_style))
+        elements.extend([Spacer(0, 40)])
+        for image_source in graph['images']:
+            if isinstance(image_source, bytes):
+                image_source = io.BytesIO(image_source)  # In-memory PNG snapshot
+            # Fit the 6 x 4 inch box without distorting the snapshot
+            elements.append(Image(image_source, width=6*inch, height=4*inch, kind='proportional'))
+            elements.extend([Spacer(0, 0.63*inch), graph['table']])
+            elements.append(PageBreak())
+
+    if progress is not None:
+        total = max(1, len(elements))
+        doc.setProgressCallBack(lambda kind, value: progress(value / total) if kind == 'PROGRESS' else None)
+    doc.build(elements)
+    return file_name
+
+
+def run_export_job(job, messages):
+    # Entry point of the report worker process. job is a plain snapshot:
+    #   {'file_name': ..., 'statistics': {path: cache entry},
+    #    'graphs': [{'title', 'images', 'channels': [(name, path, channel index in the file)]}],
+    #    'partial_name': optional file the PDF is built in, moved to file_name once complete}
+    # Progress goes back through the `messages` queue as tuples.
+    try:
+        statistics_engine = StatisticsEngine()
+        statistics_engine.merge(job.get('statistics', {}))
+
+        channels = [channel for graph in job['graphs'] for channel in graph['channels']]
+        for done, (_, file_path, _) in enumerate(channels):
+            statistics_engine.file_statistics(file_path)
+            messages.put(('progress', 0.5 * (done + 1) / max(1, len(channels)), 'Computing statistics'))
+        messages.put(('statistics', statistics_engine.export_cache()))
+
+        graphs = []
+        for graph in job['graphs']:
+            rows = [(name, statistics_engine.file_statistics(file_path)[index]) for name, file_path, index in graph['channels']]
+            graphs.append({'title': graph['title'], 'images': graph['images'], 'table': statistics_table(rows)})
+
+        partial_name = job.get('partial_name') or job['file_name']
+        write_graph_report(partial_name, graphs,
+                           lambda fraction: messages.put(('progress', 0.5 + 0.5 * fraction, 'Building PDF')))
+        if partial_name != job['file_name']:
+            os.replace(partial_name, job['file_name'])
+        messages.put(('finished', job['file_name']))
+    except Exception as error:
+        messages.put(('failed', str(error)))
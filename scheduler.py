@@ -0,0 +1,111 @@
+import time  # Wall-clock timing
+from collections import deque
+
+from PyQt6.QtCore import QObject, QTimer, Qt, pyqtSignal
+
+import tracing
+from playback import FRAME_INTERVAL_MS
+
+
+class FrameScheduler(QObject):
+    # One frame clock for every graph. Each frame first advances all
+    # registered views from the same tick, then redraws the ones that
+    # changed in a single pass, so linked graphs always paint together and
+    # the number of timers no longer grows with the number of views.
+    #
+    # The cost of every frame is measured. When a frame overruns its budget
+    # the following frames are skipped until the time is paid back, and after
+    # a run of overruns the scheduler switches to degraded rendering (the
+    # views are told to draw cheaper frames) until it has recovered.
+    frame_finished = pyqtSignal(float)  # Frame cost in milliseconds
+
+    OVERRUNS_BEFORE_DEGRADING = 3
+    FAST_FRAMES_BEFORE_RECOVERING = 30
+    MAX_SKIPPED_FRAMES = 4
+
+    def __init__(self, interval_ms=FRAME_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self.interval_ms = interval_ms
+        self.budget_ms = interval_ms
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self.run_frame)
+
+        self._views = {}  # key -> (advance callback, render callback)
+        self._dirty = set()
+        self._frames_to_skip = 0
+        self._overruns = 0
+        self._fast_frames = 0
+
+        self.degraded = False
+        self.skipped_frames = 0
+        self.frame_times = deque(maxlen=240)  # Recent frame costs in milliseconds
+
+    def register(self, key, advance, render):
+        # advance() moves the view's clock and returns True when it needs a
+        # redraw; render(degraded) draws it
+        self._views[key] = (advance, render)
+        self._dirty.add(key)
+
+    def unregister(self, key):
+        self._views.pop(key, None)
+        self._dirty.discard(key)
+
+    def mark_dirty(self, key):
+        if key in self._views:
+            self._dirty.add(key)
+
+    def start(self):
+        if not self._timer.isActive():
+            self._timer.start(self.interval_ms)
+
+    def stop(self):
+        self._timer.stop()
+
+    def is_active(self):
+        return self._timer.isActive()
+
+    def run_frame(self):
+        frame_start = time.perf_counter()
+        trace_start = tracing.now()
+
+        # Advance every view from the same frame tick
+        with tracing.span('advance', 'frame'):
+            for key, (advance, _) in self._views.items():
+                if advance():
+                    self._dirty.add(key)
+
+        # Pay back an earlier overrun by dropping this frame's redraw
+        if self._frames_to_skip > 0:
+            self._frames_to_skip -= 1
+            self.skipped_frames += 1
+            tracing.instant('frame skipped', 'frame')
+            return
+
+        # Merge all dirty views into one repaint pass
+        dirty = [key for key in self._views if key in self._dirty]
+        self._dirty.clear()
+        for key in dirty:
+            with tracing.span('render', 'frame', view=key, degraded=self.degraded):
+                self._views[key][1](self.degraded)
+
+        cost_ms = (time.perf_counter() - frame_start) * 1000.0
+        self.frame_times.append(cost_ms)
+        self._pace(cost_ms)
+        tracing.complete('frame', 'frame', trace_start, views=len(dirty))
+        self.frame_finished.emit(cost_ms)
+
+    def _pace(self, cost_ms):
+        if cost_ms > self.budget_ms:
+            self._frames_to_skip = min(int(cost_ms // self.budget_ms), self.MAX_SKIPPED_FRAMES)
+            self._overruns += 1
+            self._fast_frames = 0
+            if self._overruns >= self.OVERRUNS_BEFORE_DEGRADING:
+                self.degraded = True
+        else:
+            self._overruns = 0
+            if cost_ms < self.budget_ms * 0.5:
+                self._fast_frames += 1
+                if self._fast_frames >= self.FAST_FRAMES_BEFORE_RECOVERING:
+                    self.degraded = False
+                    self._fast_frames = 0
@@ -0,0 +1,304 @@
+import json
+import os
+import threading
+import time  # Wall-clock timing
+
+import numpy as np  # Numerical operations library
+
+from signal_format import ChannelList, SignalFile
+
+# Session recording layout (.vses), written append-only while the monitor runs:
+#   bytes 0-3   magic b"VSES"
+#   bytes 4-5   format version, little-endian uint16
+#   bytes 6-9   length of the JSON header, little-endian uint32
+#   JSON header (started, dtype, streams: [{name, sample_rate, units, file}])
+#   chunks, one after the other, each CHUNK_HEADER followed by `count`
+#   little-endian float32 samples of one stream, starting at sample index
+#   `first` of that stream
+# A sidecar index (<session>.idx) gets one INDEX_ENTRY per chunk as it is
+# written, so opening a recording of many hours reads the index only, and
+# finding the chunk holding any time is a binary search. Samples never
+# played (jumps ahead) are simply not in any chunk and read back as NaN.
+SESSION_EXTENSION = '.vses'
+INDEX_SUFFIX = '.idx'
+MAGIC = b'VSES'
+CHUNK_MAGIC = b'VCHK'
+FORMAT_VERSION = 1
+_PREAMBLE_SIZE = 10
+CHUNK_HEADER = np.dtype([('magic', 'S4'), ('stream', '<u2'), ('reserved', '<u2'), ('first', '<i8'), ('count', '<u4')])
+INDEX_ENTRY = np.dtype([('stream', '<u2'), ('reserved', '<u2'), ('count', '<u4'), ('first', '<i8'), ('offset', '<i8')])
+SAMPLE_DTYPE = np.dtype('<f4')
+
+CHUNK_SECONDS = 1.0  # Samples gathered per stream before a chunk is written
+FSYNC_SECONDS = 5.0  # Written chunks reach the disk at least this often
+
+
+class SessionRecorder:
+    # Writes the samples of a fixed set of streams (channels) as they are
+    # played or received. Samples are buffered per stream and written as a
+    # chunk once CHUNK_SECONDS have gathered; both files are only ever
+    # appended to, and are fsynced every FSYNC_SECONDS, so a crash loses at
+    # most the last few seconds and never corrupts what was written.
+    #
+    # append() runs in the frame loop, so it only ever makes buffered
+    # writes; flushing and fsyncing are left to a background thread it
+    # wakes when a sync is due, and a slow disk never stalls a frame. An
+    # error on that thread (disk full, I/O error) ends it and is raised by
+    # the next append().
+    def __init__(self, file_path, streams):
+        # streams: [{'name', 'sample_rate', 'units', 'file'}]
+        self.file_path = file_path
+        self.streams = [dict(stream) for stream in streams]
+        header = {'started': time.time(), 'dtype': SAMPLE_DTYPE.str, 'streams': self.streams}
+        header_bytes = json.dumps(header).encode('utf-8')
+        self._file = open(file_path, 'wb')
+        self._file.write(MAGIC)
+        self._file.write(np.uint16(FORMAT_VERSION).astype('<u2').tobytes())
+        self._file.write(np.uint32(len(header_bytes)).astype('<u4').tobytes())
+        self._file.write(header_bytes)
+        self._index = open(file_path + INDEX_SUFFIX, 'wb')
+        self._offset = self._file.tell()
+
+        self.next_index = [0] * len(self.streams)  # Per stream: sample index after the last one recorded
+        self._pending = [[] for _ in self.streams]  # Per stream: arrays waiting for the next chunk
+        self._pending_first = [0] * len(self.streams)
+        self._pending_count = [0] * len(self.streams)
+        self._chunk_size = [max(1, round(CHUNK_SECONDS * stream['sample_rate'])) for stream in self.streams]
+        self._last_sync = time.monotonic()
+        self.closed = False
+        self._sync_due = threading.Event()
+        self._stopping = False
+        self.error = None  # OSError of the sync thread, if it failed
+        self._syncer = threading.Thread(target=self._sync_loop, name='session sync', daemon=True)
+        self._syncer.start()
+
+    def append(self, stream, first, samples):
+        # Record samples of a stream starting at sample index `first`.
+        # Samples before the stream's next_index were recorded already and
+        # are dropped; a later `first` leaves a gap.
+        if self.error is not None:
+            raise self.error
+        samples = np.asarray(samples)
+        skip = self.next_index[stream] - first
+        if skip > 0:
+            samples, first = samples[skip:], first + skip
+        if not len(samples):
+            return
+        if self._pending_count[stream] and first != self._pending_first[stream] + self._pending_count[stream]:
+            self._write_chunk(stream)  # A gap ends the chunk
+        if not self._pending_count[stream]:
+            self._pending_first[stream] = first
+        self._pending[stream].append(samples.astype(SAMPLE_DTYPE))
+        self._pending_count[stream] += len(samples)
+        self.next_index[stream] = first + len(samples)
+        if self._pending_count[stream] >= self._chunk_size[stream]:
+            self._write_chunk(stream)
+            self._sync_if_due()
+
+    def _write_chunk(self, stream):
+        count = self._pending_count[stream]
+        if not count:
+            return
+        header = np.zeros(1, CHUNK_HEADER)
+        header[0] = (CHUNK_MAGIC, stream, 0, self._pending_first[stream], count)
+        self._file.write(header.tobytes())
+        for samples in self._pending[stream]:
+            self._file.write(samples.tobytes())
+        entry = np.zeros(1, INDEX_ENTRY)
+        entry[0] = (stream, 0, count, self._pending_first[stream], self._offset)
+        self._index.write(entry.tobytes())
+        self._offset += CHUNK_HEADER.itemsize + count * SAMPLE_DTYPE.itemsize
+        self._pending[stream] = []
+        self._pending_count[stream] = 0
+
+    def _sync_if_due(self):
+        if time.monotonic() - self._last_sync >= FSYNC_SECONDS:
+            self._last_sync = time.monotonic()
+            self._sync_due.set()
+
+    def _sync_loop(self):
+        while True:
+            self._sync_due.wait()
+            self._sync_due.clear()
+            if self._stopping:
+                return
+            try:
+                self.sync()
+            except OSError as error:
+                self.error = error
+                return
+
+    def sync(self):
+        # Index entries are synced after the chunks they point to. The
+        # buffered files take a lock per call, so this may run on the sync
+        # thread while the frame loop appends.
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._index.flush()
+        os.fsync(self._index.fileno())
+
+    def flush(self):
+        # Write every partial chunk now, and wait for them to reach the disk
+        for stream in range(len(self.streams)):
+            self._write_chunk(stream)
+        self.sync()
+
+    def close(self):
+        if self.closed:
+            return
+        self._stopping = True
+        self._sync_due.set()
+        self._syncer.join()
+        self.closed = True
+        try:
+            self.flush()
+        finally:
+            self._file.close()
+            self._index.close()
+
+
+def _read_preamble(file):
+    preamble = file.read(_PREAMBLE_SIZE)
+    if len(preamble) < _PREAMBLE_SIZE or preamble[:4] != MAGIC:
+        raise ValueError(f"{file.name} is not a {SESSION_EXTENSION} session recording.")
+    version = int(np.frombuffer(preamble[4:6], '<u2')[0])
+    if version > FORMAT_VERSION:
+        raise ValueError(f"{file.name} uses format version {version}, newer than this viewer supports.")
+    header_length = int(np.frombuffer(preamble[6:10], '<u4')[0])
+    return json.loads(file.read(header_length).decode('utf-8')), _PREAMBLE_SIZE + header_length
+
+
+def _scan_chunks(file, offset, size):
+    # Index entries of the chunks from `offset` on, read from their headers;
+    # for a missing or short index (e.g. after a crash). A chunk cut short
+    # by the crash is left out.
+    entries = []
+    while offset + CHUNK_HEADER.itemsize <= size:
+        file.seek(offset)
+        header = np.frombuffer(file.read(CHUNK_HEADER.itemsize), CHUNK_HEADER)[0]
+        end = offset + CHUNK_HEADER.itemsize + int(header['count']) * SAMPLE_DTYPE.itemsize
+        if header['magic'] != CHUNK_MAGIC or end > size:
+            break
+        entries.append((header['stream'], 0, header['count'], header['first'], offset))
+        offset = end
+    return np.array(entries, dtype=INDEX_ENTRY)
+
+
+class SessionChannel:
+    # One stream of a session, sliced like an array by absolute sample
+    # index. A slice reads only the chunks it overlaps, found by binary
+    # search in the stream's index; the last chunk read is kept, as
+    # playback reads the same chunk many frames in a row.
+    def __init__(self, session, stream, firsts, counts, offsets):
+        self.session = session
+        self.stream = stream
+        self._firsts = firsts
+        self._ends = firsts + counts
+        self._offsets = offsets
+        self._length = int(self._ends.max()) if len(self._ends) else 0
+        self._cached = (-1, None)  # (chunk number, samples)
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def dtype(self):
+        return SAMPLE_DTYPE
+
+    @property
+    def shape(self):
+        return (self._length,)
+
+    @property
+    def ndim(self):
+        return 1
+
+    def __array__(self, dtype=None, copy=None):
+        samples = self[0:self._length]
+        return samples if dtype is None else samples.astype(dtype)
+
+    def chunk_at(self, index):
+        # Number of the chunk holding sample `index` (or the last one before
+        # it, in a gap); O(log n) in the number of chunks
+        return int(np.searchsorted(self._firsts, index, side='right')) - 1
+
+    def _chunk(self, number):
+        if self._cached[0] != number:
+            count = int(self._ends[number] - self._firsts[number])
+            self._cached = (number, self.session.read_samples(int(self._offsets[number]) + CHUNK_HEADER.itemsize, count))
+        return self._cached[1]
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple) and len(key) == 2 and key[0] is Ellipsis:
+            key = key[1]  # values[..., a:b] as for a 1-D array
+        if not isinstance(key, slice):
+            raise TypeError("SessionChannel only supports slicing.")
+        start, stop, step = key.indices(self._length)
+        stop = max(stop, start)
+        samples = np.full(stop - start, np.nan, dtype=SAMPLE_DTYPE)
+        first_chunk = max(0, self.chunk_at(start))
+        last_chunk = int(np.searchsorted(self._firsts, stop, side='left'))
+        for number in range(first_chunk, last_chunk):
+            chunk_start, chunk_end = int(self._firsts[number]), int(self._ends[number])
+            low, high = max(start, chunk_start), min(stop, chunk_end)
+            if low < high:
+                samples[low - start:high - start] = self._chunk(number)[low - chunk_start:high - chunk_start]
+        return samples[::step] if step != 1 else samples
+
+
+class SessionFile(SignalFile):
+    # A recorded session opened for viewing. Opening reads the header and
+    # the index; samples are read chunk by chunk as they are sliced.
+    def __init__(self, file_path):
+        self._file = open(file_path, 'rb')
+        self.header, data_offset = _read_preamble(self._file)
+        size = os.fstat(self._file.fileno()).st_size
+        index_path = file_path + INDEX_SUFFIX
+        entries = np.fromfile(index_path, dtype=INDEX_ENTRY) if os.path.exists(index_path) else np.zeros(0, INDEX_ENTRY)
+        # Entries whose chunk is not (fully) on disk, then chunks the index missed
+        entries = entries[entries['offset'] + CHUNK_HEADER.itemsize + entries['count'] * SAMPLE_DTYPE.itemsize <= size]
+        scan_from = data_offset
+        if len(entries):
+            last = entries[-1]
+            scan_from = int(last['offset']) + CHUNK_HEADER.itemsize + int(last['count']) * SAMPLE_DTYPE.itemsize
+        entries = np.concatenate((entries, _scan_chunks(self._file, scan_from, size)))
+
+        streams = self.header['streams']
+        channels = []
+        for stream in range(len(streams)):
+            selected = entries[entries['stream'] == stream]
+            selected = selected[np.argsort(selected['first'], kind='stable')]
+            channels.append(SessionChannel(self, stream, selected['first'].astype(np.int64),
+                                           selected['count'].astype(np.int64), selected['offset'].astype(np.int64)))
+        self.sample_rates = [float(stream['sample_rate']) for stream in streams]
+        super().__init__(ChannelList(channels), self.sample_rates[0] if streams else 1.0,
+                         [stream['name'] for stream in streams], [stream.get('units', '') for stream in streams],
+                         file_path)
+
+    @property
+    def started(self):
+        # Wall-clock time (seconds since the epoch) of sample 0
+        return self.header['started']
+
+    def channel_rate(self, index):
+        return self.sample_rates[index]
+
+    def read_samples(self, offset, count):
+        self._file.seek(offset)
+        return np.frombuffer(self._file.read(count * SAMPLE_DTYPE.itemsize), SAMPLE_DTYPE)
+
+    def seek(self, seconds):
+        # Sample index and chunk number of every stream at a time since the
+        # start of the session; a binary search per stream
+        positions = []
+        for channel, sample_rate in zip(self.data, self.sample_rates):
+            index = int(round(seconds * sample_rate))
+            positions.append((index, channel.chunk_at(index)))
+        return positions
+
+    def close(self):
+        self._file.close()
+
+
+def open_session(file_path):
+    return SessionFile(file_path)
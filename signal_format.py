@@ -0,0 +1,302 @@
+import json
+import pickle
+from os import path  # Functions to manipulate file paths
+
+import numpy as np  # Numerical operations library
+
+from playback import DEFAULT_SAMPLE_RATE
+
+# Native signal file layout (.vsig):
+#   bytes 0-3   magic b"VSIG"
+#   bytes 4-5   format version, little-endian uint16
+#   bytes 6-9   length of the JSON header, little-endian uint32
+#   JSON header (sample_rate, dtype, samples, channels, channel_names, units)
+#   zero padding up to DATA_ALIGNMENT
+#   raw samples, channels x samples, C order
+# Keeping the samples page aligned and uncompressed lets the file be
+# memory-mapped, so opening is instant and only the pages viewed are read.
+#
+# Version 2 lets each channel have its own storage dtype
+# (header channel_dtypes) and stores integer channels scaled, as
+# acquisition hardware does: value = raw * scale + offset (header scales
+# and offsets, null for unscaled channels). Each channel's samples still
+# follow the previous channel's. Files with one unscaled dtype are written
+# as version 1.
+#
+# Version 3 reserves the smallest value of a scaled channel's integer dtype
+# for NaN samples (gaps); files with scaled channels are written as
+# version 3, and in older ones that value is an ordinary sample.
+NATIVE_EXTENSION = '.vsig'
+LEGACY_EXTENSION = '.pkl'
+ARCHIVE_EXTENSION = '.vsz'  # Chunk-compressed, see archive.py
+MAGIC = b'VSIG'
+FORMAT_VERSION = 3
+DATA_ALIGNMENT = 4096
+_PREAMBLE_SIZE = 10
+
+SIGNAL_FILE_FILTER = "Signal Files (*.vsig *.vsz *.vses *.pkl);;All Files (*)"
+STORAGE_DTYPES = ('float64', 'float32', 'int16')  # Offered by the command-line tools
+
+
+class ScaledChannel:
+    # An integer channel read as physical values: slices are widened to
+    # float32 (exact for 16-bit samples) only when read, so the samples
+    # stay compact in memory and on disk. Raw samples equal to `nan_raw`
+    # (see quantise()) read as NaN
+    def __init__(self, raw, scale, offset, nan_raw=None):
+        self.raw = raw
+        self.scale = np.float32(scale)
+        self.offset = np.float32(offset)
+        self.nan_raw = nan_raw
+
+    def __len__(self):
+        return len(self.raw)
+
+    @property
+    def dtype(self):
+        return np.dtype(np.float32)
+
+    @property
+    def shape(self):
+        return self.raw.shape
+
+    @property
+    def ndim(self):
+        return 1
+
+    def __array__(self, dtype=None, copy=None):
+        values = self[:]
+        return values if dtype is None else values.astype(dtype)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple) and len(key) == 2 and key[0] is Ellipsis:
+            key = key[1]  # values[..., a:b] as for a 1-D array
+        raw = np.asarray(self.raw[key])
+        values = raw.astype(np.float32)
+        values *= self.scale
+        values += self.offset
+        if self.nan_raw is not None:
+            values[raw == self.nan_raw] = np.nan
+        return values
+
+
+class ChannelList:
+    # Channels of a recording that are not one array (different dtypes,
+    # scaled or chunked storage), with just enough of a channels x samples
+    # array for SignalFile and the viewer: shape, dtype and one row per index
+    def __init__(self, channels):
+        self._channels = list(channels)
+
+    def __len__(self):
+        return len(self._channels)
+
+    def __getitem__(self, index):
+        return self._channels[index]
+
+    @property
+    def ndim(self):
+        return 2
+
+    @property
+    def shape(self):
+        return (len(self._channels), max((len(channel) for channel in self._channels), default=0))
+
+    @property
+    def dtype(self):
+        return np.result_type(*[channel.dtype for channel in self._channels]) if self._channels else np.dtype(np.float64)
+
+
+def quantise(values, dtype):
+    # (raw, scale, offset) storing `values` in an integer dtype. Finite
+    # values span [min + 1, max]; the dtype's minimum is kept for NaN
+    info = np.iinfo(dtype)
+    low_raw = int(info.min) + 1
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values)
+    low, high = (float(values[finite].min()), float(values[finite].max())) if finite.any() else (0.0, 0.0)
+    scale = (high - low) / (int(info.max) - low_raw) if high > low else 1.0
+    offset = low - low_raw * scale
+    raw = np.clip(np.rint((np.where(np.isnan(values), low, values) - offset) / scale), low_raw, info.max).astype(dtype)
+    raw[np.isnan(values)] = info.min
+    return raw, scale, offset
+
+
+def nan_raw(dtype):
+    # Raw value quantise() stores NaN samples as
+    return int(np.iinfo(dtype).min)
+
+
+def compact(data, dtype):
+    # In-memory channels x samples data in a storage dtype: floats are cast,
+    # integer dtypes are quantised per channel
+    dtype = np.dtype(dtype)
+    if not np.issubdtype(dtype, np.integer):
+        return np.asarray(data, dtype=dtype)
+    return ChannelList(ScaledChannel(*quantise(channel, dtype), nan_raw(dtype)) for channel in data)
+
+
+class SignalFile:
+    # A recording: `data` is a channels x samples array (a read-only memory
+    # map for native files) plus the metadata needed to display it
+    def __init__(self, data, sample_rate, channel_names=None, units=None, file_path=None):
+        self.data = data
+        self.sample_rate = float(sample_rate)
+        self.channel_names = list(channel_names) if channel_names else [f"Channel {i + 1}" for i in range(len(data))]
+        self.units = list(units) if units else [''] * len(data)
+        self.file_path = file_path
+
+    @property
+    def channels(self):
+        return self.data.shape[0]
+
+    @property
+    def samples(self):
+        return self.data.shape[1]
+
+    def channel(self, index):
+        return self.data[index]
+
+    def channel_rate(self, index):
+        # Sample rate of one channel (recorded sessions may mix rates)
+        return self.sample_rate
+
+
+def write_signal(file_path, data, sample_rate, channel_names=None, units=None, dtype=None):
+    # Write a channels x samples array (a 1-D array is one channel). `dtype`
+    # is the storage dtype of every channel or a list with one per channel
+    # (default: the data's); integer dtypes are stored scaled, see quantise()
+    if not isinstance(data, ChannelList):
+        data = np.asarray(data)
+        if data.ndim == 1:
+            data = data[np.newaxis, :]
+    if data.ndim != 2:
+        raise ValueError("Signal data must be one- or two-dimensional.")
+    channels, samples = data.shape
+    dtypes = list(dtype) if isinstance(dtype, (list, tuple)) else [dtype] * channels
+    if len(dtypes) != channels:
+        raise ValueError(f"Expected {channels} storage dtypes, got {len(dtypes)}.")
+    dtypes = [np.dtype(channel_dtype or data[i].dtype).newbyteorder('<') for i, channel_dtype in enumerate(dtypes)]
+    scaled = [np.issubdtype(channel_dtype, np.integer) for channel_dtype in dtypes]
+
+    header = {
+        'sample_rate': float(sample_rate),
+        'dtype': dtypes[0].str,
+        'samples': samples,
+        'channels': channels,
+        'channel_names': list(channel_names) if channel_names else [f"Channel {i + 1}" for i in range(channels)],
+        'units': list(units) if units else [''] * channels,
+    }
+    version = 1
+    quantised = {}
+    if any(scaled) or len(set(dtypes)) > 1:
+        version = 3 if any(scaled) else 2
+        header['channel_dtypes'] = [channel_dtype.str for channel_dtype in dtypes]
+        header['scales'] = [None] * channels
+        header['offsets'] = [None] * channels
+        # The scale of each integer channel is known only from its values
+        for i in np.flatnonzero(scaled).tolist():
+            raw, header['scales'][i], header['offsets'][i] = quantise(data[i], dtypes[i])
+            quantised[i] = raw
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_offset = -(-(_PREAMBLE_SIZE + len(header_bytes)) // DATA_ALIGNMENT) * DATA_ALIGNMENT
+
+    with open(file_path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(np.uint16(version).astype('<u2').tobytes())
+        file.write(np.uint32(len(header_bytes)).astype('<u4').tobytes())
+        file.write(header_bytes)
+        file.write(b'\0' * (data_offset - _PREAMBLE_SIZE - len(header_bytes)))
+        # Write channel by channel so large inputs are never duplicated in memory
+        for i in range(channels):
+            channel = quantised.pop(i) if scaled[i] else data[i]
+            file.write(np.ascontiguousarray(channel, dtype=dtypes[i]).tobytes())
+
+
+def read_header(file_path):
+    # Returns (header dict, offset of the sample data, format version)
+    with open(file_path, 'rb') as file:
+        preamble = file.read(_PREAMBLE_SIZE)
+        if len(preamble) < _PREAMBLE_SIZE or preamble[:4] != MAGIC:
+            raise ValueError(f"{file_path} is not a {NATIVE_EXTENSION} signal file.")
+        version = int(np.frombuffer(preamble[4:6], '<u2')[0])
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{file_path} uses format version {version}, newer than this viewer supports.")
+        header_length = int(np.frombuffer(preamble[6:10], '<u4')[0])
+        header = json.loads(file.read(header_length).decode('utf-8'))
+    data_offset = -(-(_PREAMBLE_SIZE + header_length) // DATA_ALIGNMENT) * DATA_ALIGNMENT
+    return header, data_offset, version
+
+
+def open_native(file_path):
+    header, data_offset, version = read_header(file_path)
+    channels, samples = header['channels'], header['samples']
+    dtypes = [np.dtype(channel_dtype) for channel_dtype in header.get('channel_dtypes', [header['dtype']] * channels)]
+    scales = header.get('scales', [None] * channels)
+    if len(set(dtypes)) == 1 and not any(scale is not None for scale in scales):
+        data = np.memmap(file_path, dtype=dtypes[0], mode='r', offset=data_offset, shape=(channels, samples))
+    else:
+        # One map per channel, each channel's samples following the last's
+        rows = []
+        for channel_dtype, scale, offset in zip(dtypes, scales, header['offsets']):
+            raw = np.memmap(file_path, dtype=channel_dtype, mode='r', offset=data_offset, shape=(samples,))
+            rows.append(raw if scale is None else
+                        ScaledChannel(raw, scale, offset, nan_raw(channel_dtype) if version >= 3 else None))
+            data_offset += samples * channel_dtype.itemsize
+        data = ChannelList(rows)
+    return SignalFile(data, header['sample_rate'], header.get('channel_names'), header.get('units'), file_path)
+
+
+def open_legacy(file_path, sample_rate=DEFAULT_SAMPLE_RATE, dtype=None):
+    # Pickled ndarray from the original dataset, held in memory in `dtype`
+    # if given (see compact()). Unpickling can run code, so only use it on
+    # trusted files and prefer converting them to .vsig
+    with open(file_path, 'rb') as file:
+        data = np.asarray(pickle.load(file))
+    if data.ndim == 1:
+        data = data[np.newaxis, :]
+    if dtype is not None and np.dtype(dtype) != data.dtype:
+        data = compact(data, dtype)
+    return SignalFile(data, sample_rate, file_path=file_path)
+
+
+def validate_signal(signal_file):
+    # Reject recordings the viewer cannot draw; checks shape and type only,
+    # so memory-mapped samples are not read
+    data = signal_file.data
+    if data.ndim != 2:
+        raise ValueError(f"{signal_file.file_path}: expected channels x samples, got {data.ndim} dimensions.")
+    if not np.issubdtype(data.dtype, np.number) or np.issubdtype(data.dtype, np.complexfloating):
+        raise ValueError(f"{signal_file.file_path}: samples must be real numbers, not {data.dtype}.")
+    if data.shape[0] == 0 or data.shape[1] == 0:
+        raise ValueError(f"{signal_file.file_path}: the recording is empty.")
+    if not signal_file.sample_rate > 0:
+        raise ValueError(f"{signal_file.file_path}: invalid sample rate {signal_file.sample_rate}.")
+    return signal_file
+
+
+def open_signal(file_path, dtype=None):
+    # Open any supported signal file. Files read into memory are held in
+    # `dtype` if given; mapped files keep the dtype they were written in
+    if file_path.endswith(LEGACY_EXTENSION):
+        return open_legacy(file_path, dtype=dtype)
+    if file_path.endswith('.vses'):
+        from session import open_session  # session.py builds on this module
+        return open_session(file_path)
+    if file_path.endswith(ARCHIVE_EXTENSION):
+        from archive import open_archive  # So does archive.py
+        return open_archive(file_path)
+    return open_native(file_path)
+
+
+def convert_file(source_path, target_path=None, sample_rate=DEFAULT_SAMPLE_RATE, dtype=None, codec=None):
+    # Convert a legacy .pkl recording to the native format next to it, or
+    # to a compressed archive when a codec ('zlib' or 'lzma') is given
+    extension = ARCHIVE_EXTENSION if codec else NATIVE_EXTENSION
+    target_path = target_path or path.splitext(source_path)[0] + extension
+    signal = open_legacy(source_path, sample_rate)
+    if codec:
+        from archive import write_archive
+        write_archive(target_path, signal.data, signal.sample_rate, signal.channel_names, signal.units, dtype, codec)
+    else:
+        write_signal(target_path, signal.data, signal.sample_rate, signal.channel_names, signal.units, dtype)
+    return target_path
@@ -0,0 +1,196 @@
+import os
+from os import path  # Functions to manipulate file paths
+
+import numpy as np  # Numerical operations library
+
+from buffers import GrowableArray
+from signal_format import ScaledChannel, open_signal
+
+
+class RunningStats:
+    # Running count, mean, variance (Welford) and min/max. Whole chunks are
+    # merged at once with the parallel form of Welford's update, so feeding
+    # NumPy blocks is as stable as feeding single samples and much faster.
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0  # Sum of squared differences from the mean
+        self.min = float('inf')
+        self.max = float('-inf')
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        count = len(values)
+        if count == 0:
+            return
+        chunk_mean = float(values.mean())
+        chunk_m2 = float(np.square(values - chunk_mean).sum())
+
+        total = self.count + count
+        delta = chunk_mean - self.mean
+        self.mean += delta * count / total
+        self._m2 += chunk_m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def rescale(self, scale, offset):
+        # Statistics of values * scale + offset (scale > 0), e.g. of a scaled
+        # integer channel summarised in its raw units
+        self.mean = self.mean * scale + offset
+        self._m2 *= scale * scale
+        if self.count:
+            self.min = self.min * scale + offset
+            self.max = self.max * scale + offset
+
+    @property
+    def variance(self):
+        # Sample variance, matching pandas' default
+        return self._m2 / (self.count - 1) if self.count > 1 else float('nan')
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.variance))
+
+    def as_dict(self):
+        return {
+            'Mean': self.mean,
+            'Standard Deviation': self.std,
+            'Duration': self.count,
+            'Min Value': self.min,
+            'Max Value': self.max
+        }
+
+
+class ChannelStatistics:
+    # Statistics of one loaded channel, extended as its samples are played.
+    # Besides the running totals it keeps cumulative sums at every BLOCK_SIZE
+    # boundary, so the mean and deviation of any range cost O(1) plus at most
+    # two partial blocks, and memory stays at 2 floats per block.
+    BLOCK_SIZE = 256
+
+    def __init__(self):
+        self.running = RunningStats()
+        self._shift = None  # Subtracted before summing to limit cancellation
+        self._sums = GrowableArray(np.float64)
+        self._squares = GrowableArray(np.float64)
+        self._sums.extend([0.0])
+        self._squares.extend([0.0])
+        self._pending = np.empty(0)
+
+    @property
+    def count(self):
+        return self.running.count
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        self.running.update(values)
+        if self._shift is None:
+            self._shift = float(values[0])
+
+        values = np.concatenate((self._pending, values))
+        complete = len(values) - len(values) % self.BLOCK_SIZE
+        self._pending = values[complete:]
+        if complete:
+            blocks = values[:complete].reshape(-1, self.BLOCK_SIZE) - self._shift
+            last_sum = self._sums.view()[-1]
+            last_square = self._squares.view()[-1]
+            self._sums.extend(last_sum + np.cumsum(blocks.sum(axis=1)))
+            self._squares.extend(last_square + np.cumsum(np.square(blocks).sum(axis=1)))
+
+    def range_statistics(self, data, start, stop, pyramid=None):
+        # Statistics of data[start:stop]; only the played part can be asked for.
+        # Min/max come from the level-of-detail pyramid when one is given
+        stop = min(stop, self.count)
+        count = stop - start
+        if count <= 0:
+            return None
+
+        first_block = -(-start // self.BLOCK_SIZE)
+        last_block = stop // self.BLOCK_SIZE
+        if first_block >= last_block:
+            segment = np.asarray(data[start:stop], dtype=np.float64) - self._shift
+            total, squares = float(segment.sum()), float(np.square(segment).sum())
+        else:
+            sums, square_sums = self._sums.view(), self._squares.view()
+            head = np.asarray(data[start:first_block * self.BLOCK_SIZE], dtype=np.float64) - self._shift
+            tail = np.asarray(data[last_block * self.BLOCK_SIZE:stop], dtype=np.float64) - self._shift
+            total = sums[last_block] - sums[first_block] + head.sum() + tail.sum()
+            squares = square_sums[last_block] - square_sums[first_block] + np.square(head).sum() + np.square(tail).sum()
+
+        mean = total / count
+        variance = max(squares - total * mean, 0.0) / (count - 1) if count > 1 else float('nan')
+        if pyramid is not None and pyramid.count >= stop:
+            min_value, max_value = pyramid.extent(data, start, stop)
+        else:
+            min_value, max_value = float(np.min(data[start:stop])), float(np.max(data[start:stop]))
+
+        return {
+            'Mean': mean + self._shift,
+            'Standard Deviation': float(np.sqrt(variance)),
+            'Duration': count,
+            'Min Value': min_value,
+            'Max Value': max_value
+        }
+
+
+class StatisticsEngine:
+    # Whole-file statistics for reports, cached by file identity and
+    # modification time so repeated exports do not touch the data again
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self):
+        self._cache = {}
+
+    def file_statistics(self, file_path):
+        # {channel index: statistics} for every channel of the file
+        status = os.stat(file_path)
+        key = path.realpath(file_path)
+        identity = (status.st_mtime_ns, status.st_size)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == identity:
+            return cached[1]
+
+        signal = open_signal(file_path)
+        statistics = {}
+        for index in range(signal.channels):
+            channel = signal.channel(index)
+            # Scaled integer channels are summarised in raw units, so their
+            # samples are widened once rather than twice
+            raw = channel.raw if isinstance(channel, ScaledChannel) else channel
+            running = RunningStats()
+            for start in range(0, len(raw), self.CHUNK_SIZE):
+                values = raw[start:start + self.CHUNK_SIZE]
+                if raw is not channel and channel.nan_raw is not None:
+                    values = np.where(values == channel.nan_raw, np.nan, values)
+                running.update(values)
+            if raw is not channel:
+                running.rescale(float(channel.scale), float(channel.offset))
+            statistics[index] = running.as_dict()
+
+        self._cache[key] = (identity, statistics)
+        return statistics
+
+    def cached(self, file_path):
+        # Statistics already known for the file's current version, or None;
+        # never reads the samples
+        status = os.stat(file_path)
+        cached = self._cache.get(path.realpath(file_path))
+        if cached is not None and cached[0] == (status.st_mtime_ns, status.st_size):
+            return cached[1]
+        return None
+
+    def export_cache(self):
+        return dict(self._cache)
+
+    def merge(self, entries):
+        # Adopt results computed elsewhere (e.g. by a report worker process)
+        self._cache.update(entries)
+
+    def invalidate(self, file_path=None):
+        if file_path is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(path.realpath(file_path), None)
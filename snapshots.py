@@ -0,0 +1,45 @@
+from collections import deque
+
+from PyQt6.QtCore import QBuffer, QIODevice
+
+SNAPSHOT_DPI = 200  # Resolution of report snapshots
+SNAPSHOT_WIDTH_INCHES = 6.0  # Width the snapshots are printed at in the report
+MAX_SNAPSHOTS_PER_GRAPH = 24
+
+
+def render_snapshot(plot_item, dpi=SNAPSHOT_DPI, width_inches=SNAPSHOT_WIDTH_INCHES):
+    # Render a plot offscreen straight from its scene, at print resolution
+    # rather than at whatever size the window happens to be, and return
+    # the image as PNG bytes
+    import pyqtgraph.exporters  # Loaded on the first snapshot rather than at startup
+    exporter = pyqtgraph.exporters.ImageExporter(plot_item)
+    exporter.parameters()['width'] = int(round(dpi * width_inches))  # Height follows the plot's aspect
+    image = exporter.export(toBytes=True)
+
+    buffer = QBuffer()
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buffer, 'PNG')
+    return bytes(buffer.data())
+
+
+class SnapshotStore:
+    # Report snapshots kept in memory as PNG bytes, per graph. Each graph
+    # holds at most `limit` snapshots; taking another drops the oldest.
+    def __init__(self, limit=MAX_SNAPSHOTS_PER_GRAPH):
+        self.limit = limit
+        self._snapshots = {}
+
+    def add(self, key, png_bytes):
+        self._snapshots.setdefault(key, deque(maxlen=self.limit)).append(png_bytes)
+
+    def images(self, key):
+        return list(self._snapshots.get(key, ()))
+
+    def clear(self, key=None):
+        if key is None:
+            self._snapshots.clear()
+        else:
+            self._snapshots.pop(key, None)
+
+    def __len__(self):
+        return sum(len(snapshots) for snapshots in self._snapshots.values())
@@ -0,0 +1,338 @@
+import os
+import select
+import socket
+import threading
+import time  # Wall-clock timing
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np  # Numerical operations library
+
+from buffers import RingBuffer
+from playback import DEFAULT_SAMPLE_RATE
+
+
+class SpscRingBuffer:
+    # Single-producer/single-consumer ring of samples. The I/O thread only
+    # moves the write counter and the GUI thread only moves the read counter,
+    # so neither side ever takes a lock or waits for the other. When the
+    # consumer falls behind, incoming samples are dropped (and counted)
+    # instead of overwriting data the consumer may be copying.
+    def __init__(self, capacity, dtype=np.float32):
+        self.capacity = max(1, int(capacity))
+        self._data = np.zeros(self.capacity, dtype=dtype)
+        self._written = 0  # Total samples published; producer only
+        self._read = 0  # Total samples consumed; consumer only
+        self.dropped = 0  # Producer only
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    def available(self):
+        return self._written - self._read
+
+    def free(self):
+        # Producer side; room left before push() has to drop samples
+        return self.capacity - (self._written - self._read)
+
+    def push(self, values):
+        # Producer side; never blocks
+        free = self.free()
+        if len(values) > free:
+            self.dropped += len(values) - free
+            values = values[:free]
+        count = len(values)
+        if count == 0:
+            return
+
+        start = self._written % self.capacity
+        first = min(count, self.capacity - start)
+        self._data[start:start + first] = values[:first]
+        self._data[:count - first] = values[first:]
+        # Publish only once the samples are in place
+        self._written += count
+
+    def pop(self, max_count=None):
+        # Consumer side; returns a copy of the samples available right now
+        count = self._written - self._read
+        if max_count is not None:
+            count = min(count, max_count)
+        start = self._read % self.capacity
+        first = min(count, self.capacity - start)
+        values = np.concatenate((self._data[start:start + first], self._data[:count - first]))
+        self._read += count
+        return values
+
+
+class StreamSource:
+    # Base class for live feeds. Frames of interleaved samples (one per
+    # channel, `dtype` on the wire) are read on a dedicated I/O thread and
+    # fanned out into one fixed-capacity SpscRingBuffer per channel, so a
+    # burst on the wire can never stall the render thread and memory stays
+    # bounded however long the session runs.
+    message_oriented = False  # Datagram sources deliver whole frames per read
+    reconnect_delay = 1.0  # Seconds to wait before reopening a failed feed
+
+    def __init__(self, channels=1, sample_rate=DEFAULT_SAMPLE_RATE, dtype='<f4', channel_names=None, buffer_seconds=30.0):
+        self.channels = int(channels)
+        self.sample_rate = float(sample_rate)
+        self.wire_dtype = np.dtype(dtype)
+        self.channel_names = list(channel_names) if channel_names else [f"{self.describe()} #{i + 1}" for i in range(self.channels)]
+        capacity = int(buffer_seconds * self.sample_rate)
+        self.buffers = [SpscRingBuffer(capacity, self.wire_dtype.newbyteorder('=')) for _ in range(self.channels)]
+        self.error = None  # Last I/O error, for display
+        self._remainder = b''
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def describe(self):
+        return type(self).__name__
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"ingest-{self.describe()}", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self._open()
+                self.error = None
+                while not self._stop_event.is_set():
+                    chunk = self._read()
+                    if chunk is None:
+                        break  # End of stream; reopen
+                    if chunk:
+                        self._ingest(chunk)
+            except OSError as error:
+                self.error = error
+                self._stop_event.wait(self.reconnect_delay)
+            finally:
+                self._close()
+                self._remainder = b''
+
+    def _ingest(self, chunk):
+        data = self._remainder + chunk
+        frame_size = self.wire_dtype.itemsize * self.channels
+        usable = len(data) - len(data) % frame_size
+        self._remainder = b'' if self.message_oriented else data[usable:]
+        if usable == 0:
+            return
+        frames = np.frombuffer(data[:usable], dtype=self.wire_dtype).reshape(-1, self.channels)
+        # Drop whole frames so the channels stay aligned sample for sample:
+        # keep only what fits in the fullest ring
+        free = min(buffer.free() for buffer in self.buffers)
+        if len(frames) > free:
+            for buffer in self.buffers:
+                buffer.dropped += len(frames) - free
+            frames = frames[:free]
+        for channel, buffer in enumerate(self.buffers):
+            buffer.push(frames[:, channel])
+
+    # Subclasses implement these. _read returns bytes (possibly empty when
+    # nothing arrived before its timeout) or None at end of stream
+    def _open(self):
+        raise NotImplementedError
+
+    def _read(self):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+
+class TcpSource(StreamSource):
+    # Connects to a device or gateway that streams frames over TCP
+    def __init__(self, host, port, **options):
+        self.host, self.port = host, int(port)
+        self._socket = None
+        super().__init__(**options)
+
+    def describe(self):
+        return f"tcp://{self.host}:{self.port}"
+
+    def _open(self):
+        self._socket = socket.create_connection((self.host, self.port), timeout=self.reconnect_delay)
+        self._socket.settimeout(0.25)
+
+    def _read(self):
+        try:
+            chunk = self._socket.recv(65536)
+        except socket.timeout:
+            return b''
+        return chunk or None
+
+    def _close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+class UdpSource(StreamSource):
+    # Listens for datagrams, each carrying one or more whole frames
+    message_oriented = True
+
+    def __init__(self, host, port, **options):
+        self.host, self.port = host, int(port)
+        self._socket = None
+        super().__init__(**options)
+
+    def describe(self):
+        return f"udp://{self.host}:{self.port}"
+
+    def _open(self):
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        self._socket.bind((self.host, self.port))
+        self._socket.settimeout(0.25)
+
+    def _read(self):
+        try:
+            return self._socket.recv(65536)
+        except socket.timeout:
+            return b''
+
+    def _close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+class PipeSource(StreamSource):
+    # Reads from a named pipe (FIFO), which is created if missing. Writers
+    # may come and go; the pipe stays open between them
+    def __init__(self, pipe_path, **options):
+        self.pipe_path = pipe_path
+        self._fd = None
+        super().__init__(**options)
+
+    def describe(self):
+        return f"pipe://{self.pipe_path}"
+
+    def _open(self):
+        if not os.path.exists(self.pipe_path):
+            os.mkfifo(self.pipe_path)
+        self._fd = os.open(self.pipe_path, os.O_RDONLY | os.O_NONBLOCK)
+
+    def _read(self):
+        readable, _, _ = select.select([self._fd], [], [], 0.25)
+        if not readable:
+            return b''
+        chunk = os.read(self._fd, 65536)
+        if not chunk:
+            # No writer attached right now; wait instead of spinning
+            self._stop_event.wait(0.1)
+        return chunk
+
+    def _close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class FileTailSource(StreamSource):
+    # Follows a raw frame file that another process keeps appending to
+    poll_interval = 0.05
+
+    def __init__(self, file_path, from_start=False, **options):
+        self.file_path = file_path
+        self.from_start = from_start
+        self._file = None
+        super().__init__(**options)
+
+    def describe(self):
+        return f"file://{self.file_path}"
+
+    def _open(self):
+        self._file = open(self.file_path, 'rb')
+        if not self.from_start:
+            # Start on a frame boundary at the current end of the file
+            frame_size = self.wire_dtype.itemsize * self.channels
+            end = os.fstat(self._file.fileno()).st_size
+            self._file.seek(end - end % frame_size)
+
+    def _read(self):
+        chunk = self._file.read(65536)
+        if chunk:
+            return chunk
+        if os.fstat(self._file.fileno()).st_size < self._file.tell():
+            return None  # Truncated or rotated; reopen from the top
+        time.sleep(self.poll_interval)
+        return b''
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def open_source(url, **options):
+    # Create a source from a URL such as tcp://10.0.0.5:5000?channels=3&rate=500,
+    # udp://0.0.0.0:5001, pipe:///tmp/ecg.fifo or file:///data/feed.raw
+    parsed = urlparse(url)
+    query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+    if 'channels' in query:
+        options.setdefault('channels', int(query['channels']))
+    if 'rate' in query:
+        options.setdefault('sample_rate', float(query['rate']))
+    if 'dtype' in query:
+        options.setdefault('dtype', query['dtype'])
+
+    if parsed.scheme == 'tcp':
+        return TcpSource(parsed.hostname, parsed.port, **options)
+    if parsed.scheme == 'udp':
+        return UdpSource(parsed.hostname or '0.0.0.0', parsed.port, **options)
+    if parsed.scheme == 'pipe':
+        return PipeSource(parsed.path, **options)
+    if parsed.scheme == 'file':
+        return FileTailSource(parsed.path, from_start=query.get('from_start') == '1', **options)
+    raise ValueError(f"Unsupported source URL: {url}")
+
+
+class LiveSignal:
+    # Bounded history of one live channel, addressed by absolute sample index
+    # so it can be drawn by the same code as a loaded recording. poll() is
+    # called from the GUI thread and drains the channel's SpscRingBuffer.
+    def __init__(self, buffer, sample_rate, history_seconds=600.0):
+        self.buffer = buffer
+        self.sample_rate = sample_rate
+        self.history = RingBuffer(int(history_seconds * sample_rate), buffer.dtype)
+
+    def poll(self):
+        values = self.buffer.pop()
+        self.history.extend(values)
+        return len(values)
+
+    def pending(self):
+        # Samples received but not yet drained by poll()
+        return self.buffer.available()
+
+    def __len__(self):
+        return self.history.total_written
+
+    @property
+    def dtype(self):
+        return self.history.dtype
+
+    @property
+    def first_index(self):
+        # Oldest sample still held; anything before it has been discarded
+        return self.history.total_written - len(self.history)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError("LiveSignal only supports slicing.")
+        start, stop, _ = key.indices(len(self))
+        first = self.first_index
+        start = max(start, first)
+        stop = max(stop, start)
+        return self.history.view()[start - first:stop - first]
@@ -0,0 +1,151 @@
+import numpy as np  # Numerical operations library
+import pyqtgraph as pg
+from PyQt6.QtCore import QRectF
+
+import tracing
+from buffers import RingBuffer
+
+FFT_SECONDS = 2.0  # Length of each FFT frame
+HOP_SECONDS = 0.25  # New column every this much signal
+HISTORY_SECONDS = 60.0  # Columns kept in the rolling image
+MAX_FREQUENCY = 40.0  # Hz shown; EEG content of interest is below this
+DYNAMIC_RANGE_DB = 50.0  # Colour scale spans this far below the loudest bin seen
+BANDS = (('Delta', 0.5, 4.0, 'c'), ('Theta', 4.0, 8.0, 'g'), ('Alpha', 8.0, 13.0, 'y'), ('Beta', 13.0, 30.0, 'm'))
+
+
+class Spectrogram:
+    # Short-time Fourier transform of a channel computed as it plays. Only
+    # the FFT frames completed by the newly arrived samples are transformed,
+    # all of them in one rfft call, and each becomes a column of a rolling
+    # image (frequency x time) kept in a ring buffer, together with the
+    # relative power of the EEG bands. Less than one frame of input is
+    # carried over between calls.
+    def __init__(self, sample_rate, fft_seconds=FFT_SECONDS, hop_seconds=HOP_SECONDS, history_seconds=HISTORY_SECONDS):
+        self.sample_rate = float(sample_rate)
+        self.size = max(2, round(fft_seconds * sample_rate))
+        self.hop = max(1, round(hop_seconds * sample_rate))
+        self.window = np.hanning(self.size)
+        frequencies = np.fft.rfftfreq(self.size, 1.0 / self.sample_rate)
+        self.bins = int(np.searchsorted(frequencies, min(MAX_FREQUENCY, self.sample_rate / 2), side='right'))
+        self.frequencies = frequencies[:self.bins]
+        # Power of a one-sided spectrum, as a density per Hz
+        self.scale = np.full(self.bins, 2.0 / (self.sample_rate * np.sum(self.window ** 2)))
+        self.scale[0] /= 2.0
+        # Rows of this matrix sum the bins of each band
+        self.band_matrix = np.array([(self.frequencies >= low) & (self.frequencies < high) for _, low, high, _ in BANDS],
+                                    dtype=np.float64)
+
+        capacity = max(1, int(history_seconds / hop_seconds))
+        self.columns = RingBuffer(capacity, np.float32, channels=self.bins)  # Power in dB, frequency x time
+        self.band_power = RingBuffer(capacity, np.float32, channels=len(BANDS))  # Fraction of the power in all bands
+        self.times = RingBuffer(capacity)  # Centre of each column, in seconds
+        self.reset()
+
+    def reset(self, start_index=0):
+        # Start again at sample `start_index` (e.g. after playback jumped)
+        self.count = start_index  # Absolute index of the next sample expected
+        self._next_frame = start_index  # First sample of the next FFT frame
+        self._tail = np.empty(0)
+        self.columns.clear()
+        self.band_power.clear()
+        self.times.clear()
+        self.peak_db = -np.inf  # Loudest bin so far, for the colour scale
+
+    @property
+    def column_count(self):
+        return len(self.times)
+
+    def process(self, samples):
+        # Feed the next samples; returns the number of new columns
+        samples = np.nan_to_num(np.asarray(samples, dtype=np.float64))
+        data = np.concatenate((self._tail, samples))
+        base = self.count - len(self._tail)  # Absolute index of data[0]
+        self.count += len(samples)
+        frames = 0
+        if self.count - self.size >= self._next_frame:
+            frames = (self.count - self.size - self._next_frame) // self.hop + 1
+        if frames:
+            first = self._next_frame - base
+            segments = np.lib.stride_tricks.sliding_window_view(data[first:], self.size)[::self.hop][:frames]
+            segments = (segments - segments.mean(axis=1, keepdims=True)) * self.window
+            power = np.abs(np.fft.rfft(segments, axis=1)[:, :self.bins]) ** 2 * self.scale
+            bands = power @ self.band_matrix.T
+            total = bands.sum(axis=1, keepdims=True)
+            decibels = 10.0 * np.log10(power + 1e-20)
+            self.columns.extend(decibels.T)
+            self.band_power.extend((bands / np.where(total > 0, total, 1.0)).T)
+            starts = self._next_frame + np.arange(frames) * self.hop
+            self.times.extend((starts + self.size / 2) / self.sample_rate)
+            self.peak_db = max(self.peak_db, float(decibels.max()))
+            self._next_frame += frames * self.hop
+        # Keep only what the next frame still needs
+        self._tail = data[max(0, self._next_frame - base):]
+        return frames
+
+
+class SpectrogramWindow(pg.GraphicsLayoutWidget):
+    # Spectrogram and band powers of one channel, following the playback of
+    # the view it is shown on. It runs on the view manager's frame
+    # scheduler: each frame transforms only the samples played since the
+    # last, and the image item is handed the ring buffer's contiguous view,
+    # so nothing older is recomputed or copied.
+    def __init__(self, views, view, index, parent=None):
+        super().__init__(parent)
+        self.views = views
+        self.view = view
+        self.signal_data = view.signals[index]
+        self.sample_rate = view.sample_rates[index]
+        self.spectrogram = Spectrogram(self.sample_rate)
+        self.key = f"spectrogram {id(self)}"
+        self.setWindowTitle(f"Spectrogram - {view.channel_names[index]}")
+        self.setBackground('k')
+        self.resize(900, 600)
+
+        self.image_plot = self.addPlot(row=0, col=0, title="Spectrogram")
+        self.image_plot.setLabel('left', "Frequency", units='Hz')
+        self.image = pg.ImageItem(axisOrder='row-major')
+        self.image.setColorMap(pg.colormap.get('viridis'))
+        self.image_plot.addItem(self.image)
+        self.image_plot.setYRange(0, self.spectrogram.frequencies[-1], padding=0)
+
+        self.band_plot = self.addPlot(row=1, col=0, title="Relative band power")
+        self.band_plot.setXLink(self.image_plot)
+        self.band_plot.setYRange(0, 1, padding=0)
+        self.band_plot.setLabel('bottom', "Time", units='s')
+        self.band_plot.addLegend()
+        self.band_curves = [self.band_plot.plot(pen=pg.mkPen(color), name=name) for name, _, _, color in BANDS]
+
+        views.scheduler.register(self.key, lambda: True, self.render)
+        views.scheduler.start()
+
+    def render(self, degraded=False):
+        spectrogram = self.spectrogram
+        current_index = min(int(self.view.clock.position * self.sample_rate) + 1, len(self.signal_data))
+        first_index = getattr(self.signal_data, 'first_index', 0)
+        history = spectrogram.columns.capacity * spectrogram.hop + spectrogram.size
+        if current_index < spectrogram.count or current_index - spectrogram.count > history:
+            # Rewound, or jumped further than the image holds: refill from what it can show
+            spectrogram.reset(max(first_index, current_index - history))
+        if current_index <= spectrogram.count:
+            return
+        with tracing.span('spectrogram', 'render', samples=current_index - spectrogram.count):
+            new_columns = spectrogram.process(self.signal_data[spectrogram.count:current_index])
+        if new_columns:
+            self.update_image()
+
+    def update_image(self):
+        spectrogram = self.spectrogram
+        times = spectrogram.times.view()
+        width = spectrogram.hop / spectrogram.sample_rate
+        self.image.setImage(spectrogram.columns.view(), autoLevels=False,
+                            levels=(spectrogram.peak_db - DYNAMIC_RANGE_DB, spectrogram.peak_db))
+        # Columns are centred on their times; rows on their frequencies
+        bin_width = spectrogram.frequencies[1] - spectrogram.frequencies[0]
+        self.image.setRect(QRectF(times[0] - width / 2, -bin_width / 2, len(times) * width, spectrogram.bins * bin_width))
+        band_power = spectrogram.band_power.view()
+        for curve, power in zip(self.band_curves, band_power):
+            curve.setData(times, power)
+
+    def closeEvent(self, event):
+        self.views.scheduler.unregister(self.key)
+        super().closeEvent(event)
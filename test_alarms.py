@@ -0,0 +1,56 @@
+import numpy as np  # Numerical operations library
+
+from alarms import AlarmTable, default_rules
+from vitals import MAX_RR_SECONDS, HeartRate
+
+SAMPLE_RATE = 250.0
+
+
+def synthetic_ecg(seconds, stop_seconds, bpm=72.0):
+    # A spike per beat on a little noise; the beats stop at `stop_seconds`
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    beats = np.exp(-((t % (60.0 / bpm)) - 0.2) ** 2 / 0.0005) * (t < stop_seconds)
+    return beats + 0.01 * np.random.default_rng(0).standard_normal(len(t))
+
+
+def play(ecg, heart_rate, table):
+    # Feed the ECG in frame-sized pieces as the view manager does; returns
+    # the (rule name, sample index) of every alarm raised
+    raised_alarms = []
+    frame = round(SAMPLE_RATE / 30)
+    for start in range(0, len(ecg), frame):
+        samples = ecg[None, start:start + frame]
+        heart_rate.process(samples)
+        first = table.next_index
+        raised, raised_at, _, _, _ = table.evaluate(samples, heart_rate)
+        raised_alarms += [(table.rules[entry].name, first + offset) for entry, offset in zip(raised, raised_at)]
+    return raised_alarms
+
+
+def test_heart_rate_falls_when_beats_stop():
+    heart_rate = HeartRate(SAMPLE_RATE)
+    ecg = synthetic_ecg(60, 25)
+    heart_rate.process(ecg[None, :int(20 * SAMPLE_RATE)])
+    assert abs(heart_rate.bpm[0] - 72) < 2
+    heart_rate.process(ecg[None, int(20 * SAMPLE_RATE):])
+    assert heart_rate.bpm[0] < 5
+
+
+def test_hr_low_raised_when_beats_stop():
+    heart_rate = HeartRate(SAMPLE_RATE)
+    table = AlarmTable(SAMPLE_RATE, [(0, 0, rule) for rule in default_rules(ecg=True)], {0: 0})
+    raised = play(synthetic_ecg(40, 25), heart_rate, table)
+    assert [name for name, _ in raised] == ['HR low']
+    # The median rate holds until no beat has come for MAX_RR_SECONDS, then
+    # drops straight to 60 / MAX_RR_SECONDS (24 bpm), below the limit, and
+    # must stay there for the rule's delay. The last beat is up to one beat
+    # period before the beats stop; allow a frame on top.
+    delay = next(rule.delay for rule in table.rules if rule.name == 'HR low')
+    beat = 60.0 / 72
+    assert 25 - beat + MAX_RR_SECONDS + delay <= raised[0][1] / SAMPLE_RATE <= 25 + MAX_RR_SECONDS + delay + beat + 1 / 30
+
+
+def test_no_alarm_while_beating():
+    heart_rate = HeartRate(SAMPLE_RATE)
+    table = AlarmTable(SAMPLE_RATE, [(0, 0, rule) for rule in default_rules(ecg=True)], {0: 0})
+    assert play(synthetic_ecg(40, 40), heart_rate, table) == []
@@ -0,0 +1,43 @@
+import numpy as np  # Numerical operations library
+import pytest
+
+from archive import write_archive
+from signal_format import ARCHIVE_EXTENSION, compact, open_signal, write_signal
+
+SAMPLE_RATE = 250.0
+
+
+def signal_with_gaps():
+    # Two channels of different ranges with NaN gaps, one at a channel's minimum
+    t = np.arange(5000) / SAMPLE_RATE
+    data = np.vstack((np.sin(2 * np.pi * t), 40.0 + 10.0 * np.cos(t)))
+    data[0, 100:200] = np.nan
+    data[0, np.argmin(data[0])] = np.nan
+    data[1, -50:] = np.nan
+    return data
+
+
+def assert_round_trip(channels, data):
+    for channel, expected in zip(channels, data):
+        values = channel[0:len(expected)]
+        gaps = np.isnan(expected)
+        assert np.array_equal(np.isnan(values), gaps)
+        step = (np.nanmax(expected) - np.nanmin(expected)) / 65534
+        assert np.max(np.abs(values[~gaps] - expected[~gaps])) <= step
+
+
+def test_compact_int16_keeps_nan():
+    data = signal_with_gaps()
+    assert_round_trip(compact(data, 'int16'), data)
+
+
+@pytest.mark.parametrize('extension', ['.vsig', ARCHIVE_EXTENSION])
+def test_int16_file_keeps_nan(tmp_path, extension):
+    data = signal_with_gaps()
+    file_path = str(tmp_path / f'gaps{extension}')
+    if extension == ARCHIVE_EXTENSION:
+        write_archive(file_path, data, SAMPLE_RATE, dtype='int16', chunk_samples=1024)
+    else:
+        write_signal(file_path, data, SAMPLE_RATE, dtype='int16')
+    signal = open_signal(file_path)
+    assert_round_trip([signal.channel(i) for i in range(signal.channels)], data)
@@ -0,0 +1,272 @@
+import numpy as np  # Numerical operations library
+import pyqtgraph as pg
+
+from buffers import RingBuffer
+from lod import decimate_minmax
+
+EXTENT_SEGMENT = 256  # Samples per segment whose min/max a block keeps for its window extent
+
+
+class ChannelBlock:
+    # The channels of one view that share a sample rate, kept together in a
+    # single channels x samples ring buffer. A frame pushes the newly played
+    # samples of every row at once, and the visible window of all of them is
+    # one contiguous view of the buffer, so slicing, range computation and
+    # decimation are whole-array operations however many channels there are.
+    #
+    # Recorded channels may end at different times; a row that has ended is
+    # padded with NaN. Live channels arrive at slightly different moments,
+    # so a block of live channels only advances as far as its slowest row.
+    #
+    # The min and max of every row over each EXTENT_SEGMENT samples are
+    # kept as the samples arrive, so the extent of a window is read from
+    # its whole segments and only the samples at its two edges, instead of
+    # scanning the window every frame.
+    #
+    # Likewise the min/max envelope drawn when a window has more samples
+    # than pixels is made of blocks aligned to multiples of their size, and
+    # the blocks of the last frame are kept: a playing frame only reduces
+    # the blocks its new samples completed.
+    def __init__(self, sample_rate, channels, sources, capacity, live=False):
+        self.sample_rate = sample_rate
+        self.channels = np.asarray(channels, dtype=np.intp)  # Channel index in the view, per row
+        self.sources = list(sources)
+        self.live = live
+        # As wide as the widest channel needs, so float32 channels stay float32
+        self.buffer = RingBuffer(capacity, np.result_type(np.float32, *[source.dtype for source in self.sources]),
+                                 channels=len(self.sources))
+        self.x_buffer = RingBuffer(capacity)  # Shared by every row; in seconds
+        segments = capacity // EXTENT_SEGMENT + 2
+        self.segment_mins = RingBuffer(segments, self.buffer.dtype, channels=len(self.sources))
+        self.segment_maxs = RingBuffer(segments, self.buffer.dtype, channels=len(self.sources))
+        self.segmented = 0  # Samples before this (a multiple of EXTENT_SEGMENT) are in the segments
+        self._envelope = None  # (block size, first block, mins, maxs) of the last envelope's whole blocks
+        self.next_index = 0  # First sample index not yet pushed into the buffer
+        self.summarised = 0  # Samples already fed to the channels' pyramids and statistics
+        self.has_gaps = False  # Some row ended before next_index
+        self.groups = []  # (colour, rows) of the visible rows, one entry per colour
+        self.ecg_rows = np.empty(0, dtype=np.intp)  # Rows analysed for heart rate
+        self.heart_rate = None  # HeartRate of those rows, if any
+        self.alarms = None  # AlarmTable of the rules on the block's channels, if any
+
+    def __len__(self):
+        return len(self.sources)
+
+    @property
+    def capacity(self):
+        return self.buffer.capacity
+
+    def reset(self):
+        self.buffer.clear()
+        self.x_buffer.clear()
+        self.segment_mins.clear()
+        self.segment_maxs.clear()
+        self.segmented = 0
+        self._envelope = None
+        self.next_index = 0
+        self.has_gaps = False
+
+    def sync(self, current_index):
+        # Push only the samples revealed since the previous frame
+        lengths = [len(source) for source in self.sources]
+        end = current_index + 1
+        end = min(end, min(lengths)) if self.live else min(end, max(lengths))
+        if end < self.next_index:
+            # Playback jumped backwards (rewind); start over
+            self.reset()
+
+        start = max(self.next_index, end - self.capacity)
+        if start < end:
+            samples = np.empty((len(self.sources), end - start), dtype=self.buffer.dtype)
+            for row, (source, length) in enumerate(zip(self.sources, lengths)):
+                stop = min(end, length)
+                if stop > start:
+                    samples[row, :stop - start] = source[start:stop]
+                if stop < end:
+                    samples[row, max(0, stop - start):] = np.nan
+                    self.has_gaps = True
+            self.x_buffer.extend(np.arange(start, end, dtype=np.float64) / self.sample_rate)
+            self.buffer.extend(samples)
+        self.next_index = max(self.next_index, end)
+        self._segment()
+
+    def _segment(self):
+        # Min/max of the segments completed by the samples just pushed
+        ring_first = self.next_index - len(self.buffer)
+        if self.segmented < ring_first:
+            # Jumped ahead: the segments start again from the buffer's oldest whole one
+            self.segment_mins.clear()
+            self.segment_maxs.clear()
+            self.segmented = -(-ring_first // EXTENT_SEGMENT) * EXTENT_SEGMENT
+        stop = self.next_index // EXTENT_SEGMENT * EXTENT_SEGMENT
+        if stop <= self.segmented:
+            return
+        rows = self.buffer.view()[:, self.segmented - ring_first:stop - ring_first]
+        rows = rows.reshape(len(self.sources), -1, EXTENT_SEGMENT)
+        self.segment_mins.extend(np.fmin.reduce(rows, axis=2))
+        self.segment_maxs.extend(np.fmax.reduce(rows, axis=2))
+        self.segmented = stop
+
+    def extent(self, first, last):
+        # Per-row (lows, highs) of samples [first, last), which window()
+        # must hold; NaN is ignored, and a row of NaN only gives NaN
+        ring_first = self.next_index - len(self.buffer)
+        rows = self.buffer.view()
+        segment_first = self.segmented - len(self.segment_mins) * EXTENT_SEGMENT
+        inner_first = max(-(-first // EXTENT_SEGMENT) * EXTENT_SEGMENT, segment_first)
+        inner_last = min(last // EXTENT_SEGMENT * EXTENT_SEGMENT, self.segmented)
+        if inner_last <= inner_first:
+            window = rows[:, first - ring_first:last - ring_first]
+            return np.fmin.reduce(window, axis=1), np.fmax.reduce(window, axis=1)
+        columns = slice((inner_first - segment_first) // EXTENT_SEGMENT, (inner_last - segment_first) // EXTENT_SEGMENT)
+        lows = np.fmin.reduce(self.segment_mins.view()[:, columns], axis=1)
+        highs = np.fmax.reduce(self.segment_maxs.view()[:, columns], axis=1)
+        for edge in (rows[:, first - ring_first:inner_first - ring_first], rows[:, inner_last - ring_first:last - ring_first]):
+            if edge.shape[1]:
+                lows = np.fmin(lows, np.fmin.reduce(edge, axis=1))
+                highs = np.fmax(highs, np.fmax.reduce(edge, axis=1))
+        return lows, highs
+
+    def envelope(self, first, last, max_points):
+        # (x in samples, rows) min/max envelope of samples [first, last),
+        # which window() must hold, in at most about max_points points per
+        # row, as lod.decimate_minmax gives
+        ring_first = self.next_index - len(self.buffer)
+        rows = self.buffer.view()
+        size = -(-(last - first) // max(1, max_points // 2))
+        if size <= 1:
+            return np.arange(first, last, dtype=np.float64), rows[:, first - ring_first:last - ring_first]
+        first_block, last_block = -(-first // size), last // size
+        if last_block <= first_block:
+            return decimate_minmax(rows[:, first - ring_first:last - ring_first], first, max_points)
+
+        cached = self._envelope
+        if cached is None or cached[0] != size or not cached[1] <= first_block <= cached[1] + cached[2].shape[1]:
+            cached = (size, first_block, rows[:, :0], rows[:, :0])
+        _, cached_first, mins, maxs = cached
+        cached_last = cached_first + mins.shape[1]
+        if last_block > cached_last:
+            blocks = rows[:, cached_last * size - ring_first:last_block * size - ring_first]
+            blocks = blocks.reshape(len(self.sources), -1, size)
+            mins = np.concatenate((mins, blocks.min(axis=2)), axis=1)
+            maxs = np.concatenate((maxs, blocks.max(axis=2)), axis=1)
+        keep = slice(first_block - cached_first, last_block - cached_first)
+        mins, maxs = mins[:, keep], maxs[:, keep]
+        self._envelope = (size, first_block, mins, maxs)
+
+        starts = np.arange(first_block, last_block) * size
+        # Partial blocks at either edge
+        head = rows[:, first - ring_first:first_block * size - ring_first]
+        if head.shape[1]:
+            starts = np.concatenate(((first,), starts))
+            mins = np.concatenate((head.min(axis=1, keepdims=True), mins), axis=1)
+            maxs = np.concatenate((head.max(axis=1, keepdims=True), maxs), axis=1)
+        tail = rows[:, last_block * size - ring_first:last - ring_first]
+        if tail.shape[1]:
+            starts = np.concatenate((starts, (last_block * size,)))
+            mins = np.concatenate((mins, tail.min(axis=1, keepdims=True)), axis=1)
+            maxs = np.concatenate((maxs, tail.max(axis=1, keepdims=True)), axis=1)
+        x = np.repeat(starts, 2).astype(np.float64)
+        y = np.empty((len(self.sources), 2 * mins.shape[1]), dtype=rows.dtype)
+        y[:, 0::2] = mins
+        y[:, 1::2] = maxs
+        return x, y
+
+    def window(self, first, last):
+        # (x, rows) views of samples [first, last) when the buffer still holds
+        # them all, otherwise None
+        ring_first = self.next_index - len(self.buffer)
+        if first < ring_first or last > self.next_index:
+            return None
+        return (self.x_buffer.view()[first - ring_first:last - ring_first],
+                self.buffer.view()[:, first - ring_first:last - ring_first])
+
+
+class BatchCurve(pg.PlotCurveItem):
+    # A curve told the extent of its points along with them. Its bounding
+    # rectangle is worked out again after every scroll; with the extent
+    # known that no longer scans all the points each time.
+    def __init__(self, *args, **kargs):
+        self.extent = None  # ((x min, x max), (y min, y max)) of the current points, if known
+        super().__init__(*args, **kargs)
+
+    def dataBounds(self, ax, frac=1.0, orthoRange=None):
+        if self.extent is not None and frac >= 1.0 and orthoRange is None:
+            return self.extent[ax]
+        return super().dataBounds(ax, frac, orthoRange)
+
+
+class TraceBatch:
+    # Every curve of one view. Channels are drawn as one path per colour, a
+    # single PlotCurveItem whose connect array breaks the line between
+    # channels, so the number of scene items and setData calls per frame
+    # depends on the colours in use rather than on the number of channels.
+    def __init__(self, plot_item):
+        self.plot_item = plot_item
+        self.curves = {}  # Colour -> PlotCurveItem
+        self._segments = {}  # Colour -> [(x, rows, finite, extent)] collected for this frame
+        self._drawn = set()  # Colours whose curve currently has data
+
+    def begin(self):
+        self._segments = {}
+
+    def add(self, color, x, rows, finite=True, extent=None):
+        # rows is channels x len(x); each row becomes its own polyline.
+        # extent is (min, max) of rows, if the caller knows it already
+        self._segments.setdefault(color, []).append((x, rows, finite, extent))
+
+    def commit(self):
+        for color, segments in self._segments.items():
+            curve = self.curves.get(color)
+            if curve is None:
+                # A bare curve item: the data is already decimated, so
+                # PlotDataItem's extra bookkeeping would only cost time per frame
+                curve = BatchCurve(pen=pg.mkPen(color))
+                self.plot_item.addItem(curve)
+                self.curves[color] = curve
+            if len(segments) == 1 and len(segments[0][1]) == 1 and segments[0][1].shape[1]:
+                # One channel in this colour: its points are the path as they are
+                x, rows, finite, extent = segments[0]
+                curve.extent = None if extent is None or not np.isfinite(extent).all() else \
+                    ((float(x[0]), float(x[-1])), extent)
+                curve.setData(x, rows[0], connect='all' if finite else 'finite', skipFiniteCheck=finite)
+                continue
+            xs, ys, connects = [], [], []
+            finite = True
+            low, high, x_low, x_high = float('inf'), float('-inf'), float('inf'), float('-inf')
+            for x, rows, rows_finite, extent in segments:
+                count, length = rows.shape
+                if length == 0:
+                    continue
+                connect = np.ones(count * length, dtype=bool)
+                connect[length - 1::length] = False
+                xs.append(np.tile(x, count))
+                ys.append(rows.ravel())
+                connects.append(connect)
+                finite = finite and rows_finite
+                # x is increasing
+                x_low, x_high = min(x_low, float(x[0])), max(x_high, float(x[-1]))
+                low, high = (min(low, extent[0]), max(high, extent[1])) if extent is not None else (np.nan, np.nan)
+            if not xs:
+                curve.extent = None
+                curve.setData([], [])
+                continue
+            # Unknown or undefined (NaN) extents leave the bounds to pyqtgraph
+            curve.extent = ((x_low, x_high), (low, high)) if np.isfinite([low, high]).all() else None
+            curve.setData(np.concatenate(xs), np.concatenate(ys), connect=np.concatenate(connects),
+                          skipFiniteCheck=finite)
+        # Colours that drew nothing this frame
+        for color in self._drawn.difference(self._segments):
+            self.curves[color].extent = None
+            self.curves[color].setData([], [])
+        self._drawn = set(self._segments)
+
+    def clear(self):
+        self.begin()
+        self.commit()
+
+    def detach(self):
+        for curve in self.curves.values():
+            self.plot_item.removeItem(curve)
+        self.curves.clear()
+        self._drawn.clear()
@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+import time  # Wall-clock timing
+from collections import deque
+
+# Lightweight instrumentation for the hot paths, exported as Chrome trace
+# JSON (open in chrome://tracing or https://ui.perfetto.dev).
+#
+#   with tracing.span('render', 'frame', graph=1):
+#       ...
+#
+# While tracing is off, span() returns one shared do-nothing context, so an
+# instrumented call costs a function call and a flag test.
+
+MAX_EVENTS = 500_000  # Oldest events are dropped beyond this
+
+_clock = time.perf_counter
+_origin = _clock()
+_events = deque(maxlen=MAX_EVENTS)
+enabled = False
+
+
+def _timestamp():
+    # Microseconds since the module was loaded, as Chrome traces expect
+    return (_clock() - _origin) * 1e6
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'category', 'args', 'start')
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = _timestamp()
+        return self
+
+    def __exit__(self, *exc_info):
+        complete(self.name, self.category, self.start, _timestamp(), **self.args)
+        return False
+
+
+def span(name, category='app', **args):
+    if not enabled:
+        return _NULL_SPAN
+    return _Span(name, category, args)
+
+
+def now():
+    # Start time for complete(), for spans that do not fit a with-block
+    return _timestamp()
+
+
+def complete(name, category, start, end=None, **args):
+    if not enabled:
+        return
+    end = _timestamp() if end is None else end
+    _events.append({'name': name, 'cat': category, 'ph': 'X', 'ts': start, 'dur': end - start,
+                    'pid': os.getpid(), 'tid': threading.get_ident(), 'args': args})
+
+
+def instant(name, category='app', **args):
+    if not enabled:
+        return
+    _events.append({'name': name, 'cat': category, 'ph': 'i', 's': 't', 'ts': _timestamp(),
+                    'pid': os.getpid(), 'tid': threading.get_ident(), 'args': args})
+
+
+def counter(name, **values):
+    # Numeric series drawn as a track, e.g. counter('ingest lag', graph1=12.5)
+    if not enabled:
+        return
+    _events.append({'name': name, 'ph': 'C', 'ts': _timestamp(), 'pid': os.getpid(), 'args': values})
+
+
+def start():
+    global enabled
+    enabled = True
+
+
+def stop():
+    global enabled
+    enabled = False
+
+
+def clear():
+    _events.clear()
+
+
+def events():
+    return list(_events)
+
+
+def count():
+    return len(_events)
+
+
+def export(file_path):
+    # Write everything recorded so far as a Chrome trace file
+    recorded = list(_events)
+    threads = {event['tid'] for event in recorded if 'tid' in event}
+    metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': thread.ident, 'args': {'name': thread.name}}
+                for thread in threading.enumerate() if thread.ident in threads]
+    with open(file_path, 'w') as file:
+        json.dump({'traceEvents': metadata + recorded, 'displayTimeUnit': 'ms'}, file)
+    return len(recorded)
@@ -0,0 +1,755 @@
+import os
+import threading
+import time  # Wall-clock timing
+from os import path  # Functions to manipulate file paths
+
+import numpy as np  # Numerical operations library
+import pyqtgraph as pg
+
+import tracing
+from alarms import AlarmEngine, default_rules
+from filters import FILTER_PRESETS, FilteredSignal, design_chain, signal_kind
+from lod import MinMaxPyramid, decimate_minmax
+from playback import PlaybackClock, DISPLAY_WINDOW_SECONDS, FRAME_INTERVAL_MS
+from range_tracker import AxisRange
+from scheduler import FrameScheduler
+from signal_format import open_signal
+from signal_stats import ChannelStatistics
+from sources import LiveSignal
+from traces import ChannelBlock, TraceBatch
+from vitals import HeartRate, looks_like_ecg
+
+MAX_ZOOM_LEVEL = 5  # Zoom-in steps allowed from the initial window
+MAX_VITALS_LINES = 8  # Lines of heart rates and alarms shown on a graph
+SUMMARY_CHUNK = 4096  # Played samples gathered before the channels' pyramids and statistics are extended
+SUMMARY_BUDGET = 1 << 17  # Samples of a view summarised per frame while catching up after a seek
+LABEL_INTERVAL_SECONDS = 0.5  # Heart rate labels and the window readout are redrawn at most this often while playing
+
+
+def live_signal(signal_data):
+    # The LiveSignal behind a channel (which may be seen through a filter), or None
+    source = getattr(signal_data, 'source', signal_data)
+    return source if isinstance(source, LiveSignal) else None
+
+
+def color_key(color):
+    # Any colour pyqtgraph accepts, as one '#rrggbbaa' string per distinct colour
+    return '#' + pg.colorStr(pg.mkColor(color))
+
+
+class StoredChannel:
+    # One channel of an opened recording with its level-of-detail pyramid
+    # and running statistics. Shared by every view showing the channel;
+    # both only ever grow, so views at different positions can share them.
+    __slots__ = ('data', 'sample_rate', 'pyramid', 'statistics')
+
+    def __init__(self, data, sample_rate):
+        self.data = data
+        self.sample_rate = sample_rate
+        self.pyramid = MinMaxPyramid(np.result_type(data.dtype, np.float32))
+        self.statistics = ChannelStatistics()
+
+
+class SignalStore:
+    # Recordings opened by any view, so the same file shown on several bed
+    # panels is mapped (or unpickled) and summarised only once. Files are
+    # opened on the loader's threads as well as the GUI thread: each file
+    # is opened under its own lock, so loading it twice at once opens it
+    # once and different files still open in parallel.
+    def __init__(self, dtype=None):
+        self.dtype = dtype  # Storage dtype of recordings read into memory (see compact()); None keeps theirs
+        self._files = {}  # realpath -> (identity, SignalFile, {channel index: StoredChannel})
+        self._lock = threading.Lock()  # Guards _files and _file_locks
+        self._file_locks = {}  # realpath -> lock held while that file is opened
+
+    def open(self, file_path):
+        key = path.realpath(file_path)
+        status = os.stat(key)
+        identity = (status.st_mtime_ns, status.st_size)
+        with self._lock:
+            file_lock = self._file_locks.setdefault(key, threading.Lock())
+        with file_lock:
+            entry = self._files.get(key)
+            if entry is None or entry[0] != identity:
+                entry = (identity, open_signal(file_path, self.dtype), {})
+                with self._lock:
+                    self._files[key] = entry
+        return entry[1]
+
+    def channel(self, file_path, index):
+        self.open(file_path)
+        with self._lock:
+            _, signal_file, channels = self._files[path.realpath(file_path)]
+            if index not in channels:
+                channels[index] = StoredChannel(signal_file.channel(index), signal_file.channel_rate(index))
+            return channels[index]
+
+    def clear(self):
+        with self._lock:
+            self._files.clear()
+
+
+class GraphView:
+    # Playback and display state of one graph. Views only hold state; the
+    # ViewManager plays and draws them, so the main window's two graphs and
+    # a ward of bed panels run on the same code. __slots__ keeps dozens of
+    # views compact and their attribute lookups cheap in the frame loop.
+    __slots__ = ('key', 'plot_item', 'legend', 'legend_items', 'colors', 'clock', 'is_playing',
+                 'playback_speed', 'zoom_level',
+                 'signals', 'sample_rates', 'pyramids', 'channel_stats', 'channel_colors',
+                 'channel_offsets', 'channel_names', 'files', 'file_channels', 'hidden_channels', 'blocks', 'batch',
+                 'ecg_channels', 'alarm_rules', 'channel_filters', 'raw_channels', 'y_range', 'readout_channel', 'loading', 'loading_label',
+                 'vitals_label', 'vitals_changed', 'labels_due', 'ingest_lag', 'recorder', 'recorded_streams')
+
+    def __init__(self, key, plot_item, colors):
+        self.key = key
+        self.plot_item = plot_item
+        self.legend = None
+        self.legend_items = {}  # Channel name -> legend item
+        self.colors = list(colors)
+        self.clock = PlaybackClock()  # Playback position in seconds
+        self.is_playing = False
+        self.playback_speed = 1.0
+        self.zoom_level = 0  # Zoom-in steps taken
+
+        # One entry per channel, in display order
+        self.signals = []
+        self.sample_rates = []  # Hz
+        self.pyramids = []  # Min/max level-of-detail pyramid; None for live channels
+        self.channel_stats = []  # Running statistics; None for live channels
+        self.channel_colors = []
+        self.channel_offsets = []  # Added to the channel's values when drawn, to stack channels
+        self.channel_names = []
+        self.files = []  # File path (or source description) per channel
+        self.file_channels = []  # Index of the channel within its file
+        self.hidden_channels = []
+        self.ecg_channels = []  # True for channels analysed for heart rate
+        self.alarm_rules = []  # AlarmRules checked on each channel
+        self.channel_filters = []  # (stage, frequency) steps of the channel's filter chain; None when unfiltered
+        self.raw_channels = []  # (signal, pyramid, statistics) of the unfiltered channel while it is filtered
+
+        self.blocks = []  # Channels grouped by sample rate into contiguous ChannelBlocks
+        self.batch = TraceBatch(plot_item)  # One curve per colour for all channels
+
+        self.y_range = AxisRange(hysteresis=0.1)  # Rescales the Y axis only when the data leaves it
+        self.readout_channel = -1  # Channel whose window statistics are reported, if any
+        self.loading = []  # Files still being opened for this view
+        self.loading_label = None  # Placeholder shown while they are
+        self.vitals_label = None  # Heart rate of the ECG channels and the active alarms
+        self.vitals_changed = False  # The label is out of date
+        self.labels_due = 0.0  # time.monotonic() from which the label and readout may be redrawn
+        self.ingest_lag = 0.0  # Milliseconds of live samples waiting in the ingest buffers at the last poll
+        self.recorder = None  # SessionRecorder writing the view's channels, while recording
+        self.recorded_streams = {}  # Index of a recorded channel -> its stream in the recording
+
+    def __len__(self):
+        return len(self.signals)
+
+    @property
+    def view_box(self):
+        return self.plot_item.getViewBox()
+
+    def channel_mapping(self):
+        # Channel name -> file path
+        return dict(zip(self.channel_names, self.files))
+
+    def has_live_channels(self):
+        return any(live_signal(signal_data) is not None for signal_data in self.signals)
+
+
+class ViewManager:
+    # Hosts any number of GraphViews on one FrameScheduler and one
+    # SignalStore. Each frame every view advances from the same tick and
+    # only the views that changed are drawn.
+    def __init__(self, interval_ms=FRAME_INTERVAL_MS, parent=None):
+        self.views = {}
+        self.scheduler = FrameScheduler(interval_ms, parent)
+        self.store = SignalStore()
+        self.alarms = AlarmEngine(parent)
+        self.alarms.raised.connect(lambda alarm: self._alarm_changed(alarm))
+        self.alarms.cleared.connect(lambda alarm: self._alarm_changed(alarm))
+        self.window_statistics = None  # Callback(view, channel index, statistics) for the readout channel
+        self.position_changed = None  # Callback(view) after a view is drawn, e.g. to move its scroll bar
+        self.recording_failed = None  # Callback(view, file path, OSError) when a recording had to stop
+
+    def __iter__(self):
+        return iter(self.views.values())
+
+    def __len__(self):
+        return len(self.views)
+
+    def __getitem__(self, key):
+        return self.views[key]
+
+    def add_view(self, key, plot_item, colors, legend=True):
+        view = GraphView(key, plot_item, colors)
+        if legend:
+            view.legend = plot_item.addLegend()
+        # Spread the views' label refreshes over the interval rather than all in one frame
+        view.labels_due = time.monotonic() + LABEL_INTERVAL_SECONDS * (len(self.views) % 8) / 8
+        # Hidden axes still follow every range change; without an SI prefix
+        # to work out they are not relabelled (and relaid out) each frame
+        for name in ('top', 'bottom', 'left', 'right'):
+            axis = plot_item.getAxis(name)
+            if not axis.isVisibleTo(plot_item):
+                axis.enableAutoSIPrefix(False)
+        self.views[key] = view
+        self.scheduler.register(key, lambda: self.advance(view), lambda degraded: self.render(view, degraded))
+        # Scrolling or zooming a paused view redraws the newly visible window
+        view.view_box.sigXRangeChanged.connect(lambda: self.scheduler.mark_dirty(key))
+        return view
+
+    def remove_view(self, key):
+        view = self.views.pop(key)
+        self.scheduler.unregister(key)
+        self.stop_recording(view)
+        self.alarms.clear_view(view)
+        view.batch.detach()
+        return view
+
+    def mark_dirty(self, view):
+        self.scheduler.mark_dirty(view.key)
+
+    def rebuild_blocks(self, view, changed=None, removed=None):
+        # Regroup the view's channels into one block per sample rate (live
+        # channels apart from recorded ones). The blocks start empty and
+        # refill from the current position on the next frame.
+        #
+        # The channels in `changed` (indices now: added, refiltered, ...)
+        # and the channel `removed` (its index before) start their heart
+        # rate analysis and alarms over; the other channels carry on with
+        # theirs. Without `changed` every channel starts over.
+        previous = {}  # Index now of a channel that carries on -> (its block, its row there, its index then)
+        if changed is None:
+            self.alarms.clear_view(view)
+        else:
+            changed = set(changed)
+            for block in view.blocks:
+                for row, index in enumerate(block.channels.tolist()):
+                    now = index - (removed is not None and index > removed)
+                    if index != removed and now not in changed:
+                        previous[now] = (block, row, index)
+            before = [i + (removed is not None and i >= removed) for i in changed]
+            self.alarms.clear_view(view, before + ([] if removed is None else [removed]))
+            if removed is not None:
+                self.alarms.renumber(view, removed)
+
+        groups = {}
+        for i, (signal_data, sample_rate) in enumerate(zip(view.signals, view.sample_rates)):
+            groups.setdefault((sample_rate, live_signal(signal_data) is not None), []).append(i)
+        view.blocks = []
+        for (sample_rate, live), channels in groups.items():
+            # The buffer holds twice the playing window so zooming out still draws from it
+            capacity = int(2 * DISPLAY_WINDOW_SECONDS * sample_rate) + 1
+            block = ChannelBlock(sample_rate, channels, [view.signals[i] for i in channels], capacity, live)
+            block.ecg_rows = np.flatnonzero([view.ecg_channels[i] for i in channels])
+            # Channels carrying on were all in the old block of the same rate
+            carried = [previous[i] for i in channels if i in previous]
+            old_block = carried[0][0] if carried else None
+            carried = {i: previous[i] for i in channels if i in previous and previous[i][0] is old_block}
+            if len(block.ecg_rows):
+                if old_block is not None and old_block.heart_rate is not None:
+                    old_rows = {row: n for n, row in enumerate(old_block.ecg_rows.tolist())}
+                    rows = [old_rows.get(carried[channels[row]][1], -1) if channels[row] in carried else -1
+                            for row in block.ecg_rows.tolist()]
+                    block.heart_rate = old_block.heart_rate.select(rows)
+                else:
+                    block.heart_rate = HeartRate(sample_rate, len(block.ecg_rows))
+            block.alarms = self.alarms.compile(view, block, None if old_block is None else old_block.alarms,
+                                               {i: index for i, (_, _, index) in carried.items()})
+            view.blocks.append(block)
+        self.regroup(view)
+        self._update_vitals_label(view)
+
+    def regroup(self, view):
+        # Which rows of each block are drawn, and in which colour
+        hidden = set(view.hidden_channels)
+        colors = [color_key(color) for color in view.channel_colors]
+        for block in view.blocks:
+            groups = {}
+            for row, i in enumerate(block.channels.tolist()):
+                if i not in hidden:
+                    groups.setdefault(colors[i], []).append(row)
+            block.groups = [(color, np.array(rows)) for color, rows in groups.items()]
+        self.mark_dirty(view)
+
+    def add_channel(self, view, signal_data, sample_rate, name, file_path, pyramid=None, statistics=None, ecg=None,
+                    alarm_rules=None, file_channel=0):
+        # Live channels keep only a bounded history, so they get no pyramid or running statistics
+        live = live_signal(signal_data) is not None
+        # The first channel starts the view from zero; later ones join at the
+        # current position so channels already playing are not interrupted
+        first_channel = not view.signals
+        view.signals.append(signal_data)
+        view.sample_rates.append(sample_rate)
+        if not live and pyramid is None:
+            pyramid = MinMaxPyramid(np.result_type(signal_data.dtype, np.float32))
+        if not live and statistics is None:
+            statistics = ChannelStatistics()
+        view.pyramids.append(None if live else pyramid)
+        view.channel_stats.append(None if live else statistics)
+        view.channel_colors.append(view.colors[(len(view) - 1) % len(view.colors)])
+        view.channel_offsets.append(0.0)
+        view.channel_names.append(name)
+        view.files.append(file_path)
+        view.file_channels.append(file_channel)
+        # Unless told otherwise, channels named or filed as ECG get heart rate analysis
+        view.ecg_channels.append(looks_like_ecg(name) or looks_like_ecg(file_path) if ecg is None else ecg)
+        view.alarm_rules.append(default_rules(view.ecg_channels[-1]) if alarm_rules is None else list(alarm_rules))
+        view.channel_filters.append(None)
+        view.raw_channels.append(None)
+        self.rebuild_blocks(view, changed=[len(view) - 1])
+        if first_channel:
+            self.restart(view)
+        self.scheduler.start()
+
+    def add_file_channel(self, view, file_path, index, name):
+        # A channel of a recording, through the shared store
+        channel = self.store.channel(file_path, index)
+        self.add_channel(view, channel.data, channel.sample_rate, name, file_path, channel.pyramid, channel.statistics,
+                         file_channel=index)
+
+    def clear(self, view):
+        # Remove every channel from the view
+        self.stop_recording(view)
+        for channel_list in (view.signals, view.sample_rates, view.pyramids, view.channel_stats, view.channel_colors,
+                             view.channel_offsets, view.channel_names, view.files, view.file_channels, view.hidden_channels,
+                             view.ecg_channels, view.alarm_rules, view.channel_filters, view.raw_channels):
+            channel_list.clear()
+        view.blocks = []
+        self.alarms.clear_view(view)
+        self._update_vitals_label(view)
+        view.batch.clear()
+        view.y_range.reset()
+        self.mark_dirty(view)
+
+    def begin_loading(self, view, file_path):
+        view.loading.append(file_path)
+        self._update_loading_label(view)
+
+    def end_loading(self, view, file_path):
+        if file_path in view.loading:
+            view.loading.remove(file_path)
+        self._update_loading_label(view)
+
+    def _update_loading_label(self, view):
+        # Placeholder in the corner of the plot, outside the data coordinates
+        # so it stays put while the view scrolls
+        if not view.loading:
+            if view.loading_label is not None:
+                view.loading_label.setVisible(False)
+            return
+        if view.loading_label is None:
+            view.loading_label = pg.LabelItem(color='#aaaaaa', parent=view.view_box)
+            view.loading_label.setPos(8, 4)
+        names = ', '.join(path.basename(file_path) for file_path in view.loading)
+        view.loading_label.setText(f"Loading {names}...")
+        view.loading_label.setVisible(True)
+
+    def _update_vitals_label(self, view):
+        # Active alarms, then the heart rate and last RR interval of each ECG
+        # channel, in the corner below the loading placeholder. Redrawn at
+        # most once per frame, and only when beats or alarms changed it.
+        view.vitals_changed = False
+        lines = [f"<span style='color: #ffd700'><b>ALARM</b> {alarm.describe()}</span>"
+                 for alarm in self.alarms.view_alarms(view)]
+        for block in view.blocks:
+            heart_rate = block.heart_rate
+            if heart_rate is None:
+                continue
+            for row, index in enumerate(block.channels[block.ecg_rows].tolist()):
+                if not np.isnan(heart_rate.bpm[row]):
+                    line = f"{view.channel_names[index]}  HR {heart_rate.bpm[row]:.0f} bpm"
+                    if len(heart_rate.rr_intervals[row]):
+                        line += f"  RR {1000 * heart_rate.rr_intervals[row].latest(1)[0]:.0f} ms"
+                    lines.append(line)
+        if len(lines) > MAX_VITALS_LINES:
+            lines[MAX_VITALS_LINES - 1:] = [f"... {len(lines) - MAX_VITALS_LINES + 1} more"]
+        if not lines:
+            if view.vitals_label is not None:
+                view.vitals_label.setVisible(False)
+            return
+        if view.vitals_label is None:
+            view.vitals_label = pg.LabelItem(color='#ff6060', justify='left', parent=view.view_box)
+            view.vitals_label.setPos(8, 24)
+        view.vitals_label.setText('<br>'.join(lines))
+        view.vitals_label.setVisible(True)
+
+    def _alarm_changed(self, alarm):
+        view = self.views.get(alarm.view_key)
+        if view is not None:
+            view.vitals_changed = True
+            view.labels_due = 0.0  # Alarms are shown at once
+            self.mark_dirty(view)
+
+    def set_filter(self, view, index, stages):
+        # Condition a channel with a chain of (stage, frequency) steps (see
+        # filters.FILTER_PRESETS), or show it raw again with None. A filtered
+        # channel gets its own summaries, built from the filtered samples.
+        if view.raw_channels[index] is not None:
+            view.signals[index], view.pyramids[index], view.channel_stats[index] = view.raw_channels[index]
+            view.raw_channels[index] = None
+        view.channel_filters[index] = None if stages is None else list(stages)
+        if stages is not None:
+            raw = (view.signals[index], view.pyramids[index], view.channel_stats[index])
+            view.raw_channels[index] = raw
+            filtered = FilteredSignal(raw[0], design_chain(stages, view.sample_rates[index]))
+            view.signals[index] = filtered
+            if not filtered.live:
+                view.pyramids[index] = MinMaxPyramid(filtered.dtype)
+                view.channel_stats[index] = ChannelStatistics()
+        self.rebuild_blocks(view, changed=[index])
+
+    def filter_preset(self, view, index):
+        # The filter chain suited to the channel, from its name or file
+        kind = signal_kind(view.channel_names[index]) or signal_kind(view.files[index])
+        return FILTER_PRESETS[kind]
+
+    def set_ecg(self, view, index, enabled):
+        # Turn heart rate analysis of a channel on or off; its heart rate
+        # alarms are replaced by the default ones, or dropped
+        view.ecg_channels[index] = enabled
+        rules = [rule for rule in view.alarm_rules[index] if rule.source != 'heart_rate']
+        if enabled:
+            rules += [rule for rule in default_rules(True) if rule.source == 'heart_rate']
+        view.alarm_rules[index] = rules
+        self.rebuild_blocks(view, changed=[index])
+
+    def analyse(self, view, block):
+        # Feed the block's newly played ECG samples to its R-peak detector.
+        # Work is gathered into chunks of ANALYSIS_CHUNK_SECONDS, so the
+        # per-call overhead is shared by many samples and every ECG row of
+        # the block at once; the samples come straight from the ring buffer.
+        heart_rate = block.heart_rate
+        ring_first = block.next_index - len(block.buffer)
+        if heart_rate.count > block.next_index or heart_rate.count < ring_first:
+            # Rewound, or jumped past samples the buffer no longer holds: start over
+            heart_rate.reset(ring_first)
+            view.vitals_changed = True
+        if block.next_index - heart_rate.count < heart_rate.chunk:
+            return
+        with tracing.span('vitals', 'render', view=view.key, channels=len(block.ecg_rows)):
+            samples = block.buffer.latest(block.next_index - heart_rate.count)[block.ecg_rows]
+            updated = heart_rate.process(samples)
+        if updated:
+            view.vitals_changed = True
+
+    def raw_signal(self, view, index):
+        # The channel's signal before any filter
+        raw = view.raw_channels[index]
+        return view.signals[index] if raw is None else raw[0]
+
+    def start_recording(self, view, file_path):
+        # Record the samples of the view's channels, unfiltered, as they are
+        # played or received, from the current position on. Channels added
+        # later are not part of the recording.
+        from session import SessionRecorder  # Not needed until a recording is started
+        self.stop_recording(view)
+        streams = [{'name': name, 'sample_rate': sample_rate, 'units': '', 'file': str(file_name)}
+                   for name, sample_rate, file_name in zip(view.channel_names, view.sample_rates, view.files)]
+        view.recorder = SessionRecorder(file_path, streams)
+        view.recorded_streams = {i: i for i in range(len(view))}
+        for block in view.blocks:
+            # Nothing before what is on screen now
+            for i in block.channels.tolist():
+                view.recorder.next_index[i] = block.next_index
+        return view.recorder
+
+    def stop_recording(self, view):
+        # Finish the view's recording, if any; returns its file path
+        recorder, view.recorder = view.recorder, None
+        view.recorded_streams = {}
+        if recorder is None:
+            return None
+        recorder.close()
+        return recorder.file_path
+
+    def record(self, view, block):
+        # Append the samples the block received since the last frame. After
+        # a jump only what the block's buffer would hold is recorded, so
+        # skipping ahead leaves a gap rather than recording all it skipped.
+        recorder = view.recorder
+        ring_first = block.next_index - len(block.buffer)
+        try:
+            with tracing.span('record', 'render', view=view.key):
+                for i in block.channels.tolist():
+                    stream = view.recorded_streams.get(i)
+                    if stream is None:
+                        continue
+                    signal_data = self.raw_signal(view, i)
+                    begin = max(recorder.next_index[stream], ring_first, getattr(signal_data, 'first_index', 0))
+                    stop = min(block.next_index, len(signal_data))
+                    if begin < stop:
+                        recorder.append(stream, begin, signal_data[begin:stop])
+        except OSError as error:
+            # Disk full or failing: stop recording rather than carry on without durability
+            view.recorder, view.recorded_streams = None, {}
+            try:
+                recorder.close()
+            except OSError:
+                pass
+            if self.recording_failed is not None:
+                self.recording_failed(view, recorder.file_path, error)
+
+    def move_channel(self, source, index, destination):
+        # Hand a channel, with its summaries, to another view; it refills
+        # from the destination view's playback position. Returns its new index.
+        for attribute in ('signals', 'sample_rates', 'pyramids', 'channel_stats', 'channel_colors',
+                          'channel_offsets', 'channel_names', 'files', 'file_channels', 'ecg_channels', 'alarm_rules',
+                          'channel_filters', 'raw_channels'):
+            getattr(destination, attribute).append(getattr(source, attribute).pop(index))
+        # Indices after the moved channel shift down by one; it leaves the
+        # source's recording, and is not part of the destination's
+        source.hidden_channels[:] = [i - (i > index) for i in source.hidden_channels if i != index]
+        source.recorded_streams = {i - (i > index): stream for i, stream in source.recorded_streams.items() if i != index}
+
+        self.rebuild_blocks(source, changed=(), removed=index)
+        self.rebuild_blocks(destination, changed=[len(destination) - 1])
+        self.render(source)
+        self.render(destination)
+        return len(destination) - 1
+
+    def restart(self, view):
+        # Back to the start of every channel
+        for block in view.blocks:
+            block.reset()
+        view.clock.seek(0)
+
+    def rewind(self, view):
+        self.restart(view)
+        self.render(view)
+        view.is_playing = True
+
+    def duration(self, view):
+        # Seconds up to the end of the view's longest channel (so far, for live ones)
+        return max((len(signal_data) / sample_rate for signal_data, sample_rate in zip(view.signals, view.sample_rates)),
+                   default=0.0)
+
+    def seek(self, view, position):
+        # Jump straight to `position` seconds, playing or paused, with the
+        # window ending there. The blocks refill with that window only and
+        # anything older is drawn from the pyramids (or the raw samples
+        # until they catch up), so nothing in between is read or replayed.
+        position = min(max(0.0, position), self.duration(view))
+        view.clock.seek(position)
+        x_start, x_end = view.view_box.viewRange()[0]
+        width = x_end - x_start
+        view.view_box.setXRange(max(0.0, position - width), max(position, width), padding=0)
+        self.mark_dirty(view)
+        self.scheduler.start()
+
+    def set_speed(self, view, speed):
+        view.playback_speed = speed
+        view.clock.set_speed(speed, view.is_playing)
+
+    def set_hidden(self, view, index, hidden):
+        if hidden and index not in view.hidden_channels:
+            view.hidden_channels.append(index)
+        elif not hidden and index in view.hidden_channels:
+            view.hidden_channels.remove(index)
+        self.regroup(view)
+
+    def set_color(self, view, index, color):
+        view.channel_colors[index] = color
+        self.regroup(view)
+
+    def set_offset(self, view, index, offset):
+        view.channel_offsets[index] = offset
+        self.mark_dirty(view)
+
+    def advance(self, view):
+        # Advance by the wall time elapsed since the last frame, not by one sample;
+        # the scheduler redraws the view only while it is playing
+        view.clock.tick(view.is_playing)
+        self.poll_live_signals(view)
+        return view.is_playing
+
+    def poll_live_signals(self, view):
+        # Drain the ingest buffers; a view with live channels follows the
+        # newest sample instead of its own wall clock
+        newest_time = None
+        lag = 0.0
+        for signal_data in view.signals:
+            signal_data = live_signal(signal_data)
+            if signal_data is not None:
+                lag = max(lag, signal_data.pending() / signal_data.sample_rate * 1000.0)
+                signal_data.poll()
+                signal_time = len(signal_data) / signal_data.sample_rate
+                newest_time = signal_time if newest_time is None else max(newest_time, signal_time)
+        if newest_time is not None:
+            view.ingest_lag = lag
+            tracing.counter('ingest lag ms', **{f"graph {view.key}": lag})
+            if view.is_playing:
+                view.clock.position = newest_time
+
+    def render(self, view, degraded=False):
+        plot_item = view.plot_item
+        view_box = plot_item.getViewBox()
+        current_time = view.clock.position
+        if view.is_playing:
+            # Keep the newest sample at the right edge of the window
+            current_view = view_box.viewRange()[0]
+            view_width = current_view[1] - current_view[0]
+            new_view_end = max(current_time, view_width)
+            view_box.setXRange(new_view_end - view_width, new_view_end, padding=0)
+        x_start, x_end = view_box.viewRange()[0]
+
+        # About two points per horizontal pixel, whatever span is visible
+        max_points = 2 * max(int(view_box.width()), 100)
+        if degraded:
+            max_points //= 2
+
+        if not view.signals:
+            view.batch.clear()
+            view.y_range.reset()
+            plot_item.setYRange(0, 1)
+            return
+
+        min_value = float('inf')
+        max_value = float('-inf')
+        offsets = np.asarray(view.channel_offsets)
+        view.batch.begin()
+        # Text is costly to lay out; while playing it is refreshed a few times a second
+        now = time.monotonic()
+        labels_due = not view.is_playing or now >= view.labels_due
+
+        for block in view.blocks:
+            sample_rate = block.sample_rate
+            with tracing.span('slice', 'render'):
+                # Feed the samples that became due since the last frame into the block's ring buffer
+                block.sync(view.clock.sample_index(sample_rate))
+
+                # Summarise only what has been played, so memory-mapped files are
+                # read page by page as playback reaches them, and in chunks so
+                # the per-channel work is not paid on every frame
+                if block.next_index - block.summarised >= SUMMARY_CHUNK or not view.is_playing:
+                    caught_up = True
+                    for i in block.channels.tolist():
+                        stop = min(block.next_index, len(view.signals[i]))
+                        caught_up = self.summarise(view, i, stop, self.summary_budget(view)) >= stop and caught_up
+                    if caught_up:
+                        block.summarised = block.next_index
+                    elif not view.is_playing:
+                        self.mark_dirty(view)  # Still catching up after a seek; carry on next frame
+            if block.heart_rate is not None:
+                self.analyse(view, block)
+            if block.alarms is not None:
+                self.alarms.evaluate(view, block, view.playback_speed)
+            if view.recorder is not None:
+                self.record(view, block)
+
+            if not block.groups:
+                continue  # Every channel of the block is hidden
+
+            # Only the part of the visible window that has already been played
+            first = max(0, int(x_start * sample_rate))
+            last = min(block.next_index, int(np.ceil(x_end * sample_rate)) + 1)
+            if last <= first:
+                continue
+
+            window = block.window(first, last)
+            if window is None:
+                # Scrolled back or zoomed out past the buffer: per channel, from the pyramids
+                for i in block.channels.tolist():
+                    if i not in view.hidden_channels:
+                        extent = self.render_channel(view, i, first, last, max_points)
+                        if extent is not None:
+                            min_value = min(min_value, extent[0] + offsets[i])
+                            max_value = max(max_value, extent[1] + offsets[i])
+            else:
+                x, rows = window
+                # Extent of every row at once, from the block's segments; NaN
+                # padding of ended rows is ignored
+                with tracing.span('range', 'render'):
+                    lows, highs = block.extent(first, last)
+                    lows = lows + offsets[block.channels]
+                    highs = highs + offsets[block.channels]
+                with tracing.span('draw', 'render'):
+                    if rows.shape[1] > max_points:
+                        x, rows = block.envelope(first, last, max_points)
+                        x = x / sample_rate
+                    for color, group in block.groups:
+                        drawn = rows[group] + offsets[block.channels[group], None]
+                        low, high = float(np.fmin.reduce(lows[group])), float(np.fmax.reduce(highs[group]))
+                        view.batch.add(color, x, drawn, not block.has_gaps, (low, high))
+                        min_value = min(min_value, low)
+                        max_value = max(max_value, high)
+
+            # Live readout for the selected channel
+            readout = view.readout_channel
+            if labels_due and self.window_statistics is not None and readout in block.channels and \
+                    view.channel_stats[readout] is not None:
+                self.summarise(view, readout, last, self.summary_budget(view))
+                signal_data = view.signals[readout]
+                self.window_statistics(view, readout, view.channel_stats[readout].range_statistics(
+                    signal_data, first, min(last, len(signal_data)), view.pyramids[readout]))
+
+        with tracing.span('draw', 'render'):
+            view.batch.commit()
+            if labels_due:
+                view.labels_due = now + LABEL_INTERVAL_SECONDS
+                if view.vitals_changed:
+                    self._update_vitals_label(view)
+
+        # A row that has not started yet (or a channel of NaN) leaves the extent undefined
+        if np.isnan(min_value) or np.isnan(max_value):
+            min_value, max_value = float('inf'), float('-inf')
+
+        # Under load keep the current axis instead of rescaling every frame
+        if degraded:
+            pass
+        elif min_value != float('inf') and max_value != float('-inf'):
+            new_range = view.y_range.update(min_value, max_value)
+            if new_range is not None:
+                plot_item.setYRange(*new_range)
+        else:
+            view.y_range.reset()
+            plot_item.setYRange(0, 1)
+
+        if self.position_changed is not None:
+            self.position_changed(view)
+
+    def summary_budget(self, view):
+        # Samples per channel summarised per frame while catching up
+        return max(SUMMARY_CHUNK, SUMMARY_BUDGET // max(1, len(view)))
+
+    def summarise(self, view, index, stop, budget=None):
+        # Bring the channel's pyramid and running statistics up to sample
+        # `stop`, by at most `budget` samples if set (after a seek far ahead
+        # they catch up over several frames). Returns the sample both reach.
+        signal_data = view.signals[index]
+        stop = min(stop, len(signal_data))
+        pyramid, stats = view.pyramids[index], view.channel_stats[index]
+        if pyramid is not None and pyramid.count < stop:
+            pyramid.extend(signal_data[pyramid.count:stop if budget is None else min(stop, pyramid.count + budget)])
+        if stats is not None and stats.count < stop:
+            stats.extend(signal_data[stats.count:stop if budget is None else min(stop, stats.count + budget)])
+        return min(stop if pyramid is None else pyramid.count, stop if stats is None else stats.count)
+
+    def render_channel(self, view, index, first, last, max_points):
+        # Draw samples [first, last) of one channel outside its block's
+        # buffer: the min/max envelope from its pyramid, or a raw slice when
+        # short enough. Returns the extent of those samples.
+        signal_data, sample_rate, pyramid = view.signals[index], view.sample_rates[index], view.pyramids[index]
+        first = max(first, getattr(signal_data, 'first_index', 0))
+        last = min(last, len(signal_data))
+        if last <= first:
+            return None
+        if pyramid is None or self.summarise(view, index, last, self.summary_budget(view)) < last:
+            # No pyramid (live history), or not up to here yet after a seek:
+            # reduce the visible samples directly
+            visible = signal_data[first:last]
+            x, y = decimate_minmax(visible, first, max_points)
+            extent = (float(np.min(visible)), float(np.max(visible)))
+        else:
+            decimated = pyramid.decimate(first, last, max_points)
+            if decimated is None:
+                x, y = np.arange(first, last, dtype=np.float64), signal_data[first:last]
+            else:
+                x, y = decimated
+            extent = pyramid.extent(signal_data, first, last)
+        color = color_key(view.channel_colors[index])
+        offset = view.channel_offsets[index]
+        view.batch.add(color, x / sample_rate, np.asarray(y, dtype=np.float64)[None, :] + offset, True,
+                       None if extent is None else (extent[0] + offset, extent[1] + offset))
+        return extent
@@ -0,0 +1,259 @@
+import statistics
+
+import numpy as np  # Numerical operations library
+
+from buffers import RingBuffer
+
+ANALYSIS_CHUNK_SECONDS = 0.1  # New samples gathered before ECG channels are analysed
+RR_HISTORY = 256  # RR intervals kept per channel
+HEART_RATE_BEATS = 8  # Heart rate is the median of this many RR intervals
+MIN_RR_SECONDS = 0.25  # 240 bpm
+MAX_RR_SECONDS = 2.5  # 24 bpm; with no beat for longer the heart rate falls as 60 / seconds since the last
+
+
+def looks_like_ecg(text):
+    # Channel names and file paths such as "ECG II" or "Dataset/ECG/normal_ecg_1.pkl"
+    text = str(text).lower()
+    return 'ecg' in text or 'ekg' in text
+
+
+def moving_average(values, width):
+    # Mean of every run of `width` samples along the last axis
+    sums = np.cumsum(values, axis=-1, dtype=np.float64)
+    sums[..., width:] = sums[..., width:] - sums[..., :-width]
+    return sums[..., width - 1:] / width
+
+
+class RPeakDetector:
+    # Streaming QRS detector after Pan & Tompkins for any number of ECG
+    # channels sampled together. The signals are smoothed, differentiated,
+    # squared and integrated over a 150 ms window, and peaks of the
+    # integrated energy are classified as beats or noise against adaptive
+    # per-channel thresholds. Every step is a moving sum, so a chunk of new
+    # samples of all channels is processed with a few whole-array
+    # operations, and only a fixed tail of the input (about half a second)
+    # is carried over between chunks; history is never scanned again.
+    #
+    # A beat is reported LOOKAHEAD_SECONDS after its energy peak, once it is
+    # known to be the largest in its neighbourhood. The first LEARN_SECONDS
+    # of each channel only set its initial thresholds.
+    SMOOTH_SECONDS = 0.02
+    SLOPE_SECONDS = 0.01
+    INTEGRATION_SECONDS = 0.15
+    LOOKAHEAD_SECONDS = 0.1
+    REFRACTORY_SECONDS = 0.2
+    LEARN_SECONDS = 2.0
+
+    def __init__(self, sample_rate, channels=1, start_index=0):
+        self.sample_rate = float(sample_rate)
+        self.channels = channels
+        self.smooth = max(1, round(self.SMOOTH_SECONDS * sample_rate))
+        self.slope = max(1, round(self.SLOPE_SECONDS * sample_rate))
+        self.integration = max(1, round(self.INTEGRATION_SECONDS * sample_rate))
+        self.lookahead = max(1, round(self.LOOKAHEAD_SECONDS * sample_rate))
+        self.refractory = round(self.REFRACTORY_SECONDS * sample_rate)
+        self.learn = round(self.LEARN_SECONDS * sample_rate)
+        # Input samples consumed before the first integrated value
+        self._delay = self.smooth - 1 + self.slope + self.integration - 1
+        self._tail_length = 2 * self.lookahead + self._delay + self.integration
+        self.reset(start_index)
+
+    def reset(self, start_index=0):
+        # Start again at sample `start_index` (e.g. after playback jumped)
+        self.count = start_index  # Absolute index of the next sample expected
+        self._tail = np.empty((self.channels, 0))
+        self._evaluated = start_index - 1  # Last absolute index classified
+        self._learn_from = np.full(self.channels, start_index, dtype=np.int64)  # Per channel: learning starts here
+        self._last_peak = np.full(self.channels, -self.refractory - 1, dtype=np.int64)
+        self._learn_max = np.zeros(self.channels)
+        self._learn_sum = np.zeros(self.channels)
+        self._learn_count = np.zeros(self.channels, dtype=np.int64)
+        self._learning = np.ones(self.channels, dtype=bool)
+        self._signal_level = np.zeros(self.channels)  # Running energy of beats (SPKI)
+        self._noise_level = np.zeros(self.channels)  # Running energy of noise peaks (NPKI)
+
+    def select(self, rows):
+        # A detector for the given rows of this one, at the same sample,
+        # keeping their state; a row of -1 is a new channel, which learns
+        # its thresholds from here on
+        rows = np.asarray(rows, dtype=np.intp)
+        kept = rows >= 0
+        detector = RPeakDetector(self.sample_rate, len(rows), self.count)
+        detector._evaluated = self._evaluated
+        detector._tail = np.zeros((len(rows), self._tail.shape[1]))
+        detector._tail[kept] = self._tail[rows[kept]]
+        for name in ('_learn_from', '_last_peak', '_learn_max', '_learn_sum', '_learn_count', '_learning',
+                     '_signal_level', '_noise_level'):
+            getattr(detector, name)[kept] = getattr(self, name)[rows[kept]]
+        return detector
+
+    def process(self, samples):
+        # Feed the next samples (channels x n); returns (channel, index)
+        # arrays of the R peaks confirmed by them, ordered by channel and time
+        samples = np.nan_to_num(np.asarray(samples, dtype=np.float64).reshape(self.channels, -1))
+        none = (np.empty(0, dtype=np.intp), np.empty(0, dtype=np.int64))
+        if samples.shape[1] == 0:
+            return none
+        data = np.concatenate((self._tail, samples), axis=1)
+        base = self.count - self._tail.shape[1]  # Absolute index of data[:, 0]
+        self.count += samples.shape[1]
+        self._tail = data[:, -self._tail_length:]
+
+        width = data.shape[1] - self._delay - 2 * self.lookahead  # Centres that can be classified
+        if width <= 0:
+            return none
+        smoothed = moving_average(data, self.smooth)
+        slope = smoothed[:, self.slope:] - smoothed[:, :-self.slope]
+        energy = moving_average(slope * slope, self.integration)  # energy[:, i] <-> data[:, i + self._delay]
+
+        # Only centres not classified by an earlier chunk
+        first_centre = base + self._delay + self.lookahead  # Absolute index of the first centre
+        skip = max(0, self._evaluated + 1 - first_centre)
+        first_centre += skip
+        centres = energy[:, self.lookahead + skip:self.lookahead + width]
+        self._evaluated = first_centre + centres.shape[1] - 1
+        if centres.shape[1] == 0:
+            return none
+
+        learning = self._learning
+        if learning.any():
+            # Initial thresholds from the energy of each channel's first LEARN_SECONDS
+            self._learn_max[learning] = np.maximum(self._learn_max[learning], centres[learning].max(axis=1))
+            self._learn_sum[learning] += centres[learning].sum(axis=1)
+            self._learn_count[learning] += centres.shape[1]
+            learned = learning & (self._evaluated - self._learn_from >= self.learn)
+            self._signal_level[learned] = 0.25 * self._learn_max[learned]
+            self._noise_level[learned] = 0.5 * self._learn_sum[learned] / self._learn_count[learned]
+            self._learning = learning & ~learned
+            if self._learning.all():
+                return none
+
+        # Energy peaks: local maxima that are also the largest within +-lookahead
+        left = energy[:, self.lookahead + skip - 1:self.lookahead + width - 1]
+        right = energy[:, self.lookahead + skip + 1:self.lookahead + width + 1]
+        rows, columns = np.nonzero((centres >= left) & (centres > right))
+        neighbourhood = self.lookahead + skip + columns[:, None] + np.arange(-self.lookahead, self.lookahead + 1)
+        largest = centres[rows, columns] >= energy[rows[:, None], neighbourhood].max(axis=1, initial=-np.inf)
+        rows, columns = rows[largest], columns[largest]
+
+        # Where the R wave of each would be: the largest deflection in the
+        # integration window before the energy peak
+        stops = first_centre + columns - base + 1
+        segments = data[rows[:, None], stops[:, None] + np.arange(-self.integration, 0)]
+        deflection = np.abs(segments - segments.mean(axis=1, keepdims=True))
+        r_waves = first_centre + columns - self.integration + 1 + np.argmax(deflection, axis=1)
+
+        peaks_rows, peaks = [], []
+        for row, column, level, peak in zip(rows.tolist(), columns.tolist(), centres[rows, columns].tolist(),
+                                            r_waves.tolist()):
+            position = first_centre + column
+            if self._learning[row] or position - self._learn_from[row] < self.learn:
+                continue
+            threshold = self._noise_level[row] + 0.25 * (self._signal_level[row] - self._noise_level[row])
+            if level > threshold and position - self._last_peak[row] > self.refractory:
+                if peak - self._last_peak[row] > self.refractory:
+                    peaks_rows.append(row)
+                    peaks.append(peak)
+                    self._last_peak[row] = peak
+                self._signal_level[row] = 0.125 * level + 0.875 * self._signal_level[row]
+            else:
+                self._noise_level[row] = 0.125 * level + 0.875 * self._noise_level[row]
+        return np.array(peaks_rows, dtype=np.intp), np.array(peaks, dtype=np.int64)
+
+
+class HeartRate:
+    # R-peak detection for a group of ECG channels and the vitals derived
+    # from each: the RR intervals (seconds), the beat-to-beat heart rate and
+    # the time of the beat ending each interval, kept as bounded series, and
+    # the current heart rate as the median of the latest intervals.
+    #
+    # When beats stop the median would hold the last good reading forever,
+    # so once no beat has been seen for MAX_RR_SECONDS the heart rate is
+    # that of one beat in the time since the last (or since detection
+    # started, if there never was one): it keeps falling through asystole.
+    def __init__(self, sample_rate, channels=1, start_index=0):
+        self.sample_rate = float(sample_rate)
+        self.detector = RPeakDetector(sample_rate, channels, start_index)
+        self.beat_times = [RingBuffer(RR_HISTORY) for _ in range(channels)]
+        self.rr_intervals = [RingBuffer(RR_HISTORY) for _ in range(channels)]
+        self.heart_rates = [RingBuffer(RR_HISTORY) for _ in range(channels)]
+        self.timeout = round(MAX_RR_SECONDS * self.sample_rate)  # Samples without a beat before the rate falls
+        self.last_beat = np.full(channels, -1, dtype=np.int64)  # Sample index of each channel's latest beat
+        self._median_bpm = np.full(channels, np.nan)  # Median of the latest intervals
+        self._watch_from = np.full(channels, start_index + self.detector.learn, dtype=np.int64)  # Beats expected from here
+        self.bpm = np.full(channels, np.nan)  # Current heart rate per channel; NaN until known
+
+    @property
+    def count(self):
+        return self.detector.count
+
+    @property
+    def channels(self):
+        return self.detector.channels
+
+    @property
+    def chunk(self):
+        return max(1, round(ANALYSIS_CHUNK_SECONDS * self.sample_rate))
+
+    def reset(self, start_index=0):
+        self.detector.reset(start_index)
+        for series in self.beat_times + self.rr_intervals + self.heart_rates:
+            series.clear()
+        self.last_beat[:] = -1
+        self._median_bpm[:] = np.nan
+        self._watch_from[:] = start_index + self.detector.learn
+        self.bpm[:] = np.nan
+
+    def select(self, rows):
+        # A HeartRate for the given rows of this one, keeping their beats,
+        # series and detector state (e.g. when channels are added to or
+        # removed from a block); a row of -1 is a new channel, analysed
+        # from the current sample on
+        rows = np.asarray(rows, dtype=np.intp)
+        heart_rate = HeartRate(self.sample_rate, len(rows), self.count)
+        heart_rate.detector = self.detector.select(rows)
+        for new_row, row in enumerate(rows.tolist()):
+            if row < 0:
+                continue
+            heart_rate.beat_times[new_row] = self.beat_times[row]
+            heart_rate.rr_intervals[new_row] = self.rr_intervals[row]
+            heart_rate.heart_rates[new_row] = self.heart_rates[row]
+            for name in ('last_beat', '_median_bpm', '_watch_from', 'bpm'):
+                getattr(heart_rate, name)[new_row] = getattr(self, name)[row]
+        return heart_rate
+
+    def rate_at(self, indices):
+        # Heart rate of every channel at each of the sample indices
+        # (channels x n): the median rate while beats keep coming, falling
+        # as 60 / seconds without a beat once there has been none for
+        # MAX_RR_SECONDS
+        indices = np.asarray(indices, dtype=np.int64)
+        since = np.where(self.last_beat >= 0, self.last_beat, self._watch_from)[:, None]
+        waited = indices[None, :] - since
+        stopped = 60.0 * self.sample_rate / np.maximum(waited, 1)
+        return np.where(waited > self.timeout, stopped, self._median_bpm[:, None])
+
+    def process(self, samples):
+        # Feed the next samples (channels x n); returns the channels whose
+        # heart rate changed: new intervals, or still no beat. A chunk holds
+        # at most a beat or two per channel, so the bookkeeping is done with
+        # plain numbers.
+        rows, peaks = self.detector.process(samples)
+        updated = set()
+        for row, peak in zip(rows.tolist(), peaks.tolist()):
+            last_peak = int(self.last_beat[row])
+            self.last_beat[row] = peak
+            if last_peak < 0:
+                continue
+            rr = (peak - last_peak) / self.sample_rate
+            if not MIN_RR_SECONDS <= rr <= MAX_RR_SECONDS:
+                continue  # A missed or extra beat is not an interval
+            self.beat_times[row].extend((peak / self.sample_rate,))
+            self.rr_intervals[row].extend((rr,))
+            self.heart_rates[row].extend((60.0 / rr,))
+            self._median_bpm[row] = 60.0 / statistics.median(self.rr_intervals[row].latest(HEART_RATE_BEATS).tolist())
+            updated.add(row)
+        bpm = self.rate_at((self.count - 1,))[:, 0]
+        changed = (bpm != self.bpm) & ~(np.isnan(bpm) & np.isnan(self.bpm))
+        self.bpm[:] = bpm
+        return sorted(updated.union(np.flatnonzero(changed).tolist()))
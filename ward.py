@@ -0,0 +1,114 @@
+# Central-station display: many bed panels on one screen, each a view of
+# the same ViewManager as the main window's graphs.
+#
+#   python ward.py Dataset --beds 32 --channels 4
+#   python ward.py --source tcp://10.0.0.5:5000?channels=4 --source tcp://10.0.0.6:5000?channels=4
+import argparse
+import itertools
+import math
+import sys  # System-specific parameters and functions
+
+import pyqtgraph as pg
+from PyQt6.QtWidgets import QApplication, QMainWindow
+
+from batch_report import find_signal_files
+from playback import DISPLAY_WINDOW_SECONDS
+from signal_format import STORAGE_DTYPES
+from sources import LiveSignal, open_source
+from views import ViewManager
+
+BED_COLORS = ['g', 'y', 'c', 'm', 'r', 'b', 'w']
+
+
+class WardDisplay(QMainWindow):
+    # All bed panels live in one GraphicsLayoutWidget, so the whole ward is
+    # a single scene painted once per frame rather than one widget per bed
+    def __init__(self, beds, columns=None, spacing=0.0, filtered=False, parent=None):
+        super().__init__(parent)
+        self.spacing = spacing  # Vertical distance between a bed's channels; 0 overlays them
+        self.filtered = filtered  # Channels are shown through their kind's filter preset
+        self.setWindowTitle("Ward Overview")
+        self.layout_widget = pg.GraphicsLayoutWidget()
+        self.layout_widget.setBackground('k')
+        self.setCentralWidget(self.layout_widget)
+
+        self.views = ViewManager(parent=self)
+        self.live_sources = []
+        columns = columns or max(1, math.ceil(math.sqrt(beds)))
+        for bed in range(beds):
+            plot_item = self.layout_widget.addPlot(row=bed // columns, col=bed % columns, title=f"Bed {bed + 1}")
+            plot_item.setMouseEnabled(x=False, y=False)
+            plot_item.hideButtons()
+            plot_item.setMenuEnabled(False)
+            plot_item.hideAxis('bottom')  # Beds follow their newest sample; time labels would only cost repaints
+            plot_item.getAxis('left').enableAutoSIPrefix(False)
+            plot_item.setXRange(0, DISPLAY_WINDOW_SECONDS, padding=0)
+            self.views.add_view(bed + 1, plot_item, BED_COLORS, legend=False)
+
+    def add_file(self, bed, file_path, channel_index=0):
+        view = self.views[bed]
+        self.views.add_file_channel(view, file_path, channel_index, f"Channel {len(view) + 1}")
+        if self.filtered:
+            self.views.set_filter(view, len(view) - 1, self.views.filter_preset(view, len(view) - 1))
+        self.stack(view)
+        view.is_playing = True
+
+    def attach_source(self, source, bed):
+        view = self.views[bed]
+        source.start()
+        self.live_sources.append(source)
+        for buffer in source.buffers:
+            self.views.add_channel(view, LiveSignal(buffer, source.sample_rate), source.sample_rate,
+                                   f"Channel {len(view) + 1}", source.describe())
+            if self.filtered:
+                self.views.set_filter(view, len(view) - 1, self.views.filter_preset(view, len(view) - 1))
+        self.stack(view)
+        view.is_playing = True
+
+    def stack(self, view):
+        # Channels top to bottom, all drawn by the bed's one batched curve
+        for index in range(len(view)):
+            self.views.set_offset(view, index, -index * self.spacing)
+
+    def closeEvent(self, event):
+        for source in self.live_sources:
+            source.stop()
+        super().closeEvent(event)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show many beds at once.")
+    parser.add_argument('inputs', nargs='*', help="recordings (.vsig/.pkl) or directories, dealt out to the beds")
+    parser.add_argument('--beds', type=int, default=16, help="number of bed panels")
+    parser.add_argument('--channels', type=int, default=4, help="recorded channels shown per bed")
+    parser.add_argument('--columns', type=int, default=None, help="panels per row (default: square grid)")
+    parser.add_argument('--spacing', type=float, default=0.0, help="vertical offset between a bed's channels (default: overlaid)")
+    parser.add_argument('--filter', action='store_true', help="remove baseline wander and mains hum (per signal kind)")
+    parser.add_argument('--source', action='append', default=[], metavar='URL', help="live feed for the next free bed (repeatable)")
+    parser.add_argument('--dtype', choices=STORAGE_DTYPES, default=None,
+                        help="hold every .pkl recording opened in memory as this dtype (int16 is scaled per "
+                             "channel); applies to the whole store, not to single channels. Default: keep the "
+                             "file's dtype")
+    args, qt_args = parser.parse_known_args(argv)
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    window = WardDisplay(args.beds, args.columns, args.spacing, args.filter)
+    window.views.store.dtype = args.dtype
+
+    bed = 1
+    for url in args.source[:args.beds]:
+        window.attach_source(open_source(url), bed)
+        bed += 1
+    files = find_signal_files(args.inputs)
+    if files:
+        channels = itertools.cycle(files)
+        for bed in range(bed, args.beds + 1):
+            for _ in range(args.channels):
+                window.add_file(bed, next(channels))
+
+    window.showMaximized()
+    return app.exec()
+
+
+if __name__ == "__main__":
+    sys.exit(main())